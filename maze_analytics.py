@@ -0,0 +1,330 @@
+# === تحليل صعوبة المستويات ===
+# يحسب لكل مستوى في الحزمة مقاييس تساعد على ضبط time_limit والعملات والأعداء
+# من البيانات بدلاً من التقدير: طول أقصر مسار وتكلفته، النهايات المسدودة،
+# عامل التفرع، أطوال الممرات، نقاط التمفصل، ونسبة المسار الواقعة في مدى الأعداء.
+# المقاييس تأتي من مرور خطي واحد على الشبكة ثم بحث BFS واحد لكل مصدر (البداية،
+# الهدف، كل عدو) وبحث DFS واحد لنقاط التمفصل، وتخزن حسب بصمة المستوى.
+# الاستخدام:
+#   python maze_analytics.py                        # المستويات المدمجة وملفات levels/
+#   python maze_analytics.py levels/level3.txt --sort enemy_route --reverse
+import os
+import sys
+import glob
+import json
+import math
+import hashlib
+import argparse
+from array import array
+from collections import Counter, deque
+from typing import Dict, List, Optional
+
+from maze_game import LEVELS, MoveTable, TERRAIN_WAIT_FRAMES
+from maze_chunks import ChunkedGrid, load_level as load_level_spec
+from maze_terrain import WALL, FLOOR, FLOOR_COST, COST_TABLE, cost_to_goal_field
+
+ANALYTICS_VERSION = 1  # يزاد عند تغيير طريقة حساب المقاييس حتى تهمل النتائج المخزنة
+ANALYTICS_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".smart_maze_analytics.json")
+ENEMY_REACH = 3  # خطوات العدو في اتجاه واحد قبل أن يغيره (أقل قيمة لـ max_direction_steps)
+AGENT_FRAMES_PER_STEP = 30  # SmartAgent.move_delay
+FPS = 60
+TIME_SLACK = 2.0  # هامش لتفكير العميل والالتفاف حول الأعداء
+POPCOUNT = bytes(bin(mask).count("1") for mask in range(16))
+
+# أعمدة التقرير: (المفتاح، العنوان، التنسيق)
+COLUMNS = [
+    ("size", "size", "{}"),
+    ("open_cells", "open", "{}"),
+    ("route_length", "route", "{}"),
+    ("route_cost", "cost", "{}"),
+    ("route_cells", "on-best", "{}"),
+    ("dead_ends", "dead", "{}"),
+    ("junctions", "junct", "{}"),
+    ("branching", "branch", "{:.2f}"),
+    ("corridor_max", "corr.max", "{}"),
+    ("corridor_mean", "corr.avg", "{:.1f}"),
+    ("articulation_points", "artic", "{}"),
+    ("chokepoints", "choke", "{}"),
+    ("enemy_route", "enemy%", "{:.0%}"),
+    ("time_limit", "limit", "{}"),
+    ("suggested_time", "suggest", "{}"),
+]
+
+
+def level_hash(level: dict, reach: int) -> str:
+    """بصمة محتوى المستوى وإعدادات التحليل (مفتاح التخزين المؤقت)"""
+    grid = level["grid"]
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((ANALYTICS_VERSION, reach, tuple(level["start"]), tuple(level["goal"]),
+                        [tuple(pos) for pos in level["enemies"]])).encode())
+    if isinstance(grid, ChunkedGrid):
+        digest.update(repr(grid.source.cache_key()).encode())  # دون قراءة الشبكة الضخمة
+    else:
+        for row in grid:
+            digest.update(bytes(row))
+    return digest.hexdigest()
+
+
+def bfs(masks: bytearray, offsets: List[tuple], sources: List[int], limit: int = None) -> array:
+    """المسافات بالخطوات من المصادر (-1 لغير القابلة للوصول أو الأبعد من limit)"""
+    dist = array("i", [-1]) * len(masks)
+    queue = deque()
+    for source in sources:
+        dist[source] = 0
+        queue.append(source)
+    while queue:
+        i = queue.popleft()
+        d = dist[i] + 1
+        if limit is not None and d > limit:
+            continue
+        for offset in offsets[masks[i]]:
+            j = i + offset
+            if dist[j] < 0:
+                dist[j] = d
+                queue.append(j)
+    return dist
+
+
+def find(parent: array, i: int) -> int:
+    """جذر مجموعة الخلية في union-find مع تقصير المسار"""
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def articulation_points(masks: bytearray, offsets: List[tuple], root: int, goal: int):
+    """نقاط التمفصل في مكون البداية (DFS تكراري لـ Tarjan)
+
+    يعيد (عدد النقاط، عدد النقاط التي يجب المرور بها من البداية إلى الهدف).
+    """
+    n = len(masks)
+    disc = array("i", [-1]) * n
+    low = array("i", [0]) * n
+    parent = array("i", [-1]) * n
+    points = bytearray(n)
+    disc[root] = 0
+    timer = 1
+    root_children = 0
+    stack = [(root, iter(offsets[masks[root]]))]
+    while stack:
+        v, moves = stack[-1]
+        for offset in moves:
+            w = v + offset
+            if disc[w] < 0:
+                parent[w] = v
+                disc[w] = low[w] = timer
+                timer += 1
+                stack.append((w, iter(offsets[masks[w]])))
+                break
+            if w != parent[v] and disc[w] < low[v]:
+                low[v] = disc[w]
+        else:
+            stack.pop()
+            p = parent[v]
+            if p < 0:
+                continue
+            if low[v] < low[p]:
+                low[p] = low[v]
+            if p == root:
+                root_children += 1
+            elif low[v] >= disc[p]:
+                points[p] = 1
+    if root_children > 1:
+        points[root] = 1
+
+    # الهدف في فرع ابن لا يعود أعلى من أبيه: الأب نقطة مرور إلزامية
+    chokepoints = 0
+    if disc[goal] >= 0:
+        v = goal
+        while parent[v] >= 0:
+            p = parent[v]
+            if p != root and low[v] >= disc[p]:
+                chokepoints += 1
+            v = p
+    return sum(points), chokepoints
+
+
+def analyze_level(level: dict, reach: int = ENEMY_REACH) -> Dict[str, float]:
+    """جميع مقاييس مستوى واحد"""
+    grid = level["grid"]
+    if isinstance(grid, ChunkedGrid):
+        grid = grid.to_rows()
+    rows, cols = len(grid), len(grid[0])
+    table = MoveTable(grid)
+    masks = table.masks
+    # إزاحات الفهرس المسطح لكل قناع (بترتيب بتات MoveTable)
+    steps = (1, cols, -1, -cols)
+    offsets = [tuple(steps[bit] for bit in range(4) if mask >> bit & 1) for mask in range(16)]
+    start = level["start"][0] * cols + level["start"][1]
+    goal = level["goal"][0] * cols + level["goal"][1]
+
+    # المرور الخطي: الدرجات والنهايات والتقاطعات وممرات خلايا الدرجة 2
+    open_cells = dead_ends = junctions = junction_choices = 0
+    weighted = False
+    corridor = array("i", [-1]) * (rows * cols)
+    for r in range(rows):
+        row = grid[r]
+        base = r * cols
+        for c in range(cols):
+            value = row[c]
+            if value == WALL:
+                continue
+            i = base + c
+            mask = masks[i]
+            degree = POPCOUNT[mask]
+            open_cells += 1
+            if value != FLOOR:
+                weighted = True
+            if degree == 1:
+                dead_ends += 1
+            elif degree >= 3:
+                junctions += 1
+                junction_choices += degree - 1
+            elif degree == 2:
+                corridor[i] = i
+                if mask & 4 and corridor[i - 1] >= 0:
+                    corridor[find(corridor, i - 1)] = find(corridor, i)
+                if mask & 8 and corridor[i - cols] >= 0:
+                    corridor[find(corridor, i - cols)] = find(corridor, i)
+    lengths = Counter(find(corridor, i) for i in range(rows * cols) if corridor[i] >= 0).values()
+
+    # BFS من البداية والهدف: طول المسار والخلايا الواقعة على أي أقصر مسار
+    from_start = bfs(masks, offsets, [start])
+    to_goal = bfs(masks, offsets, [goal])
+    route_length = to_goal[start]
+    reachable = sum(1 for d in from_start if d >= 0)
+    route_cells = 0
+    if route_length >= 0:
+        route_cells = sum(1 for a, b in zip(from_start, to_goal) if a >= 0 and b >= 0 and a + b == route_length)
+
+    # المسار الذي يسلكه العميل: الأرخص (يساوي الأقصر في المستويات غير الموزونة)
+    if weighted:
+        field = cost_to_goal_field(tuple(level["goal"]), rows, cols, table.neighbors,
+                                   lambda cell: COST_TABLE[grid[cell[0]][cell[1]]])
+        cost = lambda i: COST_TABLE[grid[i // cols][i % cols]]
+    else:
+        field = to_goal
+        cost = lambda i: FLOOR_COST
+    route = []
+    if field[start] >= 0:
+        i = start
+        while i != goal:
+            i = next(j for j in (i + o for o in offsets[masks[i]])
+                     if field[j] >= 0 and field[j] + cost(j) == field[i])
+            route.append(i)
+
+    # BFS محدود من كل عدو: جزء المسار الذي يصله عدو خلال اندفاعة واحدة
+    in_reach = bytearray(rows * cols)
+    for r, c in level["enemies"]:
+        for i, d in enumerate(bfs(masks, offsets, [r * cols + c], reach)):
+            if d >= 0:
+                in_reach[i] = 1
+    enemy_route = sum(in_reach[i] for i in route) / len(route) if route else 0.0
+
+    articulation, chokepoints = articulation_points(masks, offsets, start, goal)
+
+    frames = sum(AGENT_FRAMES_PER_STEP + max(0, cost(i) - FLOOR_COST) * TERRAIN_WAIT_FRAMES for i in route)
+    route_seconds = frames / FPS
+    return {
+        "rows": rows,
+        "cols": cols,
+        "open_cells": open_cells,
+        "reachable": reachable,
+        "route_length": route_length,
+        "route_cost": field[start],
+        "route_cells": route_cells,
+        "dead_ends": dead_ends,
+        "junctions": junctions,
+        "branching": junction_choices / junctions if junctions else 0.0,
+        "corridors": len(lengths),
+        "corridor_max": max(lengths, default=0),
+        "corridor_mean": sum(lengths) / len(lengths) if lengths else 0.0,
+        "articulation_points": articulation,
+        "chokepoints": chokepoints,
+        "enemy_route": enemy_route,
+        "route_seconds": route_seconds,
+        "suggested_time": max(10, math.ceil(route_seconds * TIME_SLACK / 10) * 10) if route else None,
+    }
+
+
+# === التخزين المؤقت حسب بصمة المستوى ===
+def load_cache(path: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(path: str, cache: dict):
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+    except OSError:
+        pass  # التخزين المؤقت اختياري
+
+
+def analyze_pack(specs: List[str], reach: int = ENEMY_REACH,
+                 cache_path: Optional[str] = ANALYTICS_CACHE_FILE) -> List[dict]:
+    """مقاييس جميع المستويات (المحسوبة سابقاً لنفس المحتوى تقرأ من الملف المؤقت)"""
+    cache = load_cache(cache_path) if cache_path else {}
+    report = []
+    changed = False
+    for spec in specs:
+        level = LEVELS[int(spec)] if spec.isdigit() else load_level_spec(spec)
+        key = level_hash(level, reach)
+        metrics = cache.get(key)
+        if metrics is None:
+            metrics = analyze_level(level, reach)
+            cache[key] = metrics
+            changed = True
+        report.append(dict(metrics, level=spec, size=f"{metrics['rows']}x{metrics['cols']}",
+                           time_limit=level["time_limit"], coins=level["coins"],
+                           enemies=len(level["enemies"])))
+    if cache_path and changed:
+        save_cache(cache_path, cache)
+    return report
+
+
+def format_report(report: List[dict]) -> str:
+    """جدول نصي بعمود لكل مقياس"""
+    header = ["level"] + [title for _, title, _ in COLUMNS]
+    lines = [header] + [
+        [entry["level"]] + ["-" if entry[key] is None else fmt.format(entry[key]) for key, _, fmt in COLUMNS]
+        for entry in report
+    ]
+    widths = [max(len(line[i]) for line in lines) for i in range(len(header))]
+    return "\n".join(
+        "  ".join(cell.ljust(width) if i == 0 else cell.rjust(width)
+                  for i, (cell, width) in enumerate(zip(line, widths)))
+        for line in lines
+    )
+
+
+def default_specs() -> List[str]:
+    """المستويات المدمجة ثم ملفات levels/*.txt"""
+    folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), "levels")
+    files = sorted(glob.glob(os.path.join(folder, "*.txt")))
+    return [str(i) for i in range(len(LEVELS))] + [os.path.relpath(path) for path in files]
+
+
+def main(argv=None):
+    keys = [key for key, _, _ in COLUMNS] + ["reachable", "route_seconds", "corridors", "coins", "enemies"]
+    parser = argparse.ArgumentParser(description="Level difficulty analytics")
+    parser.add_argument("levels", nargs="*", help="level numbers, level files or seed:ROWSxCOLS:SEED")
+    parser.add_argument("--sort", choices=keys, default=None, help="sort the report by this metric")
+    parser.add_argument("--reverse", action="store_true")
+    parser.add_argument("--reach", type=int, default=ENEMY_REACH, help="enemy reach in steps")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args(argv)
+
+    report = analyze_pack(args.levels or default_specs(), args.reach,
+                          None if args.no_cache else ANALYTICS_CACHE_FILE)
+    if args.sort:
+        report.sort(key=lambda entry: (entry[args.sort] is None, entry[args.sort]), reverse=args.reverse)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
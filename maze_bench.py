@@ -0,0 +1,237 @@
+# === قياس زمن الإطار للعبة الحقيقية دون نافذة ===
+# يشغل ModernMazeGame نفسها (الأحداث والتحديث والرسم عبر ModernMazeGame.step)
+# بمشغل SDL الوهمي لعدد ثابت من الإطارات مع مدخلات مصطنعة (تحريك الفأرة فوق
+# الأزرار، ضغط الأسهم، أزرار الخوارزميات) والحركة التلقائية مفعلة، ثم يطبع
+# p50/p99 لزمن الإطار وعدد الأسطح الجديدة في كل إطار لكل مستوى، ويفشل إذا
+# تجاوزت النتائج خط الأساس المخزن.
+# الاستخدام:
+#   python maze_bench.py                     # مقارنة بخط الأساس bench_baseline.json
+#   python maze_bench.py --save              # تسجيل خط أساس جديد
+#   python maze_bench.py 0 seed:201x201:7    # مستويات محددة
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from typing import Callable, Dict, List
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+import pygame
+
+from maze_game import LEVELS, PATH_CACHE, ModernMazeGame
+from maze_chunks import load_level as load_level_spec
+
+FRAMES = 300
+REPEATS = 3  # تكرار مرور الزمن وأخذ أقل زمن لكل إطار (يزيل ضجيج النظام من p99)
+WARMUP_FRAMES = 30  # إطارات أولى لا تحتسب (تحميل الخطوط وبناء الطبقات)
+WINDOW_SIZE = (1200, 800)
+DEFAULT_BASELINE = "bench_baseline.json"
+DEFAULT_GENERATED = ["seed:41x41:7", "seed:201x201:7", "seed:2001x2001:42"]
+TIME_TOLERANCE = 0.25  # نسبة الزيادة المسموحة في p50 عن خط الأساس
+P99_TOLERANCE = 0.5  # p99 أكثر تأثراً بضجيج النظام
+SURFACE_TOLERANCE = 0.5  # الزيادة المسموحة في متوسط الأسطح الجديدة لكل إطار
+
+
+def percentile(values: List[float], q: float) -> float:
+    """النسبة المئوية q (0-100) بطريقة أقرب رتبة"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class SurfaceCounter:
+    """عد الأسطح الجديدة التي تنشئها اللعبة (نصوص، تحجيم، نسخ، pygame.Surface)
+
+    يعتمد على sys.setprofile لاستدعاءات C، لذلك يستخدم في مرور منفصل عن
+    قياس الزمن حتى لا يؤثر في الأرقام.
+    """
+    METHODS = frozenset({"render", "copy", "convert", "convert_alpha", "subsurface"})
+
+    def __init__(self):
+        self.count = 0
+        self._surface_type = None
+
+    def profile(self, frame, event, arg):
+        if event != "c_call":
+            return
+        owner = getattr(arg, "__self__", None)
+        if owner is pygame.transform or (
+                arg.__name__ in self.METHODS and isinstance(owner, (pygame.Surface, pygame.font.Font))):
+            self.count += 1
+
+    def __enter__(self) -> "SurfaceCounter":
+        counter = self
+        self._surface_type = pygame.Surface
+
+        class CountedSurface(self._surface_type):
+            def __init__(self, *args, **kwargs):
+                counter.count += 1
+                super().__init__(*args, **kwargs)
+
+        pygame.Surface = CountedSurface
+        sys.setprofile(self.profile)
+        return self
+
+    def __exit__(self, *exc):
+        sys.setprofile(None)
+        pygame.Surface = self._surface_type
+
+
+# === المدخلات المصطنعة ===
+def click(button) -> List[pygame.event.Event]:
+    """تحريك الفأرة إلى زر ثم ضغطه"""
+    pos = button.rect.center
+    return [pygame.event.Event(pygame.MOUSEMOTION, pos=pos, rel=(0, 0), buttons=(0, 0, 0)),
+            pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1)]
+
+
+def scripted_input(game: ModernMazeGame, frame: int, rng: random.Random) -> List[pygame.event.Event]:
+    """أحداث الإطار رقم frame: سيناريو ثابت يتكرر بنفس الترتيب في كل تشغيل"""
+    if not game.auto_move:
+        return click(game.auto_button)  # تفعيل الحركة التلقائية (وبعد كل إعادة للمستوى)
+    if frame % 150 == 60:
+        return click(game.algorithm_buttons[(frame // 150) % 3])  # عرض بحث متدرج
+    events = []
+    if frame % 7 == 0:
+        # التحويم فوق الأزرار وخارجها لتشغيل حركة التوهج
+        buttons = game.all_buttons()
+        target = rng.randrange(len(buttons) + 1)
+        pos = buttons[target].rect.center if target < len(buttons) else (10, game.height - 10)
+        events.append(pygame.event.Event(pygame.MOUSEMOTION, pos=pos, rel=(0, 0), buttons=(0, 0, 0)))
+    if frame % 45 == 20:
+        key = rng.choice((pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN))
+        events.append(pygame.event.Event(pygame.KEYDOWN, key=key, mod=0, unicode="", scancode=0))
+    return events
+
+
+# === تشغيل السيناريو ===
+def run_pass(game: ModernMazeGame, index: int, frames: int, seed: int,
+             measure: Callable[[Callable[[], None]], float]) -> List[float]:
+    """تشغيل المستوى index من بدايته وإرجاع قياس كل إطار بعد الإحماء"""
+    random.seed(seed)
+    rng = random.Random(seed)
+    game.game_over = False
+    game.score = 0
+    game.load_level(index)
+    samples = []
+    for frame in range(WARMUP_FRAMES + frames):
+        events = scripted_input(game, frame, rng)
+        value = measure(lambda: game.step(events))
+        if frame >= WARMUP_FRAMES:
+            samples.append(value)
+        if game.level_complete or game.game_over or game.game_complete:
+            game.restore(game.level_start)  # البقاء في المستوى نفسه حتى نهاية القياس
+    return samples
+
+
+def time_frame(step: Callable[[], None]) -> float:
+    """زمن الإطار بالمللي ثانية"""
+    begin = time.perf_counter()
+    step()
+    return (time.perf_counter() - begin) * 1000
+
+
+def count_frame(counter: SurfaceCounter) -> Callable[[Callable[[], None]], float]:
+    """عدد الأسطح الجديدة في الإطار"""
+    def measure(step: Callable[[], None]) -> float:
+        before = counter.count
+        step()
+        return counter.count - before
+    return measure
+
+
+def bench_level(game: ModernMazeGame, index: int, frames: int, seed: int,
+                repeats: int = REPEATS) -> Dict[str, float]:
+    """قياس زمن الإطار ثم (في مرور منفصل مطابق) الأسطح الجديدة لكل إطار
+
+    السيناريو حتمي، فالإطار نفسه يقوم بالعمل نفسه في كل تكرار، وأقل زمن
+    له بين التكرارات هو كلفته الحقيقية.
+    """
+    cache_before = PATH_CACHE.stats()
+    passes = [run_pass(game, index, frames, seed, time_frame) for _ in range(repeats)]
+    times = [min(samples) for samples in zip(*passes)]
+    with SurfaceCounter() as counter:
+        surfaces = run_pass(game, index, frames, seed, count_frame(counter))
+    cache = PATH_CACHE.stats()
+    hits = cache["hits"] - cache_before["hits"]
+    lookups = hits + cache["misses"] - cache_before["misses"]
+    return {
+        "p50_ms": round(percentile(times, 50), 3),
+        "p99_ms": round(percentile(times, 99), 3),
+        "max_ms": round(max(times), 3),
+        "surfaces_per_frame": round(sum(surfaces) / len(surfaces), 3),
+        "max_surfaces": int(max(surfaces)),
+        "path_cache_hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+    }
+
+
+def run_benchmark(specs: List[str], frames: int = FRAMES, seed: int = 0,
+                  repeats: int = REPEATS) -> Dict[str, dict]:
+    """قياس جميع المستويات في لعبة واحدة بحجم نافذة ثابت"""
+    levels = [LEVELS[int(spec)] if spec.isdigit() else load_level_spec(spec) for spec in specs]
+    random.seed(seed)
+    game = ModernMazeGame(levels)
+    game.step([pygame.event.Event(pygame.VIDEORESIZE, w=WINDOW_SIZE[0], h=WINDOW_SIZE[1])])
+    results = {}
+    for index, spec in enumerate(specs):
+        results[spec] = bench_level(game, index, frames, seed, repeats)
+        stats = results[spec]
+        print(f"{spec:>20}  p50 {stats['p50_ms']:7.2f} ms  p99 {stats['p99_ms']:7.2f} ms  "
+              f"surfaces/frame {stats['surfaces_per_frame']:6.2f}  "
+              f"path cache hits {stats['path_cache_hit_rate']:4.0%}")
+    return results
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float = TIME_TOLERANCE,
+            p99_tolerance: float = P99_TOLERANCE) -> List[str]:
+    """قائمة التراجعات مقارنة بخط الأساس (المستويات غير المسجلة فيه تتجاهل)"""
+    regressions = []
+    for spec, stats in results.items():
+        base = baseline.get(spec)
+        if base is None:
+            continue
+        for key, allowed in (("p50_ms", tolerance), ("p99_ms", p99_tolerance)):
+            if stats[key] > base[key] * (1 + allowed):
+                regressions.append(f"{spec}: {key} {stats[key]:.2f} > {base[key]:.2f} (+{allowed:.0%})")
+        if stats["surfaces_per_frame"] > base["surfaces_per_frame"] + SURFACE_TOLERANCE:
+            regressions.append(f"{spec}: surfaces_per_frame {stats['surfaces_per_frame']:.2f}"
+                               f" > {base['surfaces_per_frame']:.2f}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Headless frame-time benchmark of the real game loop")
+    parser.add_argument("levels", nargs="*", help="level numbers, level files or seed:ROWSxCOLS:SEED")
+    parser.add_argument("--frames", type=int, default=FRAMES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=TIME_TOLERANCE,
+                        help="allowed relative p50 increase over the baseline")
+    parser.add_argument("--p99-tolerance", type=float, default=P99_TOLERANCE)
+    parser.add_argument("--save", action="store_true", help="store the results as the new baseline")
+    args = parser.parse_args(argv)
+
+    specs = args.levels or [str(i) for i in range(len(LEVELS))] + DEFAULT_GENERATED
+    results = run_benchmark(specs, args.frames, args.seed, args.repeats)
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump({"frames": args.frames, "levels": results}, f, indent=2)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline} (run with --save to create one)")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)["levels"]
+    regressions = compare(results, baseline, args.tolerance, args.p99_tolerance)
+    for line in regressions:
+        print("REGRESSION", line)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,315 @@
+# === تخزين المتاهة على شكل قطع تحمل عند الطلب ===
+# يسمح هذا الملف بتشغيل خرائط ضخمة دون تحميل الشبكة كاملة في الذاكرة:
+# تقسم الشبكة إلى قطع مربعة ثابتة الحجم، تحمل القطعة من ملف المستوى أو
+# تولد من بذرة عند أول وصول إليها، وتحذف القطع الأقدم استخداماً (LRU)
+# عند امتلاء الذاكرة أو ابتعادها عن اللاعب والأعداء.
+import os
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Iterable, List, Tuple
+
+CHUNK_SIZE = 32  # طول ضلع القطعة بالخلايا
+MAX_CHUNKS = 256  # أقصى عدد من القطع في الذاكرة
+PLAIN_MAX_CELLS = 512 * 512  # ملفات المستويات الأصغر تحمل كاملة في قوائم عادية
+
+# تحويل رموز ملف المستوى إلى قيم الخلايا (S و G ممرات، والأرقام 2-9 أرضيات موزونة)
+_CELL_TABLE = bytes(
+    (b - ord("0")) if ord("0") <= b <= ord("9") else 0 for b in range(256)
+)
+
+
+# === مصادر القطع ===
+class ChunkSource(ABC):
+    """واجهة لمصدر يوفر محتوى القطع"""
+    rows = 0
+    cols = 0
+    start = (0, 0)
+    goal = (0, 0)
+    terrain = frozenset()  # قيم الأرضيات الموزونة الموجودة (2 طين، 3 جليد، 4 خطر...)
+
+    @abstractmethod
+    def load_chunk(self, r0: int, c0: int, size: int) -> bytearray:
+        """تحميل قطعة تبدأ من الخلية (r0, c0) بصفوف متتالية طول كل منها size"""
+
+    @abstractmethod
+    def cache_key(self) -> tuple:
+        """هوية المحتوى (تستخدم بدلاً من قراءة الشبكة كاملة لحساب بصمتها)"""
+
+
+class LevelFileSource(ChunkSource):
+    """قراءة القطع مباشرة من ملف مستوى نصي (levels/*.txt) بالقفز إلى موقعها"""
+    def __init__(self, path: str):
+        self.path = path
+        self.start = None
+        self.goal = None
+        terrain = set()
+        # مسح الملف مرة واحدة لمعرفة الأبعاد وموقعي البداية والنهاية والأرضيات دون تخزينه
+        with open(path, "rb") as f:
+            first = f.readline()
+            self.cols = len(first.rstrip(b"\r\n"))
+            self.stride = len(first)  # طول السطر مع رمز نهاية السطر
+            line = first
+            r = 0
+            while line.strip():
+                for marker in (b"S", b"G"):
+                    c = line.find(marker)
+                    if c != -1:
+                        if marker == b"S":
+                            self.start = (r, c)
+                        else:
+                            self.goal = (r, c)
+                terrain.update(line.rstrip(b"\r\n").translate(None, b"01SG"))
+                r += 1
+                line = f.readline()
+            self.rows = r
+        self.terrain = frozenset(_CELL_TABLE[b] for b in terrain)
+        if self.start is None or self.goal is None:
+            raise ValueError(f"Level file {path} must contain S and G markers")
+        self._file = None
+
+    def load_chunk(self, r0: int, c0: int, size: int) -> bytearray:
+        """قراءة صفوف القطعة من الملف"""
+        if self._file is None:
+            self._file = open(self.path, "rb")
+        chunk = bytearray(b"\x01" * (size * size))  # ما خارج الخريطة جدار
+        width = max(0, min(size, self.cols - c0))
+        for i in range(min(size, self.rows - r0)):
+            self._file.seek((r0 + i) * self.stride + c0)
+            chunk[i * size:i * size + width] = self._file.read(width).translate(_CELL_TABLE)
+        return chunk
+
+    def cache_key(self) -> tuple:
+        """هوية الملف: المسار ووقت التعديل والحجم"""
+        stat = os.stat(self.path)
+        return ("file", os.path.abspath(self.path), stat.st_mtime_ns, stat.st_size)
+
+    def close(self):
+        """إغلاق الملف"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class SeededMazeSource(ChunkSource):
+    """توليد متاهة مثالية (خوارزمية الشجرة الثنائية) من بذرة
+
+    الخلايا ذات الإحداثيات الفردية غرف، وكل غرفة تفتح ممراً إلى الشمال أو
+    الشرق حسب قيمة مشتقة من البذرة وموقعها فقط، لذلك يمكن توليد أي قطعة
+    بشكل مستقل وبنفس النتيجة دائماً.
+    """
+    def __init__(self, seed: int, rows: int, cols: int):
+        # الأبعاد فردية حتى تحيط الجدران بالغرف
+        self.seed = seed
+        self.rows = rows if rows % 2 else rows - 1
+        self.cols = cols if cols % 2 else cols - 1
+        self.start = (1, 1)
+        self.goal = (self.rows - 2, self.cols - 2)
+
+    def cache_key(self) -> tuple:
+        """هوية المتاهة المولدة: البذرة والأبعاد"""
+        return ("seed", self.seed, self.rows, self.cols)
+
+    def carves_north(self, r: int, c: int) -> bool:
+        """هل تفتح الغرفة (r, c) ممراً إلى الشمال (وإلا فإلى الشرق)"""
+        if r == 1:
+            return False  # الصف الأول يفتح شرقاً دائماً
+        if c == self.cols - 2:
+            return True  # العمود الأخير يفتح شمالاً دائماً
+        h = (r * 73856093) ^ (c * 19349663) ^ (self.seed * 83492791)
+        h = (h * 2654435761) & 0xFFFFFFFF
+        return bool((h >> 16) & 1)
+
+    def cell(self, r: int, c: int) -> int:
+        """قيمة الخلية (0 ممر، 1 جدار)"""
+        if r <= 0 or c <= 0 or r >= self.rows - 1 or c >= self.cols - 1:
+            return 1
+        if r % 2 and c % 2:
+            return 0  # غرفة
+        if r % 2:
+            # جدار بين غرفتين أفقياً: مفتوح إذا فتحت الغرفة اليسرى شرقاً
+            return 1 if self.carves_north(r, c - 1) else 0
+        if c % 2:
+            # جدار بين غرفتين عمودياً: مفتوح إذا فتحت الغرفة السفلى شمالاً
+            return 0 if self.carves_north(r + 1, c) else 1
+        return 1
+
+    def load_chunk(self, r0: int, c0: int, size: int) -> bytearray:
+        """توليد محتوى القطعة"""
+        chunk = bytearray(size * size)
+        cell = self.cell
+        for i in range(size):
+            base = i * size
+            r = r0 + i
+            for j in range(size):
+                chunk[base + j] = cell(r, c0 + j)
+        return chunk
+
+
+# === الشبكة المقسمة ===
+class _ChunkedRow:
+    """صف افتراضي يسمح باستخدام grid[r][c] كما في الشبكة العادية"""
+    __slots__ = ("grid", "r")
+
+    def __init__(self, grid: "ChunkedGrid", r: int):
+        self.grid = grid
+        self.r = r
+
+    def __getitem__(self, c: int) -> int:
+        return self.grid.cell(self.r, c)
+
+    def __len__(self) -> int:
+        return self.grid.cols
+
+
+class ChunkedGrid:
+    """شبكة متاهة تحمل قطعها عند الطلب وتحذف الأقدم استخداماً"""
+    def __init__(self, source: ChunkSource, chunk_size: int = CHUNK_SIZE, max_chunks: int = MAX_CHUNKS,
+                 shared: "ChunkedGrid" = None):
+        self.source = source
+        self.shared = shared  # شبكة أم تؤخذ منها القطع بدلاً من المصدر (القطع للقراءة فقط)
+        self.rows = source.rows
+        self.cols = source.cols
+        self.chunk_size = chunk_size
+        self.max_chunks = max(9, max_chunks)  # يكفي على الأقل لجوار قطعة كامل
+        self.chunks = OrderedDict()  # (صف القطعة، عمود القطعة) -> bytearray
+        self.loads = 0
+        self.evictions = 0
+        self._last_prefetch = None
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def fork(self) -> "ChunkedGrid":
+        """شبكة على المصدر نفسه بقائمة LRU مستقلة (لكل جلسة على الخادم)
+
+        القطع الناقصة تؤخذ من هذه الشبكة، فتبقى ذاكرة مشتركة لا يحذف منها
+        evict_far في الشبكات المتفرعة.
+        """
+        return ChunkedGrid(self.source, self.chunk_size, self.max_chunks, shared=self)
+
+    def __getitem__(self, r: int) -> _ChunkedRow:
+        return _ChunkedRow(self, r)
+
+    def chunk_key(self, r: int, c: int) -> Tuple[int, int]:
+        """مفتاح القطعة التي تحتوي الخلية"""
+        return r // self.chunk_size, c // self.chunk_size
+
+    def get_chunk(self, key: Tuple[int, int]) -> bytearray:
+        """إرجاع القطعة مع تحميلها عند الحاجة"""
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            size = self.chunk_size
+            if self.shared is not None:
+                chunk = self.shared.get_chunk(key)
+            else:
+                chunk = self.source.load_chunk(key[0] * size, key[1] * size, size)
+            self.chunks[key] = chunk
+            self.loads += 1
+            if len(self.chunks) > self.max_chunks:
+                self.chunks.popitem(last=False)
+                self.evictions += 1
+        else:
+            self.chunks.move_to_end(key)
+        return chunk
+
+    def cell(self, r: int, c: int) -> int:
+        """قيمة الخلية (r, c)"""
+        size = self.chunk_size
+        chunk = self.get_chunk((r // size, c // size))
+        return chunk[(r % size) * size + c % size]
+
+    def prefetch(self, pos, radius: int = 1):
+        """تحميل القطعة المحيطة بالموقع وجيرانها مسبقاً (يستدعى من الخوارزميات)"""
+        key = self.chunk_key(pos[0], pos[1])
+        if key == self._last_prefetch:
+            return
+        self._last_prefetch = key
+        max_r = (self.rows - 1) // self.chunk_size
+        max_c = (self.cols - 1) // self.chunk_size
+        for kr in range(max(0, key[0] - radius), min(max_r, key[0] + radius) + 1):
+            for kc in range(max(0, key[1] - radius), min(max_c, key[1] + radius) + 1):
+                self.get_chunk((kr, kc))
+        self.get_chunk(key)  # القطعة الحالية هي الأحدث استخداماً
+
+    def to_rows(self) -> List[bytes]:
+        """قراءة الشبكة كاملة صفاً بصف (للتحليل دون اللعب، يمر على كل قطعة مرة واحدة)"""
+        size = self.chunk_size
+        bands = (self.cols + size - 1) // size
+        rows = []
+        for kr in range((self.rows + size - 1) // size):
+            chunks = [self.get_chunk((kr, kc)) for kc in range(bands)]
+            for i in range(min(size, self.rows - kr * size)):
+                row = b"".join(chunk[i * size:(i + 1) * size] for chunk in chunks)
+                rows.append(row[:self.cols])
+        return rows
+
+    def evict_far(self, anchors: Iterable, keep_radius: int = 2):
+        """حذف القطع البعيدة عن جميع المواقع المعطاة (اللاعب والأعداء)"""
+        anchor_keys = [self.chunk_key(pos[0], pos[1]) for pos in anchors]
+        for key in list(self.chunks):
+            if all(max(abs(key[0] - a[0]), abs(key[1] - a[1])) > keep_radius for a in anchor_keys):
+                del self.chunks[key]
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        """إحصائيات التحميل والحذف"""
+        return {
+            "loaded": len(self.chunks),
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "bytes": len(self.chunks) * self.chunk_size * self.chunk_size
+        }
+
+
+# === إنشاء مستويات مقسمة ===
+def level_from_file(path: str, coins: int = 10, time_limit: int = 300, **grid_options) -> dict:
+    """إنشاء بيانات مستوى من ملف نصي مع تحميل القطع عند الطلب
+
+    الملفات حتى PLAIN_MAX_CELLS خلية تقرأ كاملة في قائمة صفوف، فتحتفظ بما
+    تحتاجه الشبكات العادية (حقل المسافات إلى الهدف وممر المسار للأعداء).
+    """
+    source = LevelFileSource(path)
+    if source.rows * source.cols <= PLAIN_MAX_CELLS:
+        with open(path, "rb") as f:
+            grid = [list(f.readline().rstrip(b"\r\n").translate(_CELL_TABLE)) for _ in range(source.rows)]
+    else:
+        grid = ChunkedGrid(source, **grid_options)
+    return {
+        "grid": grid,
+        "start": source.start,
+        "goal": source.goal,
+        "enemies": [],
+        "coins": coins,
+        "time_limit": time_limit
+    }
+
+
+def seeded_level(seed: int, rows: int, cols: int, enemies: int = 4, coins: int = 20,
+                 time_limit: int = 600, **grid_options) -> dict:
+    """إنشاء مستوى ضخم مولد من بذرة"""
+    source = SeededMazeSource(seed, rows, cols)
+    # وضع الأعداء في غرف قريبة من البداية
+    enemy_positions: List[Tuple[int, int]] = []
+    for i in range(enemies):
+        pos = (5 + 4 * i, 5 + 2 * i)
+        if pos[0] < source.rows - 1 and pos[1] < source.cols - 1:
+            enemy_positions.append(pos)
+    return {
+        "grid": ChunkedGrid(source, **grid_options),
+        "start": source.start,
+        "goal": source.goal,
+        "enemies": enemy_positions,
+        "coins": coins,
+        "time_limit": time_limit
+    }
+
+
+def load_level(spec: str) -> dict:
+    """تحميل مستوى من مسار ملف أو من مواصفة بذرة بالشكل seed:ROWSxCOLS:SEED"""
+    if spec.startswith("seed:"):
+        _, size, seed = spec.split(":")
+        rows, cols = (int(v) for v in size.lower().split("x"))
+        return seeded_level(int(seed), rows, cols)
+    if not os.path.isfile(spec):
+        raise FileNotFoundError(spec)
+    return level_from_file(spec)
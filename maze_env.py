@@ -0,0 +1,379 @@
+# === بيئة تدريب بأسلوب Gym فوق قواعد المتاهة ===
+# MazeEnv: بيئة مفردة تستخدم فئتي Maze و Enemy نفسيهما (مرجع للقواعد)
+# VectorMazeEnv: عدد N من المتاهات المستقلة تتقدم معاً بعمليات مصفوفات numpy
+#
+# خطوة واحدة = حركة اللاعب ثم نافذة حركة واحدة للأعداء (ENEMY_MOVE_FRAMES إطاراً)
+# الاستخدام لقياس الأداء: python maze_env.py --envs 256 --steps 1000
+import os
+import sys
+import time
+import random
+import argparse
+from typing import List, Tuple
+
+import numpy as np
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+from maze_game import LEVELS, Maze, MoveTable, RouteCorridor, MOVE_DIRECTIONS, MOVES_BY_MASK
+from maze_terrain import COST_TABLE, cost_to_goal_field
+
+# الإجراءات: أعلى، أسفل، يسار، يمين، بقاء
+ACTIONS = np.array([[-1, 0], [1, 0], [0, -1], [0, 1], [0, 0]], dtype=np.int64)
+# اتجاهات الأعداء بترتيب بتات قناع الحركة في MoveTable
+ENEMY_DIRECTIONS = np.array(MOVE_DIRECTIONS, dtype=np.int64)
+# عدد الحركات المسموحة لكل قناع، ورقم الاتجاه رقم k بين الحركات المسموحة
+MASK_COUNTS = np.array([len(moves) for moves in MOVES_BY_MASK], dtype=np.int64)
+MASK_CHOICES = np.zeros((16, 4), dtype=np.int64)
+for _mask, _moves in enumerate(MOVES_BY_MASK):
+    for _k, _move in enumerate(_moves):
+        MASK_CHOICES[_mask, _k] = MOVE_DIRECTIONS.index(_move)
+# بت قناع الحركة لكل اتجاه مفهرس بـ (dr + 1) * 3 + (dc + 1)
+DIRECTION_BIT_LOOKUP = np.zeros(9, dtype=np.uint8)
+for _bit, (_dr, _dc) in enumerate(MOVE_DIRECTIONS):
+    DIRECTION_BIT_LOOKUP[(_dr + 1) * 3 + _dc + 1] = 1 << _bit
+
+ENEMY_MOVE_FRAMES = 20  # عدد الإطارات بين حركتين للعدو في اللعبة
+SAFE_ZONE_RADIUS = 2  # نفس Enemy.safe_zone_radius
+COIN_REWARD = 10
+GOAL_REWARD = 100
+COLLISION_REWARD = -100
+
+# قنوات الملاحظة
+OBS_WALLS, OBS_COINS, OBS_ENEMIES, OBS_PLAYER = range(4)
+OBS_CHANNELS = 4
+
+
+# === البيئة المفردة ===
+class MazeEnv:
+    """بيئة مفردة (reset/step) تعتمد على Maze و Enemy مباشرة"""
+    def __init__(self, level: dict = None, max_steps: int = 500, seed: int = None):
+        self.level = level or LEVELS[0]
+        self.max_steps = max_steps
+        self.seed = seed
+        self.maze = None
+        self.steps = 0
+        self.walls = None
+
+    def reset(self) -> np.ndarray:
+        """بدء حلقة جديدة وإرجاع الملاحظة الأولى"""
+        if self.seed is not None:
+            random.seed(self.seed)
+            self.seed += 1
+        self.maze = Maze(self.level, 1)
+        grid = self.maze.grid
+        self.walls = np.array([[grid[r][c] for c in range(self.maze.cols)]
+                               for r in range(self.maze.rows)], dtype=np.uint8) == 1
+        self.steps = 0
+        return self.observation()
+
+    def observation(self) -> np.ndarray:
+        """ملاحظة على شكل (القنوات، الصفوف، الأعمدة)"""
+        obs = np.zeros((OBS_CHANNELS, self.maze.rows, self.maze.cols), dtype=np.uint8)
+        obs[OBS_WALLS] = self.walls
+        for r, c in self.maze.coins:
+            obs[OBS_COINS, r, c] = 1
+        for enemy in self.maze.enemies:
+            obs[OBS_ENEMIES, enemy.pos[0], enemy.pos[1]] = 1
+        obs[OBS_PLAYER, self.maze.player_pos[0], self.maze.player_pos[1]] = 1
+        return obs
+
+    def collided(self) -> bool:
+        """هل يقف اللاعب على عدو"""
+        return any(enemy.pos == self.maze.player_pos for enemy in self.maze.enemies)
+
+    def step(self, action: int) -> Tuple[np.ndarray, float, bool, dict]:
+        """تنفيذ إجراء وإرجاع (الملاحظة، المكافأة، الانتهاء، معلومات)"""
+        dx, dy = ACTIONS[action]
+        if dx or dy:
+            self.maze.move_player(int(dx), int(dy))
+
+        reward = 0
+        collision = False
+        for _ in range(ENEMY_MOVE_FRAMES):
+            reward += self.maze.update()
+            collision = self.collided()
+            if collision:
+                break
+
+        goal = not collision and self.maze.check_goal_reached()
+        if collision:
+            reward += COLLISION_REWARD
+        elif goal:
+            reward += GOAL_REWARD
+        self.steps += 1
+        truncated = self.steps >= self.max_steps
+        info = {"collision": collision, "goal": goal, "truncated": truncated}
+        return self.observation(), float(reward), collision or goal or truncated, info
+
+
+# === البيئة المتجهة ===
+class VectorMazeEnv:
+    """عدد N من المتاهات المستقلة تتقدم بخطوة واحدة معاً بعمليات مصفوفات
+
+    يمكن أن تختلف المستويات في الحجم: تكمل الشبكات الأصغر بالجدران حتى
+    أكبر حجم. تعاد تهيئة البيئات المنتهية تلقائياً داخل step.
+    """
+    def __init__(self, levels: List[dict] = None, num_envs: int = 64, max_steps: int = 500, seed: int = None):
+        levels = levels or LEVELS
+        self.num_envs = num_envs
+        self.max_steps = max_steps
+        self.rng = np.random.default_rng(seed)
+        env_levels = [levels[i % len(levels)] for i in range(num_envs)]
+
+        self.height = max(len(level["grid"]) for level in env_levels)
+        self.width = max(len(level["grid"][0]) for level in env_levels)
+        self.max_enemies = max(1, max(len(level["enemies"]) for level in env_levels))
+        n, e = num_envs, self.max_enemies
+
+        # بيانات المستويات الثابتة
+        self.walls = np.ones((n, self.height, self.width), dtype=bool)
+        self.move_masks = np.zeros((n, self.height, self.width), dtype=np.uint8)
+        self.starts = np.zeros((n, 2), dtype=np.int64)
+        self.goals = np.zeros((n, 2), dtype=np.int64)
+        self.coin_counts = np.zeros(n, dtype=np.int64)
+        self.enemy_starts = np.zeros((n, e, 2), dtype=np.int64)
+        self.enemy_mask = np.zeros((n, e), dtype=bool)
+        # ترتيب الدخول والخروج لكل خلية في شجرة أرخص المسارات إلى الهدف
+        self.route_enter = np.full((n, self.height, self.width), -1, dtype=np.int64)
+        self.route_leave = np.full((n, self.height, self.width), -1, dtype=np.int64)
+        level_tables = {}
+        for i, level in enumerate(env_levels):
+            grid = np.array(level["grid"], dtype=np.uint8)
+            self.walls[i, :grid.shape[0], :grid.shape[1]] = grid == 1
+            if id(level) not in level_tables:
+                level_tables[id(level)] = self.route_tables(level)
+            masks, enter, leave = level_tables[id(level)]
+            self.move_masks[i, :grid.shape[0], :grid.shape[1]] = masks.reshape(grid.shape)
+            self.route_enter[i, :grid.shape[0], :grid.shape[1]] = enter.reshape(grid.shape)
+            self.route_leave[i, :grid.shape[0], :grid.shape[1]] = leave.reshape(grid.shape)
+            self.starts[i] = level["start"]
+            self.goals[i] = level["goal"]
+            self.coin_counts[i] = level["coins"]
+            for j, pos in enumerate(level["enemies"]):
+                self.enemy_starts[i, j] = pos
+                self.enemy_mask[i, j] = True
+
+        # الحالة المتغيرة
+        self.player = self.starts.copy()
+        self.coins = np.zeros((n, self.height, self.width), dtype=bool)
+        self.enemy_pos = self.enemy_starts.copy()
+        self.enemy_dir = np.zeros((n, e, 2), dtype=np.int64)
+        self.dir_counter = np.zeros((n, e), dtype=np.int64)
+        self.max_dir_steps = np.zeros((n, e), dtype=np.int64)
+        self.steps = np.zeros(n, dtype=np.int64)
+        self._env_index = np.arange(n)
+
+    @staticmethod
+    def route_tables(level: dict) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """أقنعة الحركة وترتيب الدخول والخروج في شجرة أرخص المسارات لمستوى واحد
+
+        أب كل خلية هو خليتها التالية في RouteCorridor.next_cell، فممر اللاعب
+        في Maze.route_corridor هو أسلاف خليته في هذه الشجرة (انظر on_route).
+        الخلايا التي لا تصل إلى الهدف تبقى -1.
+        """
+        grid = level["grid"]
+        rows, cols = len(grid), len(grid[0])
+        table = MoveTable(grid)
+        cost = lambda cell: COST_TABLE[grid[cell[0]][cell[1]]]
+        field = cost_to_goal_field(tuple(level["goal"]), rows, cols, table.neighbors, cost)
+        corridor = RouteCorridor(field, cols, table.neighbors, cost)
+        children = [[] for _ in range(rows * cols)]
+        for r in range(rows):
+            for c in range(cols):
+                if field[r * cols + c] > 0:
+                    parent = corridor.next_cell((r, c))
+                    children[parent[0] * cols + parent[1]].append(r * cols + c)
+
+        enter = np.full(rows * cols, -1, dtype=np.int64)
+        leave = np.full(rows * cols, -1, dtype=np.int64)
+        clock = 0
+        stack = [(level["goal"][0] * cols + level["goal"][1], False)]
+        while stack:
+            cell, done = stack.pop()
+            if done:
+                leave[cell] = clock
+            else:
+                enter[cell] = clock
+                stack.append((cell, True))
+                stack.extend((child, False) for child in children[cell])
+            clock += 1
+        return np.frombuffer(table.masks, dtype=np.uint8), enter, leave
+
+    def reset(self) -> np.ndarray:
+        """إعادة تهيئة جميع البيئات وإرجاع الملاحظات (N، القنوات، الصفوف، الأعمدة)"""
+        self.reset_envs(self._env_index)
+        return self.observation()
+
+    def reset_envs(self, idx: np.ndarray):
+        """إعادة تهيئة البيئات المحددة فقط"""
+        if len(idx) == 0:
+            return
+        shape = (len(idx), self.max_enemies)
+        self.player[idx] = self.starts[idx]
+        self.enemy_pos[idx] = self.enemy_starts[idx]
+        self.enemy_dir[idx] = self.legal_directions(self.enemy_pos[idx], self.enemy_dir[idx], idx)
+        self.dir_counter[idx] = 0
+        self.max_dir_steps[idx] = self.rng.integers(3, 7, size=shape)
+        self.steps[idx] = 0
+
+        # توزيع العملات على الخلايا المفتوحة بدون تكرار (ولا تحت الأعداء كما في Maze)
+        self.coins[idx] = False
+        for i in idx:
+            free = ~self.walls[i]
+            free[tuple(self.starts[i])] = False
+            free[tuple(self.goals[i])] = False
+            enemies = self.enemy_starts[i][self.enemy_mask[i]]
+            free[enemies[:, 0], enemies[:, 1]] = False
+            cells = np.flatnonzero(free)
+            count = min(int(self.coin_counts[i]), len(cells))
+            chosen = self.rng.choice(cells, size=count, replace=False)
+            self.coins[i].flat[chosen] = True
+
+    def observation(self) -> np.ndarray:
+        """بناء ملاحظات جميع البيئات"""
+        n = self.num_envs
+        obs = np.zeros((n, OBS_CHANNELS, self.height, self.width), dtype=np.uint8)
+        obs[:, OBS_WALLS] = self.walls
+        obs[:, OBS_COINS] = self.coins
+        env_idx = np.broadcast_to(self._env_index[:, None], self.enemy_mask.shape)[self.enemy_mask]
+        enemies = self.enemy_pos[self.enemy_mask]
+        obs[env_idx, OBS_ENEMIES, enemies[:, 0], enemies[:, 1]] = 1
+        obs[self._env_index, OBS_PLAYER, self.player[:, 0], self.player[:, 1]] = 1
+        return obs
+
+    def in_bounds(self, pos: np.ndarray) -> np.ndarray:
+        """التحقق من وقوع المواقع داخل الشبكة"""
+        return ((pos[..., 0] >= 0) & (pos[..., 0] < self.height) &
+                (pos[..., 1] >= 0) & (pos[..., 1] < self.width))
+
+    def is_wall(self, pos: np.ndarray, inside: np.ndarray) -> np.ndarray:
+        """قراءة الجدران عند المواقع (المواقع الخارجية تعتبر جداراً)"""
+        rows = np.clip(pos[..., 0], 0, self.height - 1)
+        cols = np.clip(pos[..., 1], 0, self.width - 1)
+        env_idx = self._env_index.reshape((-1,) + (1,) * (pos.ndim - 2))
+        return ~inside | self.walls[env_idx, rows, cols]
+
+    def legal_directions(self, pos: np.ndarray, current: np.ndarray, env_idx: np.ndarray) -> np.ndarray:
+        """اختيار اتجاه عشوائي من الحركات المسموحة عند كل موقع (نفس Enemy.choose_direction)"""
+        masks = self.move_masks[env_idx[:, None], pos[..., 0], pos[..., 1]]
+        counts = MASK_COUNTS[masks]
+        k = (self.rng.random(masks.shape) * counts).astype(np.int64)
+        chosen = ENEMY_DIRECTIONS[MASK_CHOICES[masks, k]]
+        return np.where((counts > 0)[..., None], chosen, current)
+
+    def is_legal(self, pos: np.ndarray, direction: np.ndarray) -> np.ndarray:
+        """هل الاتجاه مسموح من الموقع حسب قناع الحركة"""
+        masks = self.move_masks[self._env_index[:, None], pos[..., 0], pos[..., 1]]
+        bits = DIRECTION_BIT_LOOKUP[(direction[..., 0] + 1) * 3 + direction[..., 1] + 1]
+        return (masks & bits) != 0
+
+    def on_route(self, pos: np.ndarray) -> np.ndarray:
+        """هل تقع المواقع على أرخص مسار من اللاعب إلى الهدف (نفس Maze.route_corridor)
+
+        الخلية على المسار إذا كانت سلفاً لخلية اللاعب في شجرة المسارات: دخلها
+        البحث بالعمق قبل خلية اللاعب وخرج منها بعدها.
+        """
+        shape = (-1,) + (1,) * (pos.ndim - 2)
+        env_idx = self._env_index.reshape(shape)
+        player_enter = self.route_enter[self._env_index, self.player[:, 0], self.player[:, 1]].reshape(shape)
+        player_leave = self.route_leave[self._env_index, self.player[:, 0], self.player[:, 1]].reshape(shape)
+        rows = np.clip(pos[..., 0], 0, self.height - 1)
+        cols = np.clip(pos[..., 1], 0, self.width - 1)
+        enter = self.route_enter[env_idx, rows, cols]
+        leave = self.route_leave[env_idx, rows, cols]
+        return (player_enter >= 0) & (enter >= 0) & (enter <= player_enter) & (player_leave <= leave)
+
+    def occupied_by_enemy(self, pos: np.ndarray) -> np.ndarray:
+        """هل يوجد عدو في الموقع (لكل بيئة)"""
+        return ((self.enemy_pos == pos[:, None, :]).all(-1) & self.enemy_mask).any(1)
+
+    def move_player(self, actions: np.ndarray):
+        """تحريك اللاعبين (نفس قواعد Maze.move_player)"""
+        new = self.player + ACTIONS[actions]
+        blocked = self.is_wall(new, self.in_bounds(new))
+        blocked |= self.occupied_by_enemy(new) | self.occupied_by_enemy(self.player)
+        self.player = np.where(blocked[:, None], self.player, new)
+
+    def move_enemies(self):
+        """حركة واحدة لجميع الأعداء (نفس قواعد Enemy.update)"""
+        shape = self.enemy_mask.shape
+
+        # تغيير الاتجاه بعد عدد معين من الخطوات أو عند الاصطدام بجدار
+        self.dir_counter += 1
+        change = self.dir_counter >= self.max_dir_steps
+        change |= ~self.is_legal(self.enemy_pos, self.enemy_dir)
+        new_dirs = self.legal_directions(self.enemy_pos, self.enemy_dir, self._env_index)
+        self.enemy_dir = np.where(change[..., None], new_dirs, self.enemy_dir)
+        counter_done = self.dir_counter >= self.max_dir_steps
+        self.dir_counter[counter_done] = 0
+        self.max_dir_steps = np.where(counter_done, self.rng.integers(3, 7, size=shape), self.max_dir_steps)
+
+        candidate = self.enemy_pos + self.enemy_dir
+        valid = self.enemy_mask & self.is_legal(self.enemy_pos, self.enemy_dir)
+
+        # عدم دخول مسار اللاعب إلى الهدف (إلا لعدو واقف عليه أصلاً)
+        valid &= ~self.on_route(candidate) | self.on_route(self.enemy_pos)
+
+        # المسافة الآمنة من اللاعب
+        valid &= ((candidate - self.player[:, None, :]) ** 2).sum(-1) >= SAFE_ZONE_RADIUS ** 2
+
+        self.enemy_pos = np.where(valid[..., None], candidate, self.enemy_pos)
+        retry_dirs = self.legal_directions(self.enemy_pos, self.enemy_dir, self._env_index)
+        self.enemy_dir = np.where(valid[..., None], self.enemy_dir, retry_dirs)
+
+    def step(self, actions) -> Tuple[np.ndarray, np.ndarray, np.ndarray, dict]:
+        """تنفيذ إجراء لكل بيئة وإرجاع (الملاحظات، المكافآت، الانتهاء، معلومات)"""
+        actions = np.asarray(actions, dtype=np.int64)
+        self.move_player(actions)
+        self.move_enemies()
+        collision = self.occupied_by_enemy(self.player)
+
+        # جمع العملات
+        coin = self.coins[self._env_index, self.player[:, 0], self.player[:, 1]]
+        self.coins[self._env_index, self.player[:, 0], self.player[:, 1]] = False
+
+        goal = ~collision & (self.player == self.goals).all(1)
+        rewards = (coin * COIN_REWARD + collision * COLLISION_REWARD + goal * GOAL_REWARD).astype(np.float32)
+
+        self.steps += 1
+        truncated = self.steps >= self.max_steps
+        dones = collision | goal | truncated
+        info = {"collision": collision, "goal": goal, "truncated": truncated}
+
+        self.reset_envs(np.flatnonzero(dones))
+        return self.observation(), rewards, dones, info
+
+
+# === قياس الأداء ===
+def benchmark(env, steps: int, num_actions: int = len(ACTIONS), seed: int = 0) -> float:
+    """قياس عدد خطوات البيئة في الثانية (مجموع خطوات جميع البيئات)"""
+    rng = np.random.default_rng(seed)
+    env.reset()
+    batch = getattr(env, "num_envs", None)
+    start = time.perf_counter()
+    for _ in range(steps):
+        if batch is None:
+            _, _, done, _ = env.step(int(rng.integers(num_actions)))
+            if done:
+                env.reset()
+        else:
+            env.step(rng.integers(num_actions, size=batch))
+    elapsed = time.perf_counter() - start
+    return steps * (batch or 1) / elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maze environment throughput benchmark")
+    parser.add_argument("--envs", type=int, default=256, help="number of vectorized environments")
+    parser.add_argument("--steps", type=int, default=1000, help="vector steps to run")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    single = benchmark(MazeEnv(seed=args.seed), max(1, args.steps // 10), seed=args.seed)
+    vector = benchmark(VectorMazeEnv(num_envs=args.envs, seed=args.seed), args.steps, seed=args.seed)
+    print(f"MazeEnv:             {single:12,.0f} steps/sec")
+    print(f"VectorMazeEnv x{args.envs:<5d} {vector:12,.0f} steps/sec")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,19 +1,37 @@
 # استيراد المكتبات الضرورية
+import time
+_STARTUP_BEGIN = time.perf_counter()  # بداية قياس زمن الإقلاع حتى أول إطار
+
 import pygame
 import sys
 import random
 import math
 import os
-from typing import List, Tuple
-import arabic_reshaper
-from bidi.algorithm import get_display
+import json
+import argparse
+from typing import List, Optional, Tuple
 from abc import ABC, abstractmethod
-import time
 import colorsys
-import heapq  # إضافة مكتبة للمساعدة في خوارزمية البحث
-
-# تهيئة مكتبة pygame
-pygame.init()
+import hashlib
+import struct
+from array import array
+from collections import OrderedDict, deque
+from maze_path import PackedPath
+
+HPA_MIN_CELLS = 128 * 128  # المتاهات الأكبر من هذا تستخدم البحث الهرمي في A*
+TERRAIN_WAIT_FRAMES = 4  # إطارات انتظار اللاعب لكل وحدة تكلفة فوق الممر العادي
+GOAL_FIELD_MAX_CELLS = 512 * 512  # أكبر متاهة موزونة يحسب لها حقل المسافات إلى الهدف
+ACTIVE_FPS = 60  # معدل الإطارات أثناء اللعب أو البحث أو تحرك الكاميرا
+UI_FPS = 30  # معدل الإطارات عندما تتحرك تأثيرات الأزرار فقط
+IDLE_TIMEOUT_MS = 1000  # أقصى انتظار للأحداث عندما يكون المشهد ثابتاً (لتحديث ساعة الواجهة)
+
+# ملاحظة: لا نهيئ pygame عند الاستيراد، ونؤجل تحميل arabic_reshaper و bidi
+# حتى أول نص عربي (انظر TextRenderer.shape_arabic). وحدات maze_* تستورد حيث
+# تستخدم: الأرضيات عند إنشاء أول متاهة، والقطع والبحث الهرمي والوكلاء
+# المتعددون عند أول حاجة إليها فقط.
+
+# ملف حفظ مسار الخط الذي تم اكتشافه بين مرات التشغيل
+FONT_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".smart_maze_font.json")
 
 # === فئة الألوان والمظهر ===
 class Theme:
@@ -29,6 +47,11 @@ class Theme:
         'grid': (71, 85, 105),          # شبكة
         'wall': (30, 41, 59),           # جدران
         'coin': (250, 204, 21),         # ذهبي
+        'mud': (87, 62, 40),            # طين
+        'ice': (125, 190, 220),         # جليد
+        'hazard': (127, 29, 29),        # خطر
+        'search_frontier': (245, 158, 11, 150),  # حدود البحث
+        'search_visited': (168, 85, 247, 90),    # خلايا تمت زيارتها
         'panel': (51, 65, 85, 230)      # لوحة شفافة
     }
 
@@ -50,6 +73,84 @@ class Theme:
         
         return surface
 
+    _neon_cache = {}  # تخزين مؤقت لأسطح النيون حسب (العرض، الارتفاع، اللون)
+
+    @staticmethod
+    def get_neon_surface(width: int, height: int, color: tuple) -> pygame.Surface:
+        """إرجاع سطح نيون مخزن مؤقتاً بدلاً من إنشائه في كل إطار"""
+        key = (width, height, color)
+        surface = Theme._neon_cache.get(key)
+        if surface is None:
+            surface = Theme.create_neon_surface(width, height, color)
+            Theme._neon_cache[key] = surface
+        return surface
+
+# === فئة الكاميرا ===
+class Camera:
+    """فئة لإدارة منظور عرض المتاهة (التمرير والتكبير)"""
+    MIN_ZOOM = 0.2
+    MAX_ZOOM = 3.0
+
+    def __init__(self, cell_size: int):
+        self.base_cell_size = cell_size
+        self.zoom = 1.0
+        self.center = [0.0, 0.0]  # مركز العرض بوحدات الخلايا (صف، عمود)
+        self.view = pygame.Rect(0, 0, 0, 0)  # منطقة الشاشة المخصصة للمتاهة
+        self.smoothing = 0.2  # نسبة الاقتراب من الهدف في كل إطار
+        self.settled = True  # وصلت الكاميرا إلى هدفها (لا حاجة لإطارات أخرى لتحريكها)
+
+    @property
+    def cell_size(self) -> int:
+        """حجم الخلية بعد التكبير"""
+        return max(4, int(self.base_cell_size * self.zoom))
+
+    def set_viewport(self, rect: pygame.Rect):
+        """تحديد منطقة الشاشة المخصصة للمتاهة"""
+        self.view = pygame.Rect(rect)
+
+    def zoom_by(self, factor: float):
+        """تكبير أو تصغير العرض"""
+        self.zoom = max(self.MIN_ZOOM, min(self.MAX_ZOOM, self.zoom * factor))
+
+    def target_axis(self, focus: float, count: int, view_size: int) -> float:
+        """حساب موقع المركز المطلوب على محور واحد"""
+        visible = view_size / self.cell_size
+        if count <= visible:
+            return count / 2  # المتاهة أصغر من العرض: نوسطها
+        # تتبع اللاعب دون تجاوز حدود المتاهة
+        return max(visible / 2, min(count - visible / 2, focus))
+
+    def follow(self, pos, rows: int, cols: int, snap: bool = False):
+        """تحريك الكاميرا لتتبع موقع معين"""
+        target = (
+            self.target_axis(pos[0] + 0.5, rows, self.view.height),
+            self.target_axis(pos[1] + 0.5, cols, self.view.width)
+        )
+        t = 1.0 if snap else self.smoothing
+        self.settled = True
+        for i in range(2):
+            delta = (target[i] - self.center[i]) * t
+            self.center[i] += delta
+            if abs(delta) > 0.001:
+                self.settled = False
+
+    def offsets(self) -> Tuple[int, int]:
+        """إزاحة رسم الخلية (0, 0) على الشاشة"""
+        cs = self.cell_size
+        offset_x = int(self.view.centerx - self.center[1] * cs)
+        offset_y = int(self.view.centery - self.center[0] * cs)
+        return offset_x, offset_y
+
+    def visible_cells(self, rows: int, cols: int) -> Tuple[int, int, int, int]:
+        """نطاق الخلايا الظاهرة: (أول صف، آخر صف + 1، أول عمود، آخر عمود + 1)"""
+        cs = self.cell_size
+        offset_x, offset_y = self.offsets()
+        r0 = max(0, (self.view.top - offset_y) // cs)
+        r1 = min(rows, (self.view.bottom - offset_y) // cs + 1)
+        c0 = max(0, (self.view.left - offset_x) // cs)
+        c1 = min(cols, (self.view.right - offset_x) // cs + 1)
+        return r0, r1, c0, c1
+
 # === فئة الخلفية المتحركة ===
 class AnimatedBackground:
     """فئة لإدارة الخلفية المتحركة"""
@@ -104,6 +205,18 @@ class UI:
         self.side_bar = pygame.Surface((300, height - 60), pygame.SRCALPHA)
         self.update_surfaces()
 
+    def resize(self, width: int, height: int):
+        """تغيير حجم الواجهة مع إعادة استخدام الأسطح التي لم يتغير حجمها"""
+        if (width, height) == (self.width, self.height):
+            return
+        if width != self.width:
+            self.top_bar = pygame.Surface((width, 60), pygame.SRCALPHA)
+        if height != self.height:
+            self.side_bar = pygame.Surface((300, height - 60), pygame.SRCALPHA)
+        self.width = width
+        self.height = height
+        self.update_surfaces()
+
     def update_surfaces(self):
         """تحديث أسطح واجهة المستخدم"""
         # تحديث الشريط العلوي
@@ -125,6 +238,63 @@ class UI:
 class TextRenderer:
     """فئة لمعالجة وعرض النصوص"""
     _font_cache = {}  # تخزين مؤقت للخطوط
+    _font_path = None  # مسار الخط المكتشف (None = الخط الافتراضي)
+    _font_path_resolved = False
+    _shaper = None  # دالة معالجة النص العربي (تحمل عند أول استخدام)
+
+    # قائمة مسارات الخطوط العربية في ويندوز
+    ARABIC_FONT_PATHS = [
+        "C:\\Windows\\Fonts\\arial.ttf",
+        "C:\\Windows\\Fonts\\tahoma.ttf",
+        "C:\\Windows\\Fonts\\segoeui.ttf",
+        "C:\\Windows\\Fonts\\calibri.ttf",
+    ]
+    SYSTEM_FONT_NAMES = "arial,tahoma,segoeui,calibri,dejavusans,notosansarabic"
+
+    @staticmethod
+    def resolve_font_path(rejected: str = None):
+        """اكتشاف ملف الخط المناسب مرة واحدة وحفظه بين مرات التشغيل
+
+        rejected مسار فشل تحميله: يتجاهل الملف المحفوظ ويعاد الاكتشاف بدونه.
+        """
+        if TextRenderer._font_path_resolved and rejected is None:
+            return TextRenderer._font_path
+
+        # محاولة قراءة المسار المحفوظ من تشغيل سابق
+        if rejected is None:
+            try:
+                with open(FONT_CACHE_FILE, encoding="utf-8") as f:
+                    path = json.load(f).get("font_path")
+                if isinstance(path, str) and os.path.isfile(path):
+                    TextRenderer._font_path = path
+                    TextRenderer._font_path_resolved = True
+                    return path
+            except (OSError, ValueError, AttributeError):
+                pass
+
+        # فحص وجود الملفات بدلاً من محاولة تحميلها وانتظار الاستثناء
+        candidates = [p for p in TextRenderer.ARABIC_FONT_PATHS if p != rejected]
+        path = next((p for p in candidates if os.path.isfile(p)), None)
+        if path is None:
+            try:
+                path = pygame.font.match_font(TextRenderer.SYSTEM_FONT_NAMES)
+            except Exception:
+                path = None
+            if path == rejected:
+                path = None
+
+        TextRenderer._font_path = path
+        TextRenderer._font_path_resolved = True
+        try:
+            if path is not None:
+                with open(FONT_CACHE_FILE, "w", encoding="utf-8") as f:
+                    json.dump({"font_path": path}, f)
+            elif os.path.exists(FONT_CACHE_FILE):
+                # لا نحفظ غياب الخط: يعاد البحث في التشغيل التالي
+                os.remove(FONT_CACHE_FILE)
+        except OSError:
+            pass
+        return path
 
     @staticmethod
     def load_font(size: int) -> pygame.font.Font:
@@ -132,33 +302,33 @@ class TextRenderer:
         if size in TextRenderer._font_cache:
             return TextRenderer._font_cache[size]
 
-        # قائمة مسارات الخطوط العربية في ويندوز
-        arabic_font_paths = [
-            "C:\\Windows\\Fonts\\arial.ttf",
-            "C:\\Windows\\Fonts\\tahoma.ttf",
-            "C:\\Windows\\Fonts\\segoeui.ttf",
-            "C:\\Windows\\Fonts\\calibri.ttf",
-        ]
+        if not pygame.font.get_init():
+            pygame.font.init()
 
-        # محاولة تحميل خط عربي
-        for font_path in arabic_font_paths:
+        path = TextRenderer.resolve_font_path()
+        try:
+            font = pygame.font.Font(path, size)
+        except OSError:
+            # الملف المحفوظ لم يعد صالحاً: نعيد الاكتشاف (ويحدث ملف الحفظ)
+            # ثم نستخدم الخط الافتراضي للنظام إن فشل البديل أيضاً
+            path = TextRenderer.resolve_font_path(rejected=path)
             try:
-                font = pygame.font.Font(font_path, size)
-                TextRenderer._font_cache[size] = font
-                return font
-            except:
-                continue
+                font = pygame.font.Font(path, size)
+            except OSError:
+                TextRenderer._font_path = None
+                font = pygame.font.Font(None, size)
+        TextRenderer._font_cache[size] = font
+        return font
 
-        # إذا فشل تحميل الخطوط العربية، نستخدم الخط الافتراضي
-        try:
-            font = pygame.font.SysFont("arial", size)
-            TextRenderer._font_cache[size] = font
-            return font
-        except:
-            # آخر محاولة: استخدام الخط الافتراضي للنظام
-            font = pygame.font.Font(None, size)
-            TextRenderer._font_cache[size] = font
-            return font
+    @staticmethod
+    def shape_arabic(text: str) -> str:
+        """معالجة النص العربي (تشكيل الحروف واتجاه الكتابة)"""
+        if TextRenderer._shaper is None:
+            # تحميل المكتبات عند أول نص عربي فقط
+            import arabic_reshaper
+            from bidi.algorithm import get_display
+            TextRenderer._shaper = lambda t: get_display(arabic_reshaper.reshape(t))
+        return TextRenderer._shaper(text)
 
     @staticmethod
     def render_text(text: str, font: pygame.font.Font, color: tuple, is_arabic: bool = False) -> pygame.Surface:
@@ -166,9 +336,7 @@ class TextRenderer:
         try:
             if is_arabic:
                 # معالجة النص العربي
-                reshaped_text = arabic_reshaper.reshape(text)
-                bidi_text = get_display(reshaped_text)
-                return font.render(bidi_text, True, color)
+                return font.render(TextRenderer.shape_arabic(text), True, color)
             return font.render(text, True, color)
         except:
             # في حالة فشل معالجة النص العربي
@@ -205,7 +373,8 @@ TRANSLATIONS = {
 # === فئة العدو ===
 class Enemy:
     """فئة لإدارة الأعداء في اللعبة"""
-    def __init__(self, pos: List[int]):
+    def __init__(self, pos: List[int], rng: random.Random = None):
+        self.rng = rng or random.Random()  # مولد المتاهة (حالته جزء من لقطتها)
         self.pos = list(pos)
         self.original_pos = list(pos)
         self.glow_offset = 0
@@ -214,12 +383,12 @@ class Enemy:
         self.safe_zone_radius = 2  # تقليل نصف قطر المنطقة الآمنة
         self.random_direction = self.get_random_direction()
         self.direction_change_counter = 0
-        self.max_direction_steps = random.randint(3, 6)  # عدد خطوات عشوائي قبل تغيير الاتجاه
+        self.max_direction_steps = self.rng.randint(3, 6)  # عدد خطوات عشوائي قبل تغيير الاتجاه
 
     def get_random_direction(self) -> List[int]:
         """الحصول على اتجاه عشوائي"""
         directions = [[1, 0], [-1, 0], [0, 1], [0, -1]]
-        return random.choice(directions)
+        return self.rng.choice(directions)
 
     def is_safe_distance(self, pos: List[int], player_pos: List[int]) -> bool:
         """التحقق من المسافة الآمنة من اللاعب"""
@@ -229,15 +398,12 @@ class Enemy:
         )
         return distance >= self.safe_zone_radius
 
-    def is_valid_move(self, new_pos: List[int], grid: List[List[int]], player_pos: List[int], goal_pos: tuple) -> bool:
-        """التحقق من صحة الحركة"""
-        # التحقق من حدود المتاهة والجدران
-        if (new_pos[0] < 0 or new_pos[0] >= len(grid) or
-            new_pos[1] < 0 or new_pos[1] >= len(grid[0]) or
-            grid[new_pos[0]][new_pos[1]] == 1):
-            return False
+    def choose_direction(self, legal: tuple) -> tuple:
+        """اختيار اتجاه عشوائي من الحركات المسموحة فقط"""
+        return self.rng.choice(legal) if legal else tuple(self.random_direction)
 
-        # التحقق من عدم سد المسار بين اللاعب والهدف
+    def keeps_route_clear(self, new_pos: List[int], player_pos: List[int], goal_pos: tuple) -> bool:
+        """التحقق من عدم سد المسار بين اللاعب والهدف"""
         x1, y1 = player_pos
         x2, y2 = goal_pos
         x3, y3 = new_pos
@@ -251,7 +417,20 @@ class Enemy:
         distance_to_path = numerator / denominator
         return distance_to_path >= 2  # مسافة آمنة من المسار
 
-    def update(self, grid: List[List[int]], player_pos: List[int], goal_pos: tuple):
+    def blocks_route(self, new_pos: List[int], player_pos: List[int], goal_pos: tuple,
+                     route: "RouteCorridor" = None) -> bool:
+        """هل تسد الحركة طريق اللاعب إلى الهدف
+
+        مع ممر المسار الحالي (Maze.route_corridor) يكفي البحث في مجموعة. العدو
+        الواقف على المسار أصلاً يسمح له بالتحرك حتى لا يعلق فوقه. المتاهات
+        الضخمة دون حقل للهدف تبقى على تقريب الخط المستقيم.
+        """
+        if route is not None:
+            return (new_pos[0], new_pos[1]) in route and (self.pos[0], self.pos[1]) not in route
+        return not self.keeps_route_clear(new_pos, player_pos, goal_pos)
+
+    def update(self, move_table: "MoveTable", player_pos: List[int], goal_pos: tuple,
+               route: "RouteCorridor" = None):
         """تحديث حركة العدو"""
         # تحديث تأثير التوهج
         self.glow_offset += 0.1 * self.glow_direction
@@ -264,13 +443,16 @@ class Enemy:
         self.move_counter += 1
         if self.move_counter >= 20:  # تحديث أسرع للحركة
             self.move_counter = 0
+            legal = move_table.moves(self.pos[0], self.pos[1])
             
-            # تغيير الاتجاه بعد عدد معين من الخطوات
+            # تغيير الاتجاه بعد عدد معين من الخطوات أو عند الاصطدام بجدار
             self.direction_change_counter += 1
             if self.direction_change_counter >= self.max_direction_steps:
-                self.random_direction = self.get_random_direction()
+                self.random_direction = self.choose_direction(legal)
                 self.direction_change_counter = 0
-                self.max_direction_steps = random.randint(3, 6)
+                self.max_direction_steps = self.rng.randint(3, 6)
+            elif tuple(self.random_direction) not in legal:
+                self.random_direction = self.choose_direction(legal)
 
             # محاولة التحرك في الاتجاه الحالي
             new_pos = [
@@ -278,13 +460,14 @@ class Enemy:
                 self.pos[1] + self.random_direction[1]
             ]
 
-            # التحقق من صحة الحركة
-            if (self.is_valid_move(new_pos, grid, player_pos, goal_pos) and
+            # الجدران والحدود محسومة من الجدول، يبقى فحص مسار اللاعب والمسافة الآمنة
+            if (tuple(self.random_direction) in legal and
+                not self.blocks_route(new_pos, player_pos, goal_pos, route) and
                 self.is_safe_distance(new_pos, player_pos)):
                 self.pos = new_pos
             else:
                 # إذا كانت الحركة غير صالحة، نغير الاتجاه
-                self.random_direction = self.get_random_direction()
+                self.random_direction = self.choose_direction(legal)
 
     def get_glow_color(self, base_color: tuple) -> tuple:
         """الحصول على لون التوهج"""
@@ -350,10 +533,368 @@ LEVELS = [
     }
 ]
 
+# === جداول الحركات المسموحة ===
+MOVE_DIRECTIONS = ((0, 1), (1, 0), (0, -1), (-1, 0))  # ترتيب البتات في قناع الحركة
+DIRECTION_BITS = {d: 1 << bit for bit, d in enumerate(MOVE_DIRECTIONS)}
+# الاتجاهات المسموحة لكل قيمة ممكنة للقناع (16 قيمة)
+MOVES_BY_MASK = tuple(
+    tuple(d for bit, d in enumerate(MOVE_DIRECTIONS) if mask >> bit & 1) for mask in range(16)
+)
+
+def is_chunked_grid(grid) -> bool:
+    """هل الشبكة من نوع ChunkedGrid (دون استيراد maze_chunks لأجل الفحص)"""
+    return hasattr(grid, "get_chunk")
+
+
+class MoveTable:
+    """قناع من 4 بتات لكل خلية يحدد الحركات المسموحة منها (يحسب مرة لكل مستوى)
+
+    تستخدمه حركة الأعداء واللاعب وتوسيع الجيران في الخوارزميات بدلاً من فحص
+    الحدود والجدران في كل مرة. في الشبكات المقسمة يحسب القناع عند الطلب حتى
+    لا تحمل الخريطة كاملة.
+    """
+    def __init__(self, grid):
+        self.grid = grid
+        self.rows = len(grid)
+        self.cols = len(grid[0])
+        from maze_terrain import WALL
+        self.wall = WALL
+        self.masks = None if is_chunked_grid(grid) else self.build()
+
+    def build(self) -> bytearray:
+        """حساب أقنعة جميع الخلايا صفاً بصف"""
+        grid, rows, cols, wall = self.grid, self.rows, self.cols, self.wall
+        masks = bytearray(rows * cols)
+        for r in range(rows):
+            row = grid[r]
+            up = grid[r - 1] if r > 0 else None
+            down = grid[r + 1] if r + 1 < rows else None
+            base = r * cols
+            for c in range(cols):
+                mask = 0
+                if c + 1 < cols and row[c + 1] != wall:
+                    mask |= 1
+                if down is not None and down[c] != wall:
+                    mask |= 2
+                if c > 0 and row[c - 1] != wall:
+                    mask |= 4
+                if up is not None and up[c] != wall:
+                    mask |= 8
+                masks[base + c] = mask
+        return masks
+
+    def compute_mask(self, r: int, c: int) -> int:
+        """حساب قناع خلية واحدة من الشبكة مباشرة"""
+        mask = 0
+        for bit, (dr, dc) in enumerate(MOVE_DIRECTIONS):
+            nr, nc = r + dr, c + dc
+            if 0 <= nr < self.rows and 0 <= nc < self.cols and self.grid[nr][nc] != self.wall:
+                mask |= 1 << bit
+        return mask
+
+    def mask(self, r: int, c: int) -> int:
+        """قناع الحركات المسموحة من الخلية"""
+        if self.masks is None:
+            return self.compute_mask(r, c)
+        return self.masks[r * self.cols + c]
+
+    def moves(self, r: int, c: int) -> tuple:
+        """الاتجاهات المسموحة من الخلية"""
+        return MOVES_BY_MASK[self.mask(r, c)]
+
+    def can_move(self, r: int, c: int, dr: int, dc: int) -> bool:
+        """هل يمكن التحرك من الخلية في الاتجاه المعطى"""
+        return bool(self.mask(r, c) & DIRECTION_BITS.get((dr, dc), 0))
+
+    def neighbors(self, cell: tuple) -> list:
+        """الخلايا المجاورة المفتوحة (بنفس ترتيب MOVE_DIRECTIONS)"""
+        r, c = cell
+        return [(r + dr, c + dc) for dr, dc in MOVES_BY_MASK[self.mask(r, c)]]
+
+    def update_cells(self, cells):
+        """إعادة حساب أقنعة الخلايا المعدلة وجيرانها"""
+        if self.masks is None:
+            return
+        for r, c in cells:
+            for dr, dc in ((0, 0),) + MOVE_DIRECTIONS:
+                nr, nc = r + dr, c + dc
+                if 0 <= nr < self.rows and 0 <= nc < self.cols:
+                    self.masks[nr * self.cols + nc] = self.compute_mask(nr, nc)
+
+# === فهرس الخلايا الفارغة ===
+class FreeCellIndex:
+    """مجموعة خلايا تدعم الإضافة والحذف والسحب العشوائي المنتظم في O(1)"""
+    def __init__(self, cells=(), rng: random.Random = None):
+        self.rng = rng or random.Random()
+        self.cells = list(cells)
+        self.positions = {cell: i for i, cell in enumerate(self.cells)}
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    def __contains__(self, cell) -> bool:
+        return cell in self.positions
+
+    def add(self, cell: tuple):
+        """إضافة خلية"""
+        if cell not in self.positions:
+            self.positions[cell] = len(self.cells)
+            self.cells.append(cell)
+
+    def discard(self, cell: tuple):
+        """حذف خلية بتبديلها مع آخر عنصر"""
+        i = self.positions.pop(cell, None)
+        if i is None:
+            return
+        last = self.cells.pop()
+        if i < len(self.cells):
+            self.cells[i] = last
+            self.positions[last] = i
+
+    def sample(self) -> tuple:
+        """خلية عشوائية دون حذفها"""
+        return self.cells[self.rng.randrange(len(self.cells))]
+
+    def pop_random(self) -> tuple:
+        """سحب خلية عشوائية وحذفها (سحب بدون تكرار)"""
+        cell = self.sample()
+        self.discard(cell)
+        return cell
+
+# === ممر المسار الحالي ===
+class RouteCorridor:
+    """خلايا أرخص مسار من اللاعب إلى الهدف، تتبع حقل التكلفة إلى الهدف
+
+    يسمح للأعداء بمعرفة هل تسد حركتهم طريق اللاعب ببحث O(1) في مجموعة.
+    عند تقدم اللاعب خطوة على المسار تحذف الخلية الأولى فقط، وعند خروجه عنه
+    يتبع الحقل من موقعه الجديد حتى يلتقي بالمسار القديم.
+    """
+    def __init__(self, distances, cols: int, neighbors, cost):
+        self.distances = distances
+        self.cols = cols
+        self.neighbors = neighbors
+        self.cost = cost
+        self.cells = deque()  # المسار من موقع اللاعب إلى الهدف
+        self.members = set()
+
+    def __contains__(self, cell) -> bool:
+        return cell in self.members
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    def next_cell(self, cell: tuple) -> Optional[tuple]:
+        """الخلية التالية على أرخص مسار (أول جار بترتيب MOVE_DIRECTIONS، None عند الهدف)"""
+        distances, cols = self.distances, self.cols
+        d = distances[cell[0] * cols + cell[1]]
+        for n in self.neighbors(cell):
+            dn = distances[n[0] * cols + n[1]]
+            if dn >= 0 and dn + self.cost(n) == d:
+                return n
+        return None
+
+    def follow(self, pos):
+        """تحديث المسار بعد انتقال اللاعب إلى pos"""
+        pos = tuple(pos)
+        cells, members = self.cells, self.members
+        if cells and cells[0] == pos:
+            return
+        if len(cells) > 1 and cells[1] == pos:
+            members.discard(cells.popleft())  # خطوة على المسار
+            return
+        if self.distances[pos[0] * self.cols + pos[1]] < 0:
+            cells.clear()
+            members.clear()  # لا طريق إلى الهدف من هنا
+            return
+        prefix = []
+        cell = pos
+        while cell is not None and cell not in members:
+            prefix.append(cell)
+            cell = self.next_cell(cell)
+        if cell is None:
+            cells.clear()
+            members.clear()
+        else:
+            while cells[0] != cell:
+                members.discard(cells.popleft())  # الجزء المتروك قبل نقطة الالتقاء
+        cells.extendleft(reversed(prefix))
+        members.update(prefix)
+
+# === عرض تقدم البحث ===
+SEARCH_FRAME_BUDGET_MS = 4.0  # الزمن المخصص لخطوات البحث في كل إطار
+SEARCH_TILE_SIZE = 128  # طول ضلع بلاطة طبقة العرض بالخلايا (بكسل لكل خلية، 64 كيلوبايت)
+SEARCH_MAX_TILES = 128  # أقصى عدد من البلاطات (8 ميغابايت) مهما كبرت المتاهة
+AGENT_SEARCH_STEPS = 100  # خطوات بحث العميل الذكي في كل إطار (عدد لا زمن حتى تبقى الجولات قابلة للإعادة)
+
+def run_search(steps) -> list:
+    """تشغيل مولد بحث حتى نهايته وإرجاع المسار"""
+    while True:
+        try:
+            next(steps)
+        except StopIteration as done:
+            return done.value
+
+class SearchAnimation:
+    """تقدم خوارزمية بحث تدريجياً ضمن ميزانية زمنية لكل إطار مع رسم ما استكشفته
+
+    المولد يعطي في كل خطوة (الخلية المستكشفة، الخلايا المضافة للحدود) ويعيد
+    المسار عند انتهائه. ترسم التغييرات كنقاط في بلاطات تنشأ عند أول نقطة
+    فيها (بكسل لكل خلية)، فتتبع الذاكرة ما استكشفه البحث لا حجم المتاهة،
+    ولا يعاد تكبير الجزء الظاهر منها إلا عند تغيرها أو تغير العرض.
+    """
+    def __init__(self, steps, rows: int, cols: int, cache_key=None, show: bool = True):
+        self.steps = steps
+        self.cache_key = cache_key
+        self.done = False
+        self.path = []
+        self.expanded = 0
+        self.show = show
+        self.tiles = {}  # (صف البلاطة، عمود البلاطة) -> Surface
+        self.dirty = True
+        self._scaled = None
+        self._scaled_key = None
+
+    def plot(self, r: int, c: int, color: tuple):
+        """تلوين خلية في بلاطتها (تنشأ البلاطة عند الحاجة ضمن SEARCH_MAX_TILES)"""
+        key = (r // SEARCH_TILE_SIZE, c // SEARCH_TILE_SIZE)
+        tile = self.tiles.get(key)
+        if tile is None:
+            if len(self.tiles) >= SEARCH_MAX_TILES:
+                return
+            tile = self.tiles[key] = pygame.Surface((SEARCH_TILE_SIZE, SEARCH_TILE_SIZE), pygame.SRCALPHA)
+        tile.set_at((c % SEARCH_TILE_SIZE, r % SEARCH_TILE_SIZE), color)
+
+    def advance(self, budget_ms: float = SEARCH_FRAME_BUDGET_MS, max_steps: int = None) -> bool:
+        """تنفيذ خطوات البحث حتى نفاد الميزانية (أو max_steps خطوة) وإرجاع هل انتهى"""
+        if self.done:
+            return True
+        deadline = time.perf_counter() + budget_ms / 1000
+        frontier_color = Theme.COLORS['search_frontier']
+        visited_color = Theme.COLORS['search_visited']
+        plot = self.plot if self.show else None
+        taken = 0
+        while max_steps is None or taken < max_steps:
+            try:
+                current, added = next(self.steps)
+            except StopIteration as finished:
+                self.path = finished.value or []
+                self.done = True
+                break
+            taken += 1
+            self.expanded += 1
+            if plot is not None:
+                for r, c in added:
+                    plot(r, c, frontier_color)
+                plot(current[0], current[1], visited_color)
+                self.dirty = True
+            if time.perf_counter() >= deadline:
+                break
+        return self.done
+
+    def draw(self, screen: pygame.Surface, camera: "Camera", offset_x: int, offset_y: int, rows: int, cols: int):
+        """رسم الجزء الظاهر من بلاطات الاستكشاف"""
+        if not self.tiles:
+            return
+        cell_size = camera.cell_size
+        r0, r1, c0, c1 = camera.visible_cells(rows, cols)
+        if r1 <= r0 or c1 <= c0:
+            return
+        key = (r0, r1, c0, c1, cell_size)
+        if self.dirty or key != self._scaled_key:
+            # تجميع البلاطات الظاهرة في سطح بحجم العرض بالخلايا ثم تكبيره مرة واحدة
+            visible = pygame.Surface((c1 - c0, r1 - r0), pygame.SRCALPHA)
+            size = SEARCH_TILE_SIZE
+            for tr in range(r0 // size, (r1 - 1) // size + 1):
+                for tc in range(c0 // size, (c1 - 1) // size + 1):
+                    tile = self.tiles.get((tr, tc))
+                    if tile is not None:
+                        visible.blit(tile, (tc * size - c0, tr * size - r0))
+            self._scaled = pygame.transform.scale(
+                visible, ((c1 - c0) * cell_size, (r1 - r0) * cell_size))
+            self._scaled_key = key
+            self.dirty = False
+        previous_clip = screen.get_clip()
+        screen.set_clip(camera.view)
+        screen.blit(self._scaled, (c0 * cell_size + offset_x, r0 * cell_size + offset_y))
+        screen.set_clip(previous_clip)
+
+# === لقطات الحالة الثنائية ===
+SNAPSHOT_MAGIC = b"MZS1"
+_ENEMY_STATE = struct.Struct("<iiidbbbHB")  # الموقع، التوهج، اتجاه التوهج، الاتجاه، العدادات
+_RNG_WORDS = 625  # حالة Mersenne Twister في random.Random
+_GAME_STATE = struct.Struct("<4sHiIBHHH?")  # المستوى، النقاط، الزمن، الأعلام، عدادات العميل
+_AGENT_PATH = struct.Struct("<?iiII")  # وجود مسار، موقعه الحالي، طوله، مؤشره
+
+def pack_rng_state(rng: random.Random) -> bytes:
+    """ضغط حالة مولد أرقام عشوائية"""
+    version, words, gauss = rng.getstate()
+    return (array("I", words).tobytes() +
+            struct.pack("<B?d", version, gauss is not None, gauss or 0.0))
+
+def unpack_rng_state(rng: random.Random, data, offset: int) -> int:
+    """استعادة حالة مولد أرقام عشوائية وإرجاع الموقع بعدها"""
+    words = array("I")
+    words.frombytes(data[offset:offset + _RNG_WORDS * 4])
+    offset += _RNG_WORDS * 4
+    version, has_gauss, gauss = struct.unpack_from("<B?d", data, offset)
+    rng.setstate((version, tuple(words), gauss if has_gauss else None))
+    return offset + struct.calcsize("<B?d")
+
+# === ذاكرة نتائج البحث ===
+class PathCache:
+    """تخزين مؤقت لنتائج خوارزميات البحث حسب حالة المتاهة مع حذف الأقدم استخداماً"""
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(maze: "Maze", start, goal, algorithm: str, blockers=()) -> tuple:
+        """مفتاح البحث: (بصمة الشبكة، البداية، الهدف، الخوارزمية، مواقع العوائق)"""
+        return (maze.grid_hash(), tuple(start), tuple(goal), algorithm,
+                tuple(tuple(pos) for pos in blockers))
+
+    def get(self, key: tuple):
+        """إرجاع نسخة من المسار المخزن أو None"""
+        path = self.entries.get(key)
+        if path is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return path.copy() if isinstance(path, PackedPath) else list(path)
+
+    def put(self, key: tuple, path):
+        """تخزين نتيجة بحث (بما في ذلك عدم وجود مسار)"""
+        self.entries[key] = path.copy() if isinstance(path, PackedPath) else tuple(path)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        """حذف جميع النتائج"""
+        self.entries.clear()
+
+    def stats(self) -> dict:
+        """إحصائيات الاستخدام"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self.entries)
+        }
+
+PATH_CACHE = PathCache()
+
 # === فئة المتاهة ===
 class Maze:
     """فئة لإدارة المتاهة"""
-    def __init__(self, level_data: dict, cell_size: int):
+    def __init__(self, level_data: dict, cell_size: int, seed: int = None):
+        # مولد خاص بالمتاهة للعملات والأعداء (لا يتأثر به ولا يكشف المولد العام).
+        # بدون بذرة يشتق من المولد العام حتى يكفي random.seed قبل الإنشاء للتكرار.
+        self.rng = random.Random(random.getrandbits(64) if seed is None else seed)
         self.grid = level_data["grid"]
         self.rows = len(self.grid)
         self.cols = len(self.grid[0])
@@ -362,76 +903,389 @@ class Maze:
         self.goal = level_data["goal"]
         self.player_pos = list(self.start)
         self.time_limit = level_data["time_limit"]
+        self.level_data = level_data
+
+        # الشبكات المقسمة تحذف القطع البعيدة عند انتقال اللاعب إلى قطعة أخرى
+        self.is_chunked = is_chunked_grid(self.grid)
+        self.player_chunk = None
+        self._grid_hash = None
+        self.planner = None  # مخطط HPA* (ينشأ عند أول حاجة)
+        self.owns_grid = False
+        self.move_table = MoveTable(self.grid)  # الحركات المسموحة من كل خلية
+
+        # الأرضيات الموزونة: التقدير في A* يضرب المسافة في أرخص تكلفة موجودة
+        from maze_terrain import FLOOR, COST_TABLE, terrain_summary
+        self.cost_table = COST_TABLE  # يقرأ في cell_cost لكل خطوة بحث
+        if self.is_chunked:
+            self.terrain = set(self.grid.source.terrain) | {FLOOR}
+        else:
+            self.terrain = terrain_summary(self.grid)
+        self.update_terrain()
+
+        # فهرس الخلايا الفارغة (غير متاح للشبكات المقسمة الضخمة)
+        self.free_cells = None if self.is_chunked else self.build_free_cells()
         
-        # إنشاء العملات
+        # إنشاء الأعداء بمواقعهم الثابتة أولاً حتى لا توضع عملة تحتهم
         self.coins = set()
-        self.generate_coins(level_data["coins"])
+        self.enemies = [Enemy(pos, self.rng) for pos in level_data["enemies"]]
+        for enemy in self.enemies:
+            self.occupy_cell(enemy.pos)
         
-        # إنشاء الأعداء
-        self.enemies = [Enemy(pos) for pos in level_data["enemies"]]
+        # إنشاء العملات
+        self.generate_coins(level_data["coins"])
+
+    def get_planner(self) -> "HierarchicalPlanner":
+        """مخطط البحث الهرمي للمتاهات الكبيرة (يبنى تدريجياً في الشبكات المقسمة)"""
+        if self.planner is None:
+            from maze_hpa import HierarchicalPlanner
+            self.planner = HierarchicalPlanner(self.grid, precompute=not self.is_chunked)
+        return self.planner
+
+    def set_cells(self, changes: dict):
+        """تعديل خلايا الشبكة {(صف، عمود): قيمة} وتحديث ما يعتمد عليها"""
+        if self.is_chunked:
+            raise TypeError("Chunked grids are read-only")
+        from maze_terrain import WALL
+        if not self.owns_grid:
+            # نسخ الشبكة عند أول تعديل حتى لا تتغير بيانات المستوى المشتركة في LEVELS
+            self.grid = [list(row) for row in self.grid]
+            self.owns_grid = True
+            if self.planner is not None:
+                self.planner.grid = self.grid
+            self.move_table.grid = self.grid
+        for (r, c), value in changes.items():
+            self.grid[r][c] = value
+            if value != WALL:
+                self.release_cell((r, c))
+            else:
+                self.occupy_cell((r, c))
+        self.invalidate_grid()
+        self.move_table.update_cells(changes)
+        self.terrain.update(value for value in changes.values() if value != WALL)
+        self.update_terrain()
+        if self.planner is not None:
+            self.planner.update_cells(changes)
+
+    def update_terrain(self):
+        """تحديث خصائص البحث حسب الأرضيات الموجودة"""
+        from maze_terrain import FLOOR, FLOOR_COST
+        self.is_weighted = bool(self.terrain - {FLOOR})
+        self.heuristic_scale = min((self.cost_table[value] for value in self.terrain), default=FLOOR_COST)
+        self._goal_distances = None
+        self._route = None
+
+    def has_goal_field(self) -> bool:
+        """هل يمكن حساب حقل التكلفة إلى الهدف للمتاهة كاملة"""
+        return not self.is_chunked and self.rows * self.cols <= GOAL_FIELD_MAX_CELLS
+
+    def goal_distances(self) -> array:
+        """تكلفة أرخص مسار من كل خلية إلى الهدف (تحسب مرة حتى تتغير الشبكة)"""
+        if self._goal_distances is None:
+            from maze_terrain import cost_to_goal_field
+            self._goal_distances = cost_to_goal_field(
+                tuple(self.goal), self.rows, self.cols, self.move_table.neighbors, self.cell_cost)
+        return self._goal_distances
+
+    def heuristic(self, goal: tuple):
+        """تقدير A* المتسق للهدف المعطى حسب الأرضيات وحجم المتاهة
+
+        المتاهات الموزونة تستخدم التكلفة الحقيقية إلى الهدف (حقل يحسب مرة لكل
+        مستوى) بدل المسافة المانهاتنية، فيبقى البحث فيها ضيقاً كما في العادية.
+        """
+        from maze_terrain import manhattan_heuristic, field_heuristic
+        if self.is_weighted and tuple(goal) == tuple(self.goal) and self.has_goal_field():
+            return field_heuristic(self.goal_distances(), self.cols)
+        return manhattan_heuristic(goal, self.heuristic_scale)
+
+    def route_corridor(self) -> Optional[RouteCorridor]:
+        """مسار اللاعب الحالي إلى الهدف (None في المتاهات الأكبر من حقل الهدف)"""
+        if self._route is None:
+            if not self.has_goal_field():
+                return None
+            self._route = RouteCorridor(self.goal_distances(), self.cols,
+                                        self.move_table.neighbors, self.cell_cost)
+        self._route.follow(self.player_pos)
+        return self._route
+
+    def cell_cost(self, cell) -> int:
+        """تكلفة دخول الخلية حسب أرضيتها"""
+        return self.cost_table[self.grid[cell[0]][cell[1]]]
+
+    def neighbor_function(self):
+        """دالة الجيران للخوارزميات (مع تحميل القطع مسبقاً في الشبكات المقسمة)"""
+        neighbors = self.move_table.neighbors
+        prefetch = getattr(self.grid, "prefetch", None)
+        if prefetch is None:
+            return neighbors
+
+        def prefetching_neighbors(cell):
+            prefetch(cell)
+            return neighbors(cell)
+        return prefetching_neighbors
+
+    def a_star_steps(self, start: tuple, goal: tuple, neighbors=None):
+        """A* بتكاليف الأرضيات وطابور الدلاء خطوة بخطوة (يعيد PackedPath أو [])
+
+        المتاهات الكبيرة غير الموزونة تستخدم البحث الهرمي (خطوة لكل عقدة مدخل
+        موسعة ثم لكل خلية من المسار المحسن).
+        neighbors دالة جيران بديلة (مثل تجنب الأعداء في العميل الذكي).
+        """
+        if neighbors is None and not self.is_weighted and self.rows * self.cols >= HPA_MIN_CELLS:
+            cells = yield from self.get_planner().path_steps(start, goal)
+            return PackedPath.from_cells(cells) if cells else []
+        from maze_terrain import dial_steps
+        return (yield from dial_steps(start, goal, neighbors or self.neighbor_function(),
+                                      self.cell_cost, self.heuristic(goal)))
+
+    def terrain_delay(self, cell) -> int:
+        """إطارات الانتظار بعد دخول الخلية (الأرضيات الموزونة أبطأ من الممر)"""
+        from maze_terrain import FLOOR_COST
+        return max(0, self.cell_cost(cell) - FLOOR_COST) * TERRAIN_WAIT_FRAMES
+
+    def grid_hash(self) -> str:
+        """بصمة الأبعاد ومحتوى الشبكة (تحسب مرة واحدة حتى تتغير الجدران)"""
+        if self._grid_hash is None:
+            # الأبعاد جزء من البصمة: الصفوف المتصلة وحدها تتطابق لشبكتين بشكلين مختلفين
+            digest = hashlib.blake2b(struct.pack("<II", self.rows, self.cols), digest_size=16)
+            if self.is_chunked:
+                # لا نقرأ الشبكة الضخمة كاملة: نعتمد على هوية مصدرها
+                digest.update(repr(self.grid.source.cache_key()).encode())
+            else:
+                for row in self.grid:
+                    digest.update(bytes(row))
+            self._grid_hash = digest.hexdigest()
+        return self._grid_hash
+
+    def invalidate_grid(self):
+        """يستدعى بعد تعديل الجدران لإعادة حساب البصمة"""
+        self._grid_hash = None
+
+    def build_free_cells(self) -> "FreeCellIndex":
+        """بناء فهرس الخلايا المفتوحة عدا البداية والهدف"""
+        excluded = {tuple(self.start), tuple(self.goal), tuple(self.player_pos)}
+        wall = self.move_table.wall
+        return FreeCellIndex(
+            ((r, c) for r in range(self.rows) for c in range(self.cols)
+             if self.grid[r][c] != wall and (r, c) not in excluded),
+            self.rng
+        )
+
+    def occupy_cell(self, cell):
+        """إزالة خلية أصبحت مشغولة من فهرس الخلايا الفارغة"""
+        if self.free_cells is not None:
+            self.free_cells.discard(tuple(cell))
+
+    def release_cell(self, cell):
+        """إعادة خلية إلى الفهرس إذا لم يعد يشغلها أي عنصر"""
+        if self.free_cells is None:
+            return
+        cell = tuple(cell)
+        if (self.grid[cell[0]][cell[1]] == self.move_table.wall or cell == tuple(self.start) or cell == tuple(self.goal) or
+                cell == tuple(self.player_pos) or cell in self.coins or
+                any(tuple(enemy.pos) == cell for enemy in self.enemies)):
+            return
+        self.free_cells.add(cell)
+
+    def random_free_cell(self):
+        """سحب خلية فارغة عشوائية (وإزالتها من الفهرس) أو None إذا لم توجد"""
+        if self.free_cells is not None:
+            return self.free_cells.pop_random() if self.free_cells else None
+        # الشبكات المقسمة: محاولات عشوائية محدودة داخل القطع المحملة فقط حتى
+        # لا تحمل قطع بعيدة تطرد القطع التي يعمل فيها اللاعب
+        loaded = list(self.grid.chunks)
+        if not loaded:
+            self.grid.prefetch(self.player_pos)
+            loaded = list(self.grid.chunks)
+        size = self.grid.chunk_size
+        for _ in range(1000):
+            kr, kc = self.rng.choice(loaded)
+            x = kr * size + self.rng.randrange(size)
+            y = kc * size + self.rng.randrange(size)
+            if (x < self.rows and y < self.cols and
+                self.grid[x][y] != self.move_table.wall and
+                (x, y) != tuple(self.player_pos) and
+                (x, y) != self.goal and (x, y) not in self.coins):
+                return (x, y)
+        return None
 
     def generate_coins(self, count: int):
         """توليد العملات في مواقع عشوائية"""
         while len(self.coins) < count:
-            x = random.randint(0, self.rows-1)
-            y = random.randint(0, self.cols-1)
-            if (self.grid[x][y] == 0 and 
-                (x, y) != tuple(self.player_pos) and 
-                (x, y) != self.goal):
-                self.coins.add((x, y))
-
-    def draw(self, screen: pygame.Surface, offset_x: int, offset_y: int):
-        """رسم المتاهة وعناصرها"""
+            cell = self.random_free_cell()
+            if cell is None:
+                break  # لا توجد خلايا فارغة كافية
+            self.coins.add(cell)
+
+    def reset(self):
+        """إعادة المستوى إلى بدايته مع توزيع جديد للعملات دون إعادة بناء المتاهة"""
+        for coin in list(self.coins):
+            self.coins.discard(coin)
+            self.release_cell(coin)
+        old_player = self.player_pos
+        self.player_pos = list(self.start)
+        self.release_cell(old_player)
+        for enemy in self.enemies:
+            old_pos = enemy.pos
+            enemy.pos = list(enemy.original_pos)
+            self.release_cell(old_pos)
+            self.occupy_cell(enemy.pos)
+        self.generate_coins(self.level_data["coins"])
+        self.player_chunk = None
+
+    def snapshot(self, include_rng: bool = True) -> bytes:
+        """لقطة ثنائية مضغوطة للحالة المتغيرة (اللاعب، الأعداء، العملات، مولد المتاهة)
+
+        include_rng=False يحذف حالة المولد (2.5 كيلوبايت تكشف حركة الأعداء
+        القادمة) من اللقطات المرسلة عبر الشبكة.
+        """
+        coins = array("i")
+        for r, c in self.coins:
+            coins.append(r)
+            coins.append(c)
+        parts = [
+            bytes.fromhex(self.grid_hash()),
+            struct.pack("<iiHI", self.player_pos[0], self.player_pos[1], len(self.enemies), len(self.coins))
+        ]
+        for enemy in self.enemies:
+            parts.append(_ENEMY_STATE.pack(
+                enemy.pos[0], enemy.pos[1], enemy.move_counter, enemy.glow_offset, enemy.glow_direction,
+                enemy.random_direction[0], enemy.random_direction[1],
+                enemy.direction_change_counter, enemy.max_direction_steps))
+        parts.append(coins.tobytes())
+        parts.append(struct.pack("<?", include_rng))
+        if include_rng:
+            parts.append(pack_rng_state(self.rng))
+        return b"".join(parts)
+
+    def restore(self, data: bytes) -> int:
+        """استعادة لقطة من snapshot وإرجاع عدد البايتات المقروءة"""
+        data = memoryview(data)
+        digest = bytes.fromhex(self.grid_hash())
+        if data[:len(digest)] != digest:
+            raise ValueError("Snapshot was taken on a different maze")
+        offset = len(digest)
+        player_r, player_c, enemy_count, coin_count = struct.unpack_from("<iiHI", data, offset)
+        offset += struct.calcsize("<iiHI")
+        if enemy_count != len(self.enemies):
+            raise ValueError("Snapshot enemy count does not match the maze")
+
+        old_cells = [tuple(self.player_pos)] + [tuple(enemy.pos) for enemy in self.enemies]
+        old_coins = self.coins
+
+        self.player_pos = [player_r, player_c]
+        for enemy in self.enemies:
+            (r, c, enemy.move_counter, enemy.glow_offset, enemy.glow_direction, dr, dc,
+             enemy.direction_change_counter, enemy.max_direction_steps) = _ENEMY_STATE.unpack_from(data, offset)
+            enemy.pos = [r, c]
+            enemy.random_direction = [dr, dc]
+            offset += _ENEMY_STATE.size
+        coins = array("i")
+        coins.frombytes(data[offset:offset + coin_count * 8])
+        offset += coin_count * 8
+        values = iter(coins)
+        self.coins = set(zip(values, values))
+        (has_rng,) = struct.unpack_from("<?", data, offset)
+        offset += 1
+        if has_rng:
+            offset = unpack_rng_state(self.rng, data, offset)
+        self.player_chunk = None
+
+        # تحديث فهرس الخلايا الفارغة بالفروق فقط
+        if self.free_cells is not None:
+            for coin in self.coins - old_coins:
+                self.occupy_cell(coin)
+            self.occupy_cell(self.player_pos)
+            for enemy in self.enemies:
+                self.occupy_cell(enemy.pos)
+            for cell in old_cells:
+                self.release_cell(cell)
+            for coin in old_coins - self.coins:
+                self.release_cell(coin)
+        return offset
+
+    def draw(self, screen: pygame.Surface, offset_x: int, offset_y: int, camera: "Camera" = None):
+        """رسم المتاهة وعناصرها (الخلايا الظاهرة في الكاميرا فقط إن وجدت)"""
+        if camera is not None:
+            cell_size = camera.cell_size
+            r0, r1, c0, c1 = camera.visible_cells(self.rows, self.cols)
+            previous_clip = screen.get_clip()
+            screen.set_clip(camera.view)
+        else:
+            cell_size = self.cell_size
+            r0, r1, c0, c1 = 0, self.rows, 0, self.cols
+        half = cell_size // 2
+        border = 2 if cell_size >= 12 else 1
+
+        def visible(pos) -> bool:
+            return r0 <= pos[0] < r1 and c0 <= pos[1] < c1
+
         # رسم الخلايا
-        for r in range(self.rows):
-            for c in range(self.cols):
-                x = c * self.cell_size + offset_x
-                y = r * self.cell_size + offset_y
-                cell_rect = pygame.Rect(x, y, self.cell_size, self.cell_size)
+        from maze_terrain import TERRAIN_NAMES
+        wall = self.move_table.wall
+        for r in range(r0, r1):
+            row = self.grid[r]
+            y = r * cell_size + offset_y
+            for c in range(c0, c1):
+                x = c * cell_size + offset_x
+                cell_rect = pygame.Rect(x, y, cell_size, cell_size)
                 
-                if self.grid[r][c] == 1:
+                value = row[c]
+                if value == wall:
                     # رسم الجدران
                     pygame.draw.rect(screen, Theme.COLORS['wall'], cell_rect)
                     # إضافة إطار للجدران
-                    pygame.draw.rect(screen, Theme.COLORS['primary'], cell_rect, 2)
+                    pygame.draw.rect(screen, Theme.COLORS['primary'], cell_rect, border)
                 else:
-                    # رسم الممرات مع شبكة خفيفة
-                    pygame.draw.rect(screen, Theme.COLORS['background'], cell_rect)
+                    # رسم الممرات (بلون الأرضية إن كانت موزونة) مع شبكة خفيفة
+                    terrain = TERRAIN_NAMES.get(value)
+                    pygame.draw.rect(screen, Theme.COLORS[terrain] if terrain else Theme.COLORS['background'], cell_rect)
                     pygame.draw.rect(screen, Theme.COLORS['grid'], cell_rect, 1)
         
         # رسم العملات بحجم أكبر وتأثير توهج
-        for coin in self.coins:
-            x = coin[1] * self.cell_size + self.cell_size//2 + offset_x
-            y = coin[0] * self.cell_size + self.cell_size//2 + offset_y
-            coin_size = int(self.cell_size * 0.4)
-            coin_surface = Theme.create_neon_surface(coin_size, coin_size, Theme.COLORS['coin'])
+        coin_size = int(cell_size * 0.4)
+        coin_surface = Theme.get_neon_surface(coin_size, coin_size, Theme.COLORS['coin'])
+        if len(self.coins) > (r1 - r0) * (c1 - c0):
+            # عملات كثيرة: نفحص الخلايا الظاهرة بدلاً من كل العملات
+            coins = [(r, c) for r in range(r0, r1) for c in range(c0, c1) if (r, c) in self.coins]
+        else:
+            coins = [coin for coin in self.coins if visible(coin)]
+        for coin in coins:
+            x = coin[1] * cell_size + half + offset_x
+            y = coin[0] * cell_size + half + offset_y
             screen.blit(coin_surface, 
                        (x - coin_size//2, y - coin_size//2))
         
         # رسم نقطة النهاية بتأثير متوهج
-        goal_x = self.goal[1] * self.cell_size + self.cell_size//2 + offset_x
-        goal_y = self.goal[0] * self.cell_size + self.cell_size//2 + offset_y
-        goal_surface = Theme.create_neon_surface(self.cell_size, self.cell_size, Theme.COLORS['success'])
-        screen.blit(goal_surface, 
-                   (goal_x - self.cell_size//2, goal_y - self.cell_size//2))
+        if visible(self.goal):
+            goal_x = self.goal[1] * cell_size + half + offset_x
+            goal_y = self.goal[0] * cell_size + half + offset_y
+            goal_surface = Theme.get_neon_surface(cell_size, cell_size, Theme.COLORS['success'])
+            screen.blit(goal_surface, 
+                       (goal_x - half, goal_y - half))
         
         # رسم اللاعب بتأثير متوهج وحجم مناسب
-        player_x = self.player_pos[1] * self.cell_size + self.cell_size//2 + offset_x
-        player_y = self.player_pos[0] * self.cell_size + self.cell_size//2 + offset_y
-        player_size = int(self.cell_size * 0.8)
-        player_surface = Theme.create_neon_surface(player_size, player_size, Theme.COLORS['primary'])
-        screen.blit(player_surface, 
-                   (player_x - player_size//2, player_y - player_size//2))
+        if visible(self.player_pos):
+            player_x = self.player_pos[1] * cell_size + half + offset_x
+            player_y = self.player_pos[0] * cell_size + half + offset_y
+            player_size = int(cell_size * 0.8)
+            player_surface = Theme.get_neon_surface(player_size, player_size, Theme.COLORS['primary'])
+            screen.blit(player_surface, 
+                       (player_x - player_size//2, player_y - player_size//2))
         
         # رسم الأعداء بتأثير متوهج وحجم مناسب
+        enemy_size = int(cell_size * 0.7)
+        enemy_surface = Theme.get_neon_surface(enemy_size, enemy_size, Theme.COLORS['danger'])
         for enemy in self.enemies:
-            x = enemy.pos[1] * self.cell_size + self.cell_size//2 + offset_x
-            y = enemy.pos[0] * self.cell_size + self.cell_size//2 + offset_y
-            enemy_size = int(self.cell_size * 0.7)
-            enemy_surface = Theme.create_neon_surface(enemy_size, enemy_size, Theme.COLORS['danger'])
+            if not visible(enemy.pos):
+                continue
+            x = enemy.pos[1] * cell_size + half + offset_x
+            y = enemy.pos[0] * cell_size + half + offset_y
             screen.blit(enemy_surface, 
                        (x - enemy_size//2, y - enemy_size//2))
 
+        if camera is not None:
+            screen.set_clip(previous_clip)
+
     def move_player(self, dx: int, dy: int) -> bool:
         """تحريك اللاعب"""
         new_pos = [
@@ -439,17 +1293,18 @@ class Maze:
             self.player_pos[1] + dy
         ]
         
-        # التحقق من صحة الحركة
-        if (0 <= new_pos[0] < self.rows and 
-            0 <= new_pos[1] < self.cols and 
-            self.grid[new_pos[0]][new_pos[1]] == 0):
+        # التحقق من صحة الحركة (البقاء في المكان مسموح كما في السابق)
+        if (dx, dy) == (0, 0) or self.move_table.can_move(self.player_pos[0], self.player_pos[1], dx, dy):
             
             # التحقق من الاصطدام بالأعداء قبل الحركة
             for enemy in self.enemies:
                 if new_pos == enemy.pos or (self.player_pos == enemy.pos):
                     return False
             
+            old_pos = self.player_pos
             self.player_pos = new_pos
+            self.occupy_cell(new_pos)
+            self.release_cell(old_pos)
             
             # التحقق من الاصطدام بالأعداء بعد الحركة
             for enemy in self.enemies:
@@ -461,9 +1316,20 @@ class Maze:
 
     def update(self):
         """تحديث حالة المتاهة"""
-        # تحديث الأعداء
+        # تحديث الأعداء مع تحديث فهرس الخلايا الفارغة عند تحركها
+        route = self.route_corridor() if self.enemies else None
         for enemy in self.enemies:
-            enemy.update(self.grid, self.player_pos, self.goal)
+            old_pos = enemy.pos
+            enemy.update(self.move_table, self.player_pos, self.goal, route)
+            if enemy.pos is not old_pos:
+                self.occupy_cell(enemy.pos)
+                self.release_cell(old_pos)
+
+        if self.is_chunked:
+            chunk = self.grid.chunk_key(*self.player_pos)
+            if chunk != self.player_chunk:
+                self.player_chunk = chunk
+                self.grid.evict_far([self.player_pos] + [enemy.pos for enemy in self.enemies])
         
         # التحقق من جمع العملات
         player_pos_tuple = tuple(self.player_pos)
@@ -488,21 +1354,33 @@ class SmartAgent:
         self.thinking_time = 45
         self.is_thinking = False
         self.think_counter = 0
-        
+        self.search = None  # بحث آمن جار يتقدم ضمن ميزانية كل إطار
+
     def manhattan_distance(self, pos1, pos2):
         """حساب المسافة بين نقطتين"""
         return abs(pos1[0] - pos2[0]) + abs(pos1[1] - pos2[1])
 
-    def is_safe_position(self, pos, enemies):
-        """التحقق مما إذا كان الموقع آمناً (بعيداً عن الأعداء)"""
+    def is_safe_position(self, pos, enemy_positions):
+        """التحقق مما إذا كان الموقع آمناً (بعيداً عن مواقع الأعداء)"""
         SAFE_DISTANCE = 2
-        for enemy in enemies:
-            if self.manhattan_distance(pos, enemy.pos) < SAFE_DISTANCE:
+        for enemy_pos in enemy_positions:
+            if self.manhattan_distance(pos, enemy_pos) < SAFE_DISTANCE:
                 return False
         return True
 
     def find_path(self):
         """البحث عن مسار آمن إلى الهدف"""
+        if self.search is not None:
+            # متابعة بحث بدأ في إطار سابق حتى نفاد ميزانية هذا الإطار
+            if not self.search.advance(math.inf, AGENT_SEARCH_STEPS):
+                return
+            path = self.search.path
+            PATH_CACHE.put(self.search.cache_key, path)
+            self.search = None
+            if path:
+                self.path = path
+            return
+
         if self.is_thinking:
             self.think_counter += 1
             if self.think_counter < self.thinking_time:
@@ -519,51 +1397,26 @@ class SmartAgent:
             return
         self.last_enemy_positions = current_enemy_positions
 
-        # قائمة المواقع المفتوحة والمغلقة
-        open_list = []
-        closed_set = set()
-        came_from = {}
-        g_score = {start: 0}
-        f_score = {start: self.manhattan_distance(start, goal)}
-        heapq.heappush(open_list, (f_score[start], start))
-
-        while open_list:
-            current = heapq.heappop(open_list)[1]
-
-            if current == goal:
-                # تم العثور على المسار
-                path = []
-                while current in came_from:
-                    path.append(current)
-                    current = came_from[current]
-                path.append(start)
-                path.reverse()
-                self.path = path[1:]  # حذف الموقع الحالي
-                return
-
-            closed_set.add(current)
-
-            # فحص الاتجاهات الممكنة
-            for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
-                next_pos = (current[0] + dx, current[1] + dy)
-
-                if (next_pos[0] < 0 or next_pos[0] >= len(self.maze.grid) or
-                    next_pos[1] < 0 or next_pos[1] >= len(self.maze.grid[0]) or
-                    self.maze.grid[next_pos[0]][next_pos[1]] == 1 or
-                    next_pos in closed_set):
-                    continue
-
-                # التحقق من سلامة الموقع
-                if not self.is_safe_position(next_pos, self.maze.enemies):
-                    continue
+        # إعادة استخدام نتيجة بحث سابق لنفس الحالة (نفس مواقع الأعداء)
+        key = PATH_CACHE.make_key(self.maze, start, goal, "safe_a_star", sorted(current_enemy_positions))
+        path = PATH_CACHE.get(key)
+        if path is None:
+            # البحث يتوزع على الإطارات التالية بدلاً من تجميد إطار واحد في المتاهات الكبيرة
+            self.search = SearchAnimation(self.safe_path_steps(start, goal, current_enemy_positions),
+                                          self.maze.rows, self.maze.cols, key, show=False)
+            self.find_path()
+            return
+        if path:
+            self.path = path
 
-                tentative_g_score = g_score[current] + 1
+    def safe_path_steps(self, start: tuple, goal: tuple, enemy_positions):
+        """مولد بحث A* عن مسار يتجنب محيط الأعداء في مواقعهم عند بدء البحث"""
+        neighbors = self.maze.neighbor_function()
 
-                if next_pos not in g_score or tentative_g_score < g_score[next_pos]:
-                    came_from[next_pos] = current
-                    g_score[next_pos] = tentative_g_score
-                    f_score[next_pos] = tentative_g_score + self.manhattan_distance(next_pos, goal)
-                    heapq.heappush(open_list, (f_score[next_pos], next_pos))
+        def safe_neighbors(cell):
+            # التحقق من سلامة الموقع
+            return [pos for pos in neighbors(cell) if self.is_safe_position(pos, enemy_positions)]
+        return self.maze.a_star_steps(start, goal, safe_neighbors)
 
     def check_collision(self) -> bool:
         """التحقق من الاصطدام مع الأعداء"""
@@ -579,8 +1432,8 @@ class SmartAgent:
         if self.check_collision():
             return True  # حدث اصطدام
 
-        # إذا كان في وضع التفكير، استمر في العد
-        if self.is_thinking:
+        # إذا كان في وضع التفكير أو البحث، استمر في العد أو البحث
+        if self.is_thinking or self.search is not None:
             self.find_path()
             return False
 
@@ -597,12 +1450,12 @@ class SmartAgent:
 
         # التحرك للموقع التالي في المسار
         if self.path:
-            next_pos = self.path[0]
+            next_pos = self.path.peek()
             dx = next_pos[0] - self.maze.player_pos[0]
             dy = next_pos[1] - self.maze.player_pos[1]
             if self.maze.move_player(dx, dy):
-                self.path.pop(0)
-                self.wait_counter = self.move_delay
+                self.path.advance()  # O(1) بدلاً من حذف أول عنصر من قائمة
+                self.wait_counter = self.move_delay + self.maze.terrain_delay(next_pos)  # أبطأ في الأرضيات الموزونة
             else:
                 # إعادة حساب المسار إذا كان هناك عائق
                 self.path = []
@@ -617,35 +1470,17 @@ class SmartAgent:
     def a_star_solve(self):
         """تنفيذ A* للعثور على مسار من البداية إلى الهدف."""
         start = tuple(self.maze.player_pos)  # الحصول على موقع البداية للاعب.
-        goal = self.maze.goal  # الحصول على موقع الهدف في المتاهة.
-        open_list = []  # تهيئة قائمة مفتوحة لتتبع العقد التي يجب استكشافها.
-        heapq.heappush(open_list, (0, start, [start]))  # إضافة العقدة البداية إلى القائمة المفتوحة مع المسار.
-        g_score = {start: 0}  # تهيئة دالة g لتتبع تكلفة المسار من البداية إلى العقدة الحالية.
-        visited = set()  # إنشاء مجموعة لتتبع العقد التي تم زيارتها.
+        return run_search(self.maze.a_star_steps(start, self.maze.goal))  # البحث الموزون المشترك في Maze.
 
-        while open_list:  # الاستمرار حتى لا توجد عقد أخرى للاستكشاف.
-            _, current, path = heapq.heappop(open_list)  # إزالة العقدة ذات التكلفة الأقل.
-            if current == goal:  # التحقق مما إذا كانت العقدة الحالية هي الهدف.
-                return path  # إرجاع المسار إذا تم الوصول إلى الهدف.
-            visited.add(current)  # وضع علامة على العقدة الحالية كتمت زيارتها.
-
-            for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:  # استكشاف جميع الاتجاهات الممكنة.
-                next_pos = (current[0] + dx, current[1] + dy)  # حساب الموقع التالي.
-                if (0 <= next_pos[0] < len(self.maze.grid) and
-                    0 <= next_pos[1] < len(self.maze.grid[0]) and
-                    self.maze.grid[next_pos[0]][next_pos[1]] == 0 and
-                    next_pos not in visited):  # التحقق مما إذا كان الموقع التالي صالحًا ولم يتم زيارته.
-                    tentative_g_score = g_score[current] + 1  # حساب تكلفة المسار المؤقتة.
-                    if next_pos not in g_score or tentative_g_score < g_score[next_pos]:  # التحقق من تحسين المسار.
-                        g_score[next_pos] = tentative_g_score  # تحديث تكلفة المسار.
-                        f_score = tentative_g_score + self.manhattan_distance(next_pos, goal)  # حساب دالة f.
-                        heapq.heappush(open_list, (f_score, next_pos, path + [next_pos]))  # إضافة العقدة إلى القائمة المفتوحة.
-        return []  # إرجاع مسار فارغ إذا لم يتم العثور على حل.
 
 # === تحديث فئة اللعبة الرئيسية ===
 class ModernMazeGame:
-    def __init__(self):
+    def __init__(self, levels: List[dict] = None):
         """تهيئة اللعبة"""
+        # تهيئة pygame عند إنشاء اللعبة وليس عند استيراد الوحدة
+        pygame.init()
+        self.startup_time = None  # زمن الإقلاع حتى أول إطار (ثوانٍ)
+
         # إعداد النافذة
         info = pygame.display.Info()
         self.width = min(1200, info.current_w - 100)
@@ -668,10 +1503,24 @@ class ModernMazeGame:
         self.game_over = False  # إضافة متغير جديد لحالة خسارة اللعبة
         
         # تحميل المستوى الأول
+        self.levels = levels or LEVELS
         self.cell_size = 50
-        self.maze = Maze(LEVELS[0], self.cell_size)
+        self.camera = Camera(self.cell_size)
+        self.maze = Maze(self.levels[0], self.cell_size)
         self.agent = SmartAgent(self.maze)
         self.auto_move = False
+        self.player_wait = 0  # إطارات الانتظار بعد دخول أرضية بطيئة
+
+        # البحث المتدرج لأزرار الخوارزميات (المفتاح V يبطئه لعرض طريقة عمل كل خوارزمية)
+        self.search = None
+        self.teaching_mode = False
+        self.teaching_steps = 2  # عدد الخطوات في كل إطار في وضع العرض التعليمي
+
+        # وضع الوكلاء المتعددين (يفعل بالمفتاح M)
+        self.swarm = None
+        self.swarm_size = 24
+        self.swarm_move_delay = 10  # عدد الإطارات بين خطوتين للوكلاء
+        self.swarm_counter = 0
         
         # حساب الإزاحة لتوسيط المتاهة
         self.calculate_offsets()
@@ -679,55 +1528,81 @@ class ModernMazeGame:
         # إنشاء الأزرار
         self.create_buttons()
 
-        self.total_levels = len(LEVELS)
+        self.total_levels = len(self.levels)
         self.level_complete = False
         self.game_complete = False
         self.level_transition_timer = 0
         self.transition_delay = 60
 
-    def calculate_offsets(self):
-        """حساب إزاحات المتاهة للتوسيط"""
-        maze_width = self.maze.cols * self.cell_size
-        maze_height = self.maze.rows * self.cell_size
-        self.offset_x = (self.width - 300 - maze_width) // 2  # 300 للشريط الجانبي
-        self.offset_y = (self.height - maze_height) // 2
+        # لقطات الاستعادة: بداية المستوى (إعادة فورية) ونقطة حفظ (F5 للحفظ، F9 للاستعادة)
+        self.level_start = self.snapshot()
+        self.checkpoint = None
+
+    def calculate_offsets(self, snap: bool = True):
+        """حساب إزاحات المتاهة (توسيط المتاهة الصغيرة وتتبع اللاعب في الكبيرة)"""
+        self.camera.set_viewport(pygame.Rect(0, 0, self.width - 300, self.height))  # 300 للشريط الجانبي
+        self.camera.follow(self.maze.player_pos, self.maze.rows, self.maze.cols, snap=snap)
+        self.offset_x, self.offset_y = self.camera.offsets()
+
+    BUTTON_TOP = 100  # موقع أول زر في الشريط الجانبي
+    BUTTON_SPACING = 70  # المسافة بين بدايتي زرين متتاليين
+
+    def button_position(self, index: int) -> Tuple[int, int]:
+        """حساب موقع الزر رقم index حسب عرض النافذة الحالي"""
+        return self.width - 275, self.BUTTON_TOP + index * self.BUTTON_SPACING  # تعديل موقع الأزرار
+
+    def button_at(self, pos) -> Optional["ModernButton"]:
+        """الزر تحت المؤشر مباشرة من تخطيط العمود (دون المرور على كل الأزرار)"""
+        index = (pos[1] - self.BUTTON_TOP) // self.BUTTON_SPACING
+        buttons = self.all_buttons()
+        if 0 <= index < len(buttons) and buttons[index].rect.collidepoint(pos):
+            return buttons[index]
+        return None
 
     def create_buttons(self):
         """إنشاء الأزرار"""
         button_width = 250  # زيادة عرض الأزرار
         button_height = 50
-        x = self.width - 275  # تعديل موقع الأزرار
-        
-        self.pause_button = ModernButton(
-            x, 100, button_width, button_height,
-            TRANSLATIONS[self.language]["pause"], self.font,
-            is_arabic=(self.language == "ar")
-        )
-        
-        self.restart_button = ModernButton(
-            x, 170, button_width, button_height,
-            TRANSLATIONS[self.language]["restart"], self.font,
-            is_arabic=(self.language == "ar")
-        )
-        
-        self.language_button = ModernButton(
-            x, 240, button_width, button_height,
-            TRANSLATIONS[self.language]["language"], self.font,
-            is_arabic=(self.language == "ar")
-        )
-        
-        self.auto_button = ModernButton(
-            x, 310, button_width, button_height,
-            TRANSLATIONS[self.language]["auto_move_start"], self.font,
-            is_arabic=(self.language == "ar")
-        )
-
-        # Add a dropdown or buttons for selecting the algorithm
-        self.algorithm_buttons = [
-            ModernButton(x, 380, button_width, button_height, "BFS", self.font, is_arabic=(self.language == "ar")),
-            ModernButton(x, 450, button_width, button_height, "DFS", self.font, is_arabic=(self.language == "ar")),
-            ModernButton(x, 520, button_width, button_height, "A*", self.font, is_arabic=(self.language == "ar"))
+        is_arabic = (self.language == "ar")
+        labels = [
+            TRANSLATIONS[self.language]["pause"],
+            TRANSLATIONS[self.language]["restart"],
+            TRANSLATIONS[self.language]["language"],
+            TRANSLATIONS[self.language]["auto_move_start"],
+            # Add a dropdown or buttons for selecting the algorithm
+            "BFS", "DFS", "A*"
         ]
+        buttons = []
+        for i, label in enumerate(labels):
+            x, y = self.button_position(i)
+            buttons.append(ModernButton(x, y, button_width, button_height, label, self.font, is_arabic=is_arabic))
+
+        self.pause_button, self.restart_button, self.language_button, self.auto_button = buttons[:4]
+        self.algorithm_buttons = buttons[4:]
+        self.hovered_button = None
+
+    def all_buttons(self) -> List["ModernButton"]:
+        """جميع الأزرار بترتيب عرضها"""
+        return [self.pause_button, self.restart_button, self.language_button,
+                self.auto_button] + self.algorithm_buttons
+
+    def layout(self):
+        """إعادة حساب مواقع عناصر الواجهة فقط دون إعادة إنشاء الأزرار"""
+        self.ui.resize(self.width, self.height)
+        self.calculate_offsets()
+        for i, button in enumerate(self.all_buttons()):
+            button.set_position(*self.button_position(i))
+
+    def apply_resize(self, width: int, height: int):
+        """تطبيق تغيير حجم النافذة مرة واحدة لكل دفعة من أحداث التحجيم"""
+        width = max(800, width)
+        height = max(600, height)
+        if self.screen.get_size() != (width, height):
+            self.screen = pygame.display.set_mode((width, height), pygame.RESIZABLE)
+        if (width, height) != (self.width, self.height):
+            self.width = width
+            self.height = height
+            self.layout()
 
     def draw_game_info(self):
         """رسم معلومات اللعبة"""
@@ -756,13 +1631,17 @@ class ModernMazeGame:
         """تحميل مستوى جديد"""
         if level_number < self.total_levels:
             self.current_level = level_number
-            self.maze = Maze(LEVELS[level_number], self.cell_size)
+            self.maze = Maze(self.levels[level_number], self.cell_size)
             self.agent = SmartAgent(self.maze)
+            self.swarm = None
+            self.search = None
             self.calculate_offsets()
             self.start_time = pygame.time.get_ticks()
             self.level_complete = False
             self.auto_move = False
             self.is_paused = False
+            self.level_start = self.snapshot()
+            self.checkpoint = None
         else:
             self.game_complete = True
             self.score = 0  # تصفير النقاط عند إكمال جميع المستويات
@@ -832,6 +1711,66 @@ class ModernMazeGame:
             y = (self.height - surface.get_height()) // 2
             self.screen.blit(surface, (x, y))
 
+    def snapshot(self) -> bytes:
+        """لقطة ثنائية لحالة اللعبة كاملة (تستعاد بـ restore)"""
+        flags = (self.game_over | self.level_complete << 1 |
+                 self.game_complete << 2 | self.auto_move << 3)
+        elapsed = max(0, pygame.time.get_ticks() - self.start_time)
+        agent = self.agent
+        parts = [_GAME_STATE.pack(
+            SNAPSHOT_MAGIC, self.current_level, self.score, elapsed, flags,
+            self.level_transition_timer, agent.wait_counter, agent.think_counter, agent.is_thinking)]
+        path = agent.path
+        if isinstance(path, PackedPath) and path:
+            parts.append(_AGENT_PATH.pack(True, path.position[0], path.position[1], path.length, path.cursor))
+            parts.append(path.data)
+        else:
+            parts.append(_AGENT_PATH.pack(False, 0, 0, 0, 0))
+        parts.append(self.maze.snapshot())
+        return b"".join(parts)
+
+    def restore(self, data: bytes):
+        """استعادة لقطة من snapshot (يعاد تحميل المستوى فقط إذا اختلف)"""
+        data = memoryview(data)
+        (magic, level, score, elapsed, flags, transition_timer,
+         wait_counter, think_counter, is_thinking) = _GAME_STATE.unpack_from(data, 0)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError("Not a maze game snapshot")
+        offset = _GAME_STATE.size
+        has_path, path_r, path_c, length, cursor = _AGENT_PATH.unpack_from(data, offset)
+        offset += _AGENT_PATH.size
+        path_data = bytes(data[offset:offset + (length + 3) // 4]) if has_path else b""
+        offset += len(path_data)
+
+        if level != self.current_level:
+            level_start, checkpoint = self.level_start, self.checkpoint
+            self.load_level(level)
+            self.level_start, self.checkpoint = level_start, checkpoint
+        self.maze.restore(data[offset:])
+
+        self.current_level = level
+        self.score = score
+        self.start_time = pygame.time.get_ticks() - elapsed
+        self.game_over = bool(flags & 1)
+        self.level_complete = bool(flags & 2)
+        self.game_complete = bool(flags & 4)
+        self.auto_move = bool(flags & 8)
+        self.level_transition_timer = transition_timer
+
+        self.agent = SmartAgent(self.maze)
+        self.agent.wait_counter = wait_counter
+        self.agent.think_counter = think_counter
+        self.agent.is_thinking = is_thinking
+        if has_path:
+            self.agent.path = PackedPath((path_r, path_c), path_data, length)
+            self.agent.path.cursor = cursor
+        self.swarm = None
+        self.search = None
+        auto_text = TRANSLATIONS[self.language]["auto_move_stop" if self.auto_move else "auto_move_start"]
+        if self.auto_button.text != auto_text:
+            self.auto_button.set_text(auto_text, is_arabic=(self.language == "ar"))
+        self.calculate_offsets()
+
     def restart_game(self):
         """إعادة تشغيل اللعبة"""
         self.score = 0
@@ -844,8 +1783,13 @@ class ModernMazeGame:
         # رسم الخلفية
         self.screen.fill(Theme.COLORS['background'])
         
-        # رسم المتاهة
-        self.maze.draw(self.screen, self.offset_x, self.offset_y)
+        # رسم المتاهة (تتبع الكاميرا للاعب)
+        self.calculate_offsets(snap=False)
+        self.maze.draw(self.screen, self.offset_x, self.offset_y, self.camera)
+        if self.search is not None:
+            self.search.draw(self.screen, self.camera, self.offset_x, self.offset_y,
+                             self.maze.rows, self.maze.cols)
+        self.draw_swarm()
         
         # رسم واجهة المستخدم
         self.ui.draw(self.screen)
@@ -871,6 +1815,37 @@ class ModernMazeGame:
         
         pygame.display.flip()
 
+    def toggle_swarm(self):
+        """تشغيل أو إيقاف وضع الوكلاء المتعددين المخطط لهم تعاونياً"""
+        if self.swarm is not None:
+            self.swarm = None
+        elif not self.maze.is_chunked:
+            from maze_multi_agent import create_swarm
+            self.swarm = create_swarm(self.maze.grid, self.swarm_size)
+            self.swarm_counter = 0
+
+    def update_swarm(self):
+        """تخطيط الوكلاء ضمن ميزانية الإطار وتحريكهم خطوة كل عدة إطارات"""
+        self.swarm.update()
+        self.swarm_counter += 1
+        if self.swarm_counter >= self.swarm_move_delay:
+            self.swarm_counter = 0
+            self.swarm.tick()
+
+    def draw_swarm(self):
+        """رسم الوكلاء الظاهرين في الكاميرا"""
+        if self.swarm is None:
+            return
+        cell_size = self.camera.cell_size
+        r0, r1, c0, c1 = self.camera.visible_cells(self.maze.rows, self.maze.cols)
+        size = int(cell_size * 0.5)
+        surface = Theme.get_neon_surface(size, size, Theme.COLORS['secondary'])
+        for r, c in self.swarm.positions():
+            if r0 <= r < r1 and c0 <= c < c1:
+                x = c * cell_size + (cell_size - size) // 2 + self.offset_x
+                y = r * cell_size + (cell_size - size) // 2 + self.offset_y
+                self.screen.blit(surface, (x, y))
+
     def toggle_language(self):
         """تبديل اللغة"""
         self.language = "en" if self.language == "ar" else "ar"
@@ -892,193 +1867,285 @@ class ModernMazeGame:
             is_arabic=(self.language == "ar")
         )
 
-    def run(self):
-        """تشغيل اللعبة"""
-        clock = pygame.time.Clock()
-        running = True
-        
-        while running:
-            # معالجة الأحداث
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
-                elif event.type == pygame.VIDEORESIZE:
-                    self.width = max(800, event.w)
-                    self.height = max(600, event.h)
-                    self.screen = pygame.display.set_mode(
-                        (self.width, self.height), pygame.RESIZABLE
-                    )
-                    self.ui = UI(self.width, self.height)
-                    self.calculate_offsets()
-                    self.create_buttons()
-                elif event.type == pygame.KEYDOWN and not self.is_paused and not self.game_over:
-                    moved = False
-                    if event.key == pygame.K_LEFT:
-                        moved = self.maze.move_player(0, -1)
-                    elif event.key == pygame.K_RIGHT:
-                        moved = self.maze.move_player(0, 1)
-                    elif event.key == pygame.K_UP:
-                        moved = self.maze.move_player(-1, 0)
-                    elif event.key == pygame.K_DOWN:
-                        moved = self.maze.move_player(1, 0)
-                    
-                    # إذا فشلت الحركة بسبب الاصطدام بعدو
-                    if not moved:
-                        # التحقق من أن السبب هو الاصطدام بعدو
-                        if self.check_collision_with_enemies():
-                            self.game_over = True
-                            self.score = 0
-                
-                # معالجة أحداث الأزرار
-                if self.pause_button.handle_event(event):
-                    self.is_paused = not self.is_paused
-                    self.pause_button.set_text(
-                        TRANSLATIONS[self.language]["resume" if self.is_paused else "pause"],
-                        is_arabic=(self.language == "ar")
-                    )
-                if self.restart_button.handle_event(event):
-                    if self.game_over:
-                        self.restart_game()
-                    else:
-                        self.maze = Maze(LEVELS[self.current_level], self.cell_size)
-                        self.agent = SmartAgent(self.maze)  # إعادة تهيئة العميل الذكي
-                        self.calculate_offsets()
-                if self.language_button.handle_event(event):
-                    self.toggle_language()
-                if self.auto_button.handle_event(event):
-                    self.auto_move = not self.auto_move
-                    self.auto_button.set_text(
-                        TRANSLATIONS[self.language]["auto_move_stop" if self.auto_move else "auto_move_start"],
-                        is_arabic=(self.language == "ar")
-                    )
-                for i, button in enumerate(self.algorithm_buttons):
-                    if button.handle_event(event):
-                        if i == 0:  # BFS
-                            path = self.bfs_solve()
-                        elif i == 1:  # DFS
-                            path = self.dfs_solve()
-                        elif i == 2:  # A*
-                            path = self.a_star_solve()
-                        
-                        # If a path is found, set it for the agent
-                        if path:
-                            self.agent.path = path
-                            self.auto_move = True
-                            self.auto_button.set_text(
-                                TRANSLATIONS[self.language]["auto_move_stop"],
-                                is_arabic=(self.language == "ar")
-                            )
-            
-            if not self.is_paused and self.auto_move and not self.game_over:
-                # تحديث العميل الذكي والتحقق من الاصطدام
-                if self.agent.update():  # إذا حدث اصطدام
+    def record_startup_time(self):
+        """تسجيل زمن الإقلاع حتى أول إطار (تعرضه نقطة الدخول مع --verbose)"""
+        self.startup_time = time.perf_counter() - _STARTUP_BEGIN
+
+    def handle_event(self, event: pygame.event.Event) -> bool:
+        """معالجة حدث واحد (ما عدا تغيير الحجم)، وإرجاع False عند طلب الإغلاق"""
+        if event.type == pygame.QUIT:
+            return False
+        elif event.type == pygame.MOUSEWHEEL:
+            # التكبير والتصغير بعجلة الفأرة
+            self.camera.zoom_by(1.1 ** event.y)
+        elif event.type == pygame.KEYDOWN and event.key in (pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS):
+            self.camera.zoom_by(1.25)
+        elif event.type == pygame.KEYDOWN and event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+            self.camera.zoom_by(0.8)
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_m:
+            self.toggle_swarm()
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_v:
+            self.teaching_mode = not self.teaching_mode
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_F5:
+            self.checkpoint = self.snapshot()
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_F9 and self.checkpoint is not None:
+            self.restore(self.checkpoint)
+        elif event.type == pygame.KEYDOWN and not self.is_paused and not self.game_over:
+            moved = False
+            if self.player_wait > 0:
+                return True  # اللاعب عالق في أرضية بطيئة
+            if event.key == pygame.K_LEFT:
+                moved = self.maze.move_player(0, -1)
+            elif event.key == pygame.K_RIGHT:
+                moved = self.maze.move_player(0, 1)
+            elif event.key == pygame.K_UP:
+                moved = self.maze.move_player(-1, 0)
+            elif event.key == pygame.K_DOWN:
+                moved = self.maze.move_player(1, 0)
+
+            if moved:
+                self.player_wait = self.maze.terrain_delay(self.maze.player_pos)
+            else:
+                # إذا فشلت الحركة: التحقق من أن السبب هو الاصطدام بعدو
+                if self.check_collision_with_enemies():
+                    self.game_over = True
+                    self.score = 0
+
+        # أحداث الفأرة تصل فقط إلى الزر الواقع تحت المؤشر
+        if event.type in (pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN):
+            self.dispatch_button_event(event)
+        return True
+
+    def dispatch_button_event(self, event: pygame.event.Event):
+        """تحديث التحويم وتنفيذ ضغط الزر الواقع تحت المؤشر فقط"""
+        button = self.button_at(event.pos)
+        if event.type == pygame.MOUSEMOTION and button is not self.hovered_button:
+            if self.hovered_button is not None:
+                self.hovered_button.is_hovered = False
+            self.hovered_button = button
+        if button is not None and button.handle_event(event):
+            self.button_clicked(button)
+
+    def button_clicked(self, button: "ModernButton"):
+        """تنفيذ عمل الزر المضغوط"""
+        if button is self.pause_button:
+            self.is_paused = not self.is_paused
+            self.pause_button.set_text(
+                TRANSLATIONS[self.language]["resume" if self.is_paused else "pause"],
+                is_arabic=(self.language == "ar")
+            )
+        elif button is self.restart_button:
+            if self.game_over and self.checkpoint is not None:
+                self.restore(self.checkpoint)  # إعادة المحاولة من نقطة الحفظ
+            elif self.game_over:
+                self.restart_game()
+            else:
+                self.restore(self.level_start)  # إعادة فورية للمستوى دون إعادة بنائه
+        elif button is self.language_button:
+            self.toggle_language()
+        elif button is self.auto_button:
+            self.auto_move = not self.auto_move
+            self.auto_button.set_text(
+                TRANSLATIONS[self.language]["auto_move_stop" if self.auto_move else "auto_move_start"],
+                is_arabic=(self.language == "ar")
+            )
+        elif button in self.algorithm_buttons:
+            self.start_search(("bfs", "dfs", "a_star")[self.algorithm_buttons.index(button)])
+
+    def update(self):
+        """تحديث حالة اللعبة لإطار واحد"""
+        if self.search is not None and not self.search.done:
+            self.update_search()
+
+        if not self.is_paused and self.auto_move and not self.game_over:
+            # تحديث العميل الذكي والتحقق من الاصطدام
+            if self.agent.update():  # إذا حدث اصطدام
+                self.game_over = True
+                self.score = 0
+
+        if not self.is_paused and not self.game_over and self.swarm is not None:
+            self.update_swarm()
+
+        if not self.is_paused and not self.game_over:
+            # تحديث حالة اللعبة
+            if not self.level_complete and not self.game_complete:
+                if self.player_wait > 0:
+                    self.player_wait -= 1
+                points = self.maze.update()
+                self.score += points
+                if self.check_collision_with_enemies():
                     self.game_over = True
                     self.score = 0
-            
-            if not self.is_paused and not self.game_over:
-                # تحديث حالة اللعبة
-                if not self.level_complete and not self.game_complete:
-                    points = self.maze.update()
-                    self.score += points
-                    if self.check_collision_with_enemies():
-                        self.game_over = True
-                        self.score = 0
-                    else:
-                        self.check_level_completion()
                 else:
-                    self.handle_level_transition()
-            
-            # رسم اللعبة
-            self.draw()
-            clock.tick(60)
-        
+                    self.check_level_completion()
+            else:
+                self.handle_level_transition()
+
+    def step(self, events: List[pygame.event.Event]) -> bool:
+        """إطار كامل من حلقة اللعبة: الأحداث ثم التحديث ثم الرسم
+
+        منفصل عن run حتى تقاد اللعبة نفسها بأحداث مصطنعة دون نافذة
+        (maze_bench.py). يعيد False عند طلب الإغلاق.
+        """
+        running = True
+        pending_size = None  # آخر حجم مطلوب ضمن دفعة أحداث التحجيم
+        for event in events:
+            if event.type == pygame.VIDEORESIZE:
+                pending_size = (event.w, event.h)
+            elif not self.handle_event(event):
+                running = False
+        if pending_size is not None:
+            self.apply_resize(*pending_size)
+
+        self.update()
+
+        # رسم اللعبة
+        self.draw()
+        if self.startup_time is None:
+            self.record_startup_time()
+        return running
+
+    def target_fps(self) -> int:
+        """معدل الإطارات المناسب للحالة الحالية (0: المشهد ثابت، ننتظر الأحداث)"""
+        playing = not (self.is_paused or self.game_over or self.game_complete)
+        if playing or not self.camera.settled or (self.search is not None and not self.search.done):
+            return ACTIVE_FPS
+        if any(button.is_animating() for button in self.all_buttons()):
+            return UI_FPS
+        return 0
+
+    def wait_for_events(self, timeout_ms: int) -> List[pygame.event.Event]:
+        """انتظار أول حدث دون استهلاك المعالج ثم جمع ما تبعه"""
+        event = pygame.event.wait(timeout_ms)
+        events = [] if event.type == pygame.NOEVENT else [event]
+        events.extend(pygame.event.get())
+        return events
+
+    def run(self):
+        """تشغيل اللعبة (بمعدل إطارات يتكيف مع الحالة وانتظار الأحداث عند الثبات)"""
+        clock = pygame.time.Clock()
+        events = pygame.event.get()
+        while self.step(events):
+            fps = self.target_fps()
+            if fps:
+                clock.tick(fps)
+                events = pygame.event.get()
+            else:
+                # الإيقاف المؤقت ونهاية اللعبة: لا رسم حتى يصل حدث (أو مرة كل ثانية للساعة)
+                events = self.wait_for_events(IDLE_TIMEOUT_MS)
+
         pygame.quit()
         sys.exit()
 
+    def start_search(self, algorithm: str):
+        """بدء بحث متدرج يتقدم مع الإطارات (أو استخدام النتيجة المخزنة فوراً)"""
+        start = tuple(self.maze.player_pos)
+        key = PATH_CACHE.make_key(self.maze, start, self.maze.goal, algorithm)
+        path = PATH_CACHE.get(key)
+        if path is not None and not self.teaching_mode:
+            self.search = None
+            self.follow_path(path)
+            return
+        steps = getattr(self, algorithm + "_steps")()
+        self.search = SearchAnimation(steps, self.maze.rows, self.maze.cols, key)
+
+    def update_search(self):
+        """تقدم البحث الحالي ضمن ميزانية الإطار وتسليم المسار عند انتهائه"""
+        max_steps = self.teaching_steps if self.teaching_mode else None
+        if self.search.advance(SEARCH_FRAME_BUDGET_MS, max_steps):
+            PATH_CACHE.put(self.search.cache_key, self.search.path)
+            self.follow_path(self.search.path)
+
+    def follow_path(self, path: list):
+        """تسليم المسار للعميل الذكي وتشغيل الحركة التلقائية"""
+        if path:
+            self.agent.path = path.copy()
+            self.auto_move = True
+            self.auto_button.set_text(
+                TRANSLATIONS[self.language]["auto_move_stop"],
+                is_arabic=(self.language == "ar")
+            )
+
+    def bfs_solve(self):
+        """تنفيذ BFS حتى النهاية وإرجاع المسار."""
+        return run_search(self.bfs_steps())
+
+    def dfs_solve(self):
+        """تنفيذ DFS حتى النهاية وإرجاع المسار."""
+        return run_search(self.dfs_steps())
+
+    def a_star_solve(self):
+        """تنفيذ A* حتى النهاية وإرجاع المسار."""
+        return run_search(self.a_star_steps())
+
     # === خوارزمية البحث بالعرض (BFS) ===
     # هذه الخوارزمية تستخدم للبحث عن أقصر مسار في المتاهة من البداية إلى الهدف.
     # تعمل عن طريق استكشاف جميع الجيران في المستوى الحالي قبل الانتقال إلى المستوى التالي.
-    def bfs_solve(self):        
-        """تنفيذ BFS للعثور على مسار من البداية إلى الهدف."""
+    # كل خوارزمية مولد يعطي (الخلية المستكشفة، الخلايا المضافة) بعد كل خطوة ويعيد المسار في النهاية.
+    def bfs_steps(self):
+        """تنفيذ BFS خطوة بخطوة للعثور على مسار من البداية إلى الهدف."""
         start = tuple(self.maze.player_pos)  # الحصول على موقع البداية للاعب.
         goal = self.maze.goal  # الحصول على موقع الهدف في المتاهة.
-        queue = [(start, [start])]  # تهيئة قائمة انتظار بموقع البداية والمسار.
-        visited = set()  # إنشاء مجموعة لتتبع العقد التي تم زيارتها.
+        if is_chunked_grid(self.maze.grid):  # المتاهات المقسمة أكبر من استكشافها خلية خلية.
+            return (yield from self.maze.a_star_steps(start, goal))  # البحث الهرمي المشترك في Maze.
+        queue = deque([start])  # تهيئة قائمة انتظار بموقع البداية.
+        came_from = {start: None}  # أب كل خلية مكتشفة (يغني عن نسخ المسار لكل خلية).
 
         while queue:  # الاستمرار حتى لا توجد عقد أخرى للاستكشاف.
-            (current, path) = queue.pop(0)  # إزالة العنصر الأول (FIFO).
+            current = queue.popleft()  # إزالة العنصر الأول (FIFO).
             if current == goal:  # التحقق مما إذا كانت العقدة الحالية هي الهدف.
-                return path  # إرجاع المسار إذا تم الوصول إلى الهدف.
-            visited.add(current)  # وضع علامة على العقدة الحالية كتمت زيارتها.
-
-            for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:  # استكشاف جميع الاتجاهات الممكنة.
-                next_pos = (current[0] + dx, current[1] + dy)  # حساب الموقع التالي.
-                if (0 <= next_pos[0] < len(self.maze.grid) and
-                    0 <= next_pos[1] < len(self.maze.grid[0]) and
-                    self.maze.grid[next_pos[0]][next_pos[1]] == 0 and
-                    next_pos not in visited):  # التحقق مما إذا كان الموقع التالي صالحًا ولم يتم زيارته.
-                    queue.append((next_pos, path + [next_pos]))  # إضافة الموقع التالي والمسار إلى قائمة الانتظار.
+                return PackedPath.from_parents(came_from, goal)  # إرجاع المسار المضغوط.
+
+            added = []
+            for next_pos in self.maze.move_table.neighbors(current):  # الجيران المفتوحة من جدول الحركات.
+                if next_pos not in came_from:  # التحقق من أن الموقع التالي لم يكتشف بعد.
+                    came_from[next_pos] = current  # تسجيل الأب لإعادة بناء المسار.
+                    queue.append(next_pos)  # إضافة الموقع التالي إلى قائمة الانتظار.
+                    added.append(next_pos)
+            yield current, added  # إعطاء التغييرات لعرضها قبل متابعة البحث.
         return []  # إرجاع مسار فارغ إذا لم يتم العثور على حل.
 
     # === خوارزمية البحث بالعمق (DFS) ===
     # هذه الخوارزمية تستخدم للبحث عن مسار في المتاهة من البداية إلى الهدف.
     # تعمل عن طريق استكشاف مسار واحد حتى النهاية قبل الرجوع واستكشاف مسارات أخرى.
-    def dfs_solve(self):
-        """تنفيذ DFS للعثور على مسار من البداية إلى الهدف."""
+    def dfs_steps(self):
+        """تنفيذ DFS خطوة بخطوة للعثور على مسار من البداية إلى الهدف."""
         start = tuple(self.maze.player_pos)  # الحصول على موقع البداية للاعب.
         goal = self.maze.goal  # الحصول على موقع الهدف في المتاهة.
-        stack = [(start, [start])]  # تهيئة مكدس بموقع البداية والمسار.
-        visited = set()  # إنشاء مجموعة لتتبع العقد التي تم زيارتها.
+        if is_chunked_grid(self.maze.grid):  # المتاهات المقسمة أكبر من استكشافها خلية خلية.
+            return (yield from self.maze.a_star_steps(start, goal))  # البحث الهرمي المشترك في Maze.
+        stack = [(start, None)]  # تهيئة مكدس بموقع البداية وأبيه.
+        came_from = {}  # أب كل خلية تمت زيارتها (يغني عن نسخ المسار لكل خلية).
 
         while stack:  # الاستمرار حتى لا توجد عقد أخرى للاستكشاف.
-            (current, path) = stack.pop()  # إزالة العنصر الأخير (LIFO).
+            (current, parent) = stack.pop()  # إزالة العنصر الأخير (LIFO).
+            if current in came_from:  # تمت زيارتها من فرع آخر.
+                continue
+            came_from[current] = parent  # وضع علامة على العقدة الحالية كتمت زيارتها.
             if current == goal:  # التحقق مما إذا كانت العقدة الحالية هي الهدف.
-                return path  # إرجاع المسار إذا تم الوصول إلى الهدف.
-            visited.add(current)  # وضع علامة على العقدة الحالية كتمت زيارتها.
-
-            for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:  # استكشاف جميع الاتجاهات الممكنة.
-                next_pos = (current[0] + dx, current[1] + dy)  # حساب الموقع التالي.
-                if (0 <= next_pos[0] < len(self.maze.grid) and
-                    0 <= next_pos[1] < len(self.maze.grid[0]) and
-                    self.maze.grid[next_pos[0]][next_pos[1]] == 0 and
-                    next_pos not in visited):  # التحقق مما إذا كان الموقع التالي صالحًا ولم يتم زيارته.
-                    stack.append((next_pos, path + [next_pos]))  # إضافة الموقع التالي والمسار إلى المكدس.
+                return PackedPath.from_parents(came_from, goal)  # إرجاع المسار المضغوط.
+
+            added = []
+            for next_pos in self.maze.move_table.neighbors(current):  # الجيران المفتوحة من جدول الحركات.
+                if next_pos not in came_from:  # التحقق من أن الموقع التالي لم تتم زيارته.
+                    stack.append((next_pos, current))  # إضافة الموقع التالي وأبيه إلى المكدس.
+                    added.append(next_pos)
+            yield current, added  # إعطاء التغييرات لعرضها قبل متابعة البحث.
         return []  # إرجاع مسار فارغ إذا لم يتم العثور على حل.
 
     # === خوارزمية البحث A* ===
     # هذه الخوارزمية تستخدم للبحث عن أقصر مسار في المتاهة من البداية إلى الهدف.
     # تعمل عن طريق استخدام دالة تكلفة لتحديد المسار الأمثل بناءً على المسافة المتبقية إلى الهدف.
-    def a_star_solve(self):
-        """تنفيذ A* للعثور على مسار من البداية إلى الهدف."""
+    def a_star_steps(self):
+        """تنفيذ A* خطوة بخطوة للعثور على مسار من البداية إلى الهدف."""
         start = tuple(self.maze.player_pos)  # الحصول على موقع البداية للاعب.
-        goal = self.maze.goal  # الحصول على موقع الهدف في المتاهة.
-        open_list = []  # تهيئة قائمة مفتوحة لتتبع العقد التي يجب استكشافها.
-        heapq.heappush(open_list, (0, start, [start]))  # إضافة العقدة البداية إلى القائمة المفتوحة مع المسار.
-        g_score = {start: 0}  # تهيئة دالة g لتتبع تكلفة المسار من البداية إلى العقدة الحالية.
-        visited = set()  # إنشاء مجموعة لتتبع العقد التي تم زيارتها.
-
-        while open_list:  # الاستمرار حتى لا توجد عقد أخرى للاستكشاف.
-            _, current, path = heapq.heappop(open_list)  # إزالة العقدة ذات التكلفة الأقل.
-            if current == goal:  # التحقق مما إذا كانت العقدة الحالية هي الهدف.
-                return path  # إرجاع المسار إذا تم الوصول إلى الهدف.
-            visited.add(current)  # وضع علامة على العقدة الحالية كتمت زيارتها.
-
-            for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:  # استكشاف جميع الاتجاهات الممكنة.
-                next_pos = (current[0] + dx, current[1] + dy)  # حساب الموقع التالي.
-                if (0 <= next_pos[0] < len(self.maze.grid) and
-                    0 <= next_pos[1] < len(self.maze.grid[0]) and
-                    self.maze.grid[next_pos[0]][next_pos[1]] == 0 and
-                    next_pos not in visited):  # التحقق مما إذا كان الموقع التالي صالحًا ولم يتم زيارته.
-                    tentative_g_score = g_score[current] + 1  # حساب تكلفة المسار المؤقتة.
-                    if next_pos not in g_score or tentative_g_score < g_score[next_pos]:  # التحقق من تحسين المسار.
-                        g_score[next_pos] = tentative_g_score  # تحديث تكلفة المسار.
-                        f_score = tentative_g_score + self.agent.manhattan_distance(next_pos, goal)  # حساب دالة f.
-                        heapq.heappush(open_list, (f_score, next_pos, path + [next_pos]))  # إضافة العقدة إلى القائمة المفتوحة.
-        return []  # إرجاع مسار فارغ إذا لم يتم العثور على حل.
+        # تكلفة كل خطوة هي تكلفة أرضية الخلية، والتقدير متسق مع أرخص أرضية في المتاهة.
+        return (yield from self.maze.a_star_steps(start, self.maze.goal))
 
 # === فئة الزر المتطور ===
 class ModernButton:
     """فئة لإنشاء أزرار متطورة"""
+    _fit_cache = {}  # تخزين مؤقت لأحجام الخطوط المناسبة: (النص، عربي، العرض، الحجم الأساسي) -> الحجم
     def __init__(self, x: int, y: int, width: int, height: int, text: str, font: pygame.font.Font, is_arabic: bool = True):
         self.rect = pygame.Rect(x, y, width, height)
         self.text = text
@@ -1096,26 +2163,39 @@ class ModernButton:
 
     def get_fitted_font(self) -> pygame.font.Font:
         """الحصول على حجم الخط المناسب للنص داخل الزر"""
-        current_size = self.font_size
-        test_font = TextRenderer.load_font(current_size)
-        
+        margin = 20  # هامش من جوانب الزر
+        max_width = self.rect.width - margin
+        key = (self.text, self.is_arabic, max_width, self.font_size)
+        size = ModernButton._fit_cache.get(key)
+        if size is None:
+            size = ModernButton.fit_font_size(self.text, self.is_arabic, max_width, self.font_size)
+            ModernButton._fit_cache[key] = size
+        return TextRenderer.load_font(size)
+
+    @staticmethod
+    def fit_font_size(text: str, is_arabic: bool, max_width: int, base_size: int) -> int:
+        """البحث الثنائي عن أكبر حجم خط يناسب العرض المتاح"""
         # معالجة النص العربي
-        display_text = self.text
-        if self.is_arabic:
+        display_text = text
+        if is_arabic:
             try:
-                display_text = get_display(arabic_reshaper.reshape(self.text))
+                display_text = TextRenderer.shape_arabic(text)
             except:
                 pass
-        
-        # تقليل حجم الخط حتى يناسب عرض الزر
-        margin = 20  # هامش من جوانب الزر
-        while test_font.size(display_text)[0] > self.rect.width - margin:
-            current_size -= 1
-            if current_size < 10:  # حد أدنى لحجم الخط
-                break
-            test_font = TextRenderer.load_font(current_size)
-        
-        return test_font
+
+        min_size = 10  # حد أدنى لحجم الخط
+        if TextRenderer.load_font(base_size).size(display_text)[0] <= max_width:
+            return base_size
+
+        # أكبر حجم مناسب يقع في المجال [min_size, base_size - 1]
+        low, high = min_size, base_size - 1
+        while low < high:
+            mid = (low + high + 1) // 2
+            if TextRenderer.load_font(mid).size(display_text)[0] <= max_width:
+                low = mid
+            else:
+                high = mid - 1
+        return low
 
     def update_text_surface(self):
         """تحديث سطح النص مع معالجة النص العربي"""
@@ -1128,6 +2208,13 @@ class ModernButton:
         )
         self.text_rect = self.text_surface.get_rect(center=self.rect.center)
 
+    def set_position(self, x: int, y: int):
+        """تحريك الزر دون إعادة إنشاء سطح التوهج أو سطح النص"""
+        if (x, y) == self.rect.topleft:
+            return
+        self.rect.topleft = (x, y)
+        self.text_rect.center = self.rect.center
+
     def set_text(self, text: str, is_arabic: bool = True):
         """تغيير نص الزر"""
         self.text = text
@@ -1160,6 +2247,10 @@ class ModernButton:
         # رسم النص
         screen.blit(self.text_surface, self.text_rect)
 
+    def is_animating(self) -> bool:
+        """هل ما زال توهج التحويم يتغير"""
+        return self.animation_progress < 1 if self.is_hovered else self.animation_progress > 0
+
     def handle_event(self, event: pygame.event.Event) -> bool:
         """معالجة أحداث الزر"""
         if event.type == pygame.MOUSEMOTION:
@@ -1169,6 +2260,22 @@ class ModernButton:
         return False
 
 # تشغيل اللعبة
+# الاستخدام: python maze_game.py [--verbose] [levels/level1.txt | seed:2001x2001:42 ...]
 if __name__ == "__main__":
-    game = ModernMazeGame()
+    parser = argparse.ArgumentParser(description="Smart maze game")
+    parser.add_argument("levels", nargs="*", help="level files or seed:ROWSxCOLS:SEED")
+    parser.add_argument("--verbose", action="store_true", help="print the startup time to the first frame")
+    args = parser.parse_args()
+    if args.levels:
+        from maze_chunks import load_level as load_level_spec
+        custom_levels = [load_level_spec(spec) for spec in args.levels]
+    else:
+        custom_levels = []
+    game = ModernMazeGame(custom_levels or None)
+    if args.verbose:
+        # الإطار الأول هنا ليمكن طباعة زمنه قبل دخول الحلقة
+        if not game.step(pygame.event.get()):
+            pygame.quit()
+            sys.exit()
+        print(f"Startup time to first frame: {game.startup_time * 1000:.1f} ms")
     game.run() 
\ No newline at end of file
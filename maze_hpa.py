@@ -0,0 +1,644 @@
+# === البحث الهرمي عن المسار (HPA*) للخرائط الكبيرة ===
+# تقسم الشبكة إلى عناقيد مربعة، وتحسب المداخل على حدود كل عنقودين متجاورين
+# والمسافات بين مداخل العنقود الواحد. يبحث A* أولاً في الرسم المجرد (المداخل
+# فقط) ثم يحول المسار المجرد إلى خلايا عند الطلب عنقوداً بعد عنقود.
+# المستوى الثاني (عند حساب العناقيد مسبقاً): تجمع العناقيد في مناطق، وكل
+# منطقة تقسم إلى مكونات متصلة داخلها. الاستعلام يبحث أولاً في رسم المكونات
+# (عشرات العقد لأبعد مسافة)، ثم يحسن المسار مكوناً بعد مكون عند الطلب ببحث
+# في مداخل المكون الحالي فقط.
+# عند تغير الجدران يعاد بناء العناقيد المتأثرة وحدودها ومناطقها فقط.
+# الاستخدام لقياس الأداء: python maze_hpa.py --size 1001
+import sys
+import time
+import heapq
+import random
+import argparse
+from collections import defaultdict, deque
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+Cell = Tuple[int, int]
+Cluster = Tuple[int, int]
+Area = Tuple[int, int, int]  # (صف المنطقة، عمود المنطقة، رقم المكون فيها)
+DIRECTIONS = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+REGION_CLUSTERS = 8  # طول ضلع المنطقة في المستوى الثاني بالعناقيد
+REGION_WEIGHT = 1.5  # وزن التقدير في بحث المكونات (توسيع أقل مقابل مسار أطول قليلاً)
+REFINE_WINDOW = 4  # عدد مكونات المسار التي يبحث فيها كل تحسين
+
+
+class HierarchicalPlanner:
+    """مخطط HPA* بمستويين: مداخل العناقيد، ومكونات المناطق (عند الحساب المسبق)"""
+    def __init__(self, grid, cluster_size: int = 16, max_entrance_width: int = 6, precompute: bool = True,
+                 region_clusters: int = REGION_CLUSTERS):
+        self.grid = grid
+        self.rows = len(grid)
+        self.cols = len(grid[0])
+        self.size = cluster_size
+        self.max_entrance_width = max_entrance_width  # المداخل الأعرض تمثل بعقدتين عند طرفيها
+        self.cluster_rows = (self.rows + cluster_size - 1) // cluster_size
+        self.cluster_cols = (self.cols + cluster_size - 1) // cluster_size
+        self.borders = {}  # (عنقود، عنقود) -> [(خلية، خلية)] أزواج المداخل
+        self.cluster_nodes = {}  # عنقود -> عقد المداخل فيه
+        self.graph = {}  # عقدة -> {عقدة مجاورة: تكلفة} (داخل العنقود وعبر الحدود)
+        self.region_clusters = region_clusters
+        self.area_of = {}  # عقدة -> مكون منطقتها
+        self.region_areas = {}  # منطقة -> مكوناتها
+        self.area_links = {}  # مكون -> {مكون مجاور: [(عقدة منه، عقدة في المجاور)]}
+        self.area_portals = {}  # مكون -> [(مكون مجاور، [(عقدة منه، عقدة فيه)] ممثل لكل حد عنقودين)]
+        self.expanded = 0  # عدد العقد المجردة الموسعة في آخر استعلام
+        if precompute:
+            self.build_all()
+
+    # --- العناقيد ---
+    def cluster_of(self, cell: Cell) -> Cluster:
+        """العنقود الذي يحتوي الخلية"""
+        return cell[0] // self.size, cell[1] // self.size
+
+    def bounds(self, k: Cluster) -> Tuple[int, int, int, int]:
+        """حدود العنقود: (أول صف، آخر صف + 1، أول عمود، آخر عمود + 1)"""
+        r0, c0 = k[0] * self.size, k[1] * self.size
+        return r0, min(r0 + self.size, self.rows), c0, min(c0 + self.size, self.cols)
+
+    def neighbor_clusters(self, k: Cluster) -> Iterator[Cluster]:
+        """العناقيد المجاورة"""
+        for dr, dc in DIRECTIONS:
+            kr, kc = k[0] + dr, k[1] + dc
+            if 0 <= kr < self.cluster_rows and 0 <= kc < self.cluster_cols:
+                yield kr, kc
+
+    def is_open(self, r: int, c: int) -> bool:
+        """هل الخلية ممر (أي أرضية عدا الجدار، دون اعتبار تكلفتها)"""
+        return self.grid[r][c] != 1
+
+    # --- المداخل ---
+    def border_entrances(self, ka: Cluster, kb: Cluster) -> List[Tuple[Cell, Cell]]:
+        """أزواج المداخل على الحد المشترك بين عنقودين (ka قبل kb)"""
+        key = (ka, kb)
+        pairs = self.borders.get(key)
+        if pairs is not None:
+            return pairs
+        r0, r1, c0, c1 = self.bounds(ka)
+        if kb[1] == ka[1] + 1:
+            # حد عمودي: العمود الأخير في ka والأول في kb
+            cells = [((r, c1 - 1), (r, c1)) for r in range(r0, r1)]
+        else:
+            # حد أفقي: الصف الأخير في ka والأول في kb
+            cells = [((r1 - 1, c), (r1, c)) for c in range(c0, c1)]
+
+        pairs = []
+        run = []
+        for pair in cells + [None]:
+            if pair is not None and self.is_open(*pair[0]) and self.is_open(*pair[1]):
+                run.append(pair)
+                continue
+            if run:
+                if len(run) >= self.max_entrance_width:
+                    pairs.extend((run[0], run[-1]))
+                else:
+                    pairs.append(run[len(run) // 2])
+                run = []
+        self.borders[key] = pairs
+        return pairs
+
+    def bfs_in_cluster(self, source: Cell, k: Cluster, target: Cell = None) -> Tuple[Dict[Cell, int], Dict[Cell, Cell]]:
+        """بحث BFS محصور داخل العنقود (يتوقف عند الهدف إن وجد)"""
+        r0, r1, c0, c1 = self.bounds(k)
+        dist = {source: 0}
+        parent = {}
+        queue = deque([source])
+        while queue:
+            cell = queue.popleft()
+            if cell == target:
+                break
+            d = dist[cell] + 1
+            for dr, dc in DIRECTIONS:
+                r, c = cell[0] + dr, cell[1] + dc
+                nxt = (r, c)
+                if r0 <= r < r1 and c0 <= c < c1 and nxt not in dist and self.is_open(r, c):
+                    dist[nxt] = d
+                    parent[nxt] = cell
+                    queue.append(nxt)
+        return dist, parent
+
+    def cluster_distances(self, k: Cluster, sources: List[Cell]) -> List[List[int]]:
+        """مسافات BFS داخل العنقود من كل مصدر (مصفوفات مسطحة، -1 لغير المتصل)"""
+        r0, r1, c0, c1 = self.bounds(k)
+        w = c1 - c0
+        n = (r1 - r0) * w
+        open_cells = [self.is_open(r, c) for r in range(r0, r1) for c in range(c0, c1)]
+        result = []
+        for r, c in sources:
+            dist = [-1] * n
+            src = (r - r0) * w + (c - c0)
+            dist[src] = 0
+            queue = [src]
+            for i in queue:
+                d = dist[i] + 1
+                col = i % w
+                for j in (i - w, i + w, i - 1 if col else -1, i + 1 if col < w - 1 else -1):
+                    if 0 <= j < n and dist[j] < 0 and open_cells[j]:
+                        dist[j] = d
+                        queue.append(j)
+            result.append(dist)
+        return result
+
+    def attach(self, cell: Cell, nodes: Iterable[Cell]) -> Dict[Cell, int]:
+        """مسافات الخلية داخل عنقودها إلى العقد المعطاة من العنقود نفسه (غير المتصلة تحذف)"""
+        k = self.cluster_of(cell)
+        r0, _, c0, c1 = self.bounds(k)
+        w = c1 - c0
+        dist = self.cluster_distances(k, [cell])[0]
+        edges = {}
+        for node in nodes:
+            d = dist[(node[0] - r0) * w + (node[1] - c0)]
+            if d >= 0:
+                edges[node] = d
+        return edges
+
+    def ensure_cluster(self, k: Cluster) -> set:
+        """بناء عقد العنقود وحوافها عند أول حاجة"""
+        nodes = self.cluster_nodes.get(k)
+        if nodes is not None:
+            return nodes
+        links = defaultdict(set)  # حواف عبر الحدود لكل عقدة
+        for kn in self.neighbor_clusters(k):
+            for a, b in self.border_entrances(min(k, kn), max(k, kn)):
+                own, other = (a, b) if self.cluster_of(a) == k else (b, a)
+                links[own].add(other)
+        nodes = list(links)
+        r0, _, c0, c1 = self.bounds(k)
+        w = c1 - c0
+        index = [(r - r0) * w + (c - c0) for r, c in nodes]
+        for node, dist in zip(nodes, self.cluster_distances(k, nodes)):
+            edges = {other: dist[i] for other, i in zip(nodes, index) if other != node and dist[i] > 0}
+            for other in links[node]:
+                edges[other] = 1
+                # الحافة العكسية للعنقود المجاور إذا كان مبنياً
+                if other in self.graph:
+                    self.graph[other][node] = 1
+            self.graph[node] = edges
+        self.cluster_nodes[k] = set(nodes)
+        return self.cluster_nodes[k]
+
+    def build_all(self):
+        """حساب جميع العناقيد مسبقاً ثم مكونات المناطق"""
+        for kr in range(self.cluster_rows):
+            for kc in range(self.cluster_cols):
+                self.ensure_cluster((kr, kc))
+        n = self.region_clusters
+        for rr in range((self.cluster_rows + n - 1) // n):
+            for rc in range((self.cluster_cols + n - 1) // n):
+                self.build_region((rr, rc))
+
+    # --- المستوى الثاني ---
+    def region_of(self, k: Cluster) -> Tuple[int, int]:
+        """المنطقة التي تحتوي العنقود"""
+        return k[0] // self.region_clusters, k[1] // self.region_clusters
+
+    def build_region(self, region: Tuple[int, int]):
+        """تقسيم مداخل المنطقة إلى مكونات متصلة داخلها وربطها بمكونات المناطق المجاورة"""
+        touched = set()  # مكونات مجاورة تغيرت روابطها
+        for area in self.region_areas.pop(region, ()):
+            self.area_portals.pop(area, None)
+            for other in self.area_links.pop(area, {}):
+                links = self.area_links.get(other)
+                if links is not None:
+                    links.pop(area, None)
+                    touched.add(other)
+        n = self.region_clusters
+        nodes = [node
+                 for kr in range(region[0] * n, min((region[0] + 1) * n, self.cluster_rows))
+                 for kc in range(region[1] * n, min((region[1] + 1) * n, self.cluster_cols))
+                 for node in self.cluster_nodes[(kr, kc)]]
+        members = set(nodes)
+        for node in nodes:
+            self.area_of.pop(node, None)
+
+        areas = []
+        for node in nodes:
+            if node in self.area_of:
+                continue
+            area = (region[0], region[1], len(areas))
+            areas.append(area)
+            self.area_links[area] = {}
+            self.area_of[node] = area
+            stack = [node]
+            while stack:
+                for nxt in self.graph[stack.pop()]:
+                    if nxt in members and nxt not in self.area_of:
+                        self.area_of[nxt] = area
+                        stack.append(nxt)
+        self.region_areas[region] = areas
+
+        # الحواف إلى مناطق مبنية: تضاف في الاتجاهين (وتضيفها المنطقة الأخرى عند بنائها لاحقاً)
+        for node in sorted(nodes):
+            area = self.area_of[node]
+            for nxt in self.graph[node]:
+                other = self.area_of.get(nxt)
+                if nxt not in members and other is not None:
+                    self.area_links[area].setdefault(other, []).append((node, nxt))
+                    self.area_links[other].setdefault(area, []).append((nxt, node))
+                    touched.add(other)
+        for area in touched.union(areas):
+            self.build_portals(area)
+
+    def build_portals(self, area: Area):
+        """مخارج المكون في بحث المستوى الثاني: زوج ممثل لكل حد عنقودين مع كل مكون مجاور"""
+        portals = []
+        for other, pairs in self.area_links[area].items():
+            groups = defaultdict(list)
+            for x, y in pairs:
+                groups[(self.cluster_of(x), self.cluster_of(y))].append((x, y))
+            portals.append((other, [group[len(group) // 2] for group in groups.values()]))
+        self.area_portals[area] = portals
+
+    def area_at(self, cell: Cell) -> Optional[Area]:
+        """مكون الخلية: مكون أقرب مدخل تصل إليه في عنقودها (None لجيب مغلق)"""
+        k = self.cluster_of(cell)
+        nodes = self.cluster_nodes[k]
+        r0, r1, c0, c1 = self.bounds(k)
+        seen = {cell}
+        queue = [cell]
+        for current in queue:
+            if current in nodes:
+                return self.area_of[current]
+            for dr, dc in DIRECTIONS:
+                r, c = current[0] + dr, current[1] + dc
+                if r0 <= r < r1 and c0 <= c < c1 and (r, c) not in seen and self.is_open(r, c):
+                    seen.add((r, c))
+                    queue.append((r, c))
+        return None
+
+    # --- التحديث التزايدي ---
+    def update_cells(self, cells: Iterable[Cell]):
+        """إعادة بناء العناقيد التي تغيرت جدرانها وحدودها فقط"""
+        affected = set()
+        for r, c in cells:
+            k = self.cluster_of((r, c))
+            affected.add(k)
+            r0, r1, c0, c1 = self.bounds(k)
+            # خلية على طرف العنقود تغير مداخل العنقود المجاور أيضاً
+            if r == r0 and k[0] > 0:
+                affected.add((k[0] - 1, k[1]))
+            if r == r1 - 1 and k[0] < self.cluster_rows - 1:
+                affected.add((k[0] + 1, k[1]))
+            if c == c0 and k[1] > 0:
+                affected.add((k[0], k[1] - 1))
+            if c == c1 - 1 and k[1] < self.cluster_cols - 1:
+                affected.add((k[0], k[1] + 1))
+
+        stale = set(affected)
+        for k in affected:
+            for kn in self.neighbor_clusters(k):
+                self.borders.pop((min(k, kn), max(k, kn)), None)
+                stale.add(kn)
+
+        # حذف عقد العناقيد القديمة وجميع الحواف المتجهة إليها
+        removed = set()
+        for k in stale:
+            removed |= self.cluster_nodes.pop(k, set())
+        for node in removed:
+            for other in self.graph.pop(node, {}):
+                edges = self.graph.get(other)
+                if edges is not None:
+                    edges.pop(node, None)
+        for node in removed:
+            self.area_of.pop(node, None)
+        for k in stale:
+            self.ensure_cluster(k)
+        if self.region_areas:
+            for region in {self.region_of(k) for k in stale}:
+                self.build_region(region)
+
+    # --- الاستعلام ---
+    @staticmethod
+    def heuristic(a: Cell, b: Cell) -> int:
+        """مسافة مانهاتن"""
+        return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+    def abstract_path(self, start: Cell, goal: Cell) -> Optional[List[Cell]]:
+        """البحث في رسم المداخل بعد إدراج البداية والهدف مؤقتاً"""
+        steps = self.abstract_steps(start, goal)
+        while True:
+            try:
+                next(steps)
+            except StopIteration as done:
+                return done.value
+
+    def abstract_steps(self, start: Cell, goal: Cell):
+        """abstract_path خطوة بخطوة: يعطي (العقدة الموسعة، []) ويعيد المسار المجرد
+
+        يسمح بتوزيع البحث (وبناء العناقيد الكسول) على عدة إطارات.
+        """
+        if not (self.is_open(*start) and self.is_open(*goal)):
+            return None
+        if start == goal:
+            return [start]
+        ks, kg = self.cluster_of(start), self.cluster_of(goal)
+        start_edges = self.attach(start, self.ensure_cluster(ks))
+        if ks == kg:
+            start_edges.update(self.attach(start, [goal]))
+        goal_edges = self.attach(goal, self.ensure_cluster(kg))
+
+        g_score = {start: 0}
+        parent = {start: None}
+        open_list = [(self.heuristic(start, goal), 0, start)]
+        self.expanded = 0
+        while open_list:
+            _, g, current = heapq.heappop(open_list)
+            if g > g_score[current]:
+                continue
+            if current == goal:
+                path = []
+                while current is not None:
+                    path.append(current)
+                    current = parent[current]
+                path.reverse()
+                return path
+            self.expanded += 1
+            yield current, []
+
+            # البداية قد تكون نفسها عقدة مدخل، لذلك نضيف حوافها المؤقتة إلى حوافها العادية
+            edges = self.graph.get(current)
+            if edges is None and current != start:
+                self.ensure_cluster(self.cluster_of(current))
+                edges = self.graph.get(current)
+            edges = list(edges.items()) if edges else []
+            if current == start:
+                edges.extend(start_edges.items())
+            if current in goal_edges:
+                edges.append((goal, goal_edges[current]))
+            for nxt, cost in edges:
+                tentative = g + cost
+                if tentative < g_score.get(nxt, tentative + 1):
+                    g_score[nxt] = tentative
+                    parent[nxt] = current
+                    heapq.heappush(open_list, (tentative + self.heuristic(nxt, goal), tentative, nxt))
+        return None
+
+    def region_path(self, start: Cell, goal: Cell) -> Optional[List[Tuple[Area, Cell]]]:
+        """بحث المستوى الثاني: المكونات من البداية إلى الهدف مع خلية الدخول إلى كل منها
+
+        تكلفة عبور المكون تقدر بمسافة مانهاتن بين خلية دخوله وخلية خروجه
+        الممثلة، والتقدير موزون بـ REGION_WEIGHT.
+        """
+        start_area, goal_area = self.area_at(start), self.area_at(goal)
+        if start_area is None or goal_area is None:
+            return None
+        heuristic = self.heuristic
+        gr, gc = goal
+        first = (start_area, start)
+        g_score = {first: 0}
+        parent = {first: None}
+        closed = set()
+        open_list = [(REGION_WEIGHT * heuristic(start, goal), 0, start, start_area)]
+        self.expanded = 0
+        while open_list:
+            _, g, cell, area = heapq.heappop(open_list)
+            state = (area, cell)
+            if area == ():
+                # الحالة النهائية: الهدف نفسه
+                corridor = []
+                state = parent[state]
+                while state is not None:
+                    corridor.append(state)
+                    state = parent[state]
+                corridor.reverse()
+                return corridor
+            if state in closed or g > g_score[state]:
+                continue
+            closed.add(state)
+            self.expanded += 1
+            if area == goal_area:
+                tentative = g + heuristic(cell, goal)
+                final = ((), goal)
+                if tentative < g_score.get(final, tentative + 1):
+                    g_score[final] = tentative
+                    parent[final] = state
+                    heapq.heappush(open_list, (tentative, tentative, goal, ()))
+            r, c = cell
+            for other, pairs in self.area_portals[area]:
+                # أفضل مخرج إلى المكون المجاور حسب التكلفة المقدرة حتى الهدف (مانهاتن مضمنة لأنها الحلقة الساخنة)
+                best_f = None
+                for (xr, xc), entry in pairs:
+                    cost = abs(r - xr) + abs(c - xc) + 1
+                    f = cost + REGION_WEIGHT * (abs(entry[0] - gr) + abs(entry[1] - gc))
+                    if best_f is None or f < best_f:
+                        best_f, best_cost, best_entry = f, cost, entry
+                tentative = g + best_cost
+                key = (other, best_entry)
+                if tentative < g_score.get(key, tentative + 1):
+                    g_score[key] = tentative
+                    parent[key] = state
+                    heapq.heappush(open_list, (g + best_f, tentative, best_entry, other))
+        return None
+
+    def search_areas(self, areas: Tuple[Area, ...], sources: Dict[Cell, int],
+                     exits: Dict[Cell, List[Tuple[Cell, int]]], aim: Cell) -> Optional[List[Cell]]:
+        """A* في مداخل المكونات المعطاة فقط من المصادر حتى أول خروج (عقد المسار حتى ما بعد الخروج)
+
+        exits: عقدة -> [(الخلية التالية خارج المكونات أو الهدف، التكلفة)]. aim
+        الخلية التي يوجه إليها التقدير بعد الخروج، فيختار الخروج الأقرب إليها.
+        """
+        heuristic = self.heuristic
+        area_of = self.area_of
+        g_score = dict(sources)
+        parent = dict.fromkeys(sources)
+        open_list = [(g + heuristic(node, aim), g, node, False) for node, g in sources.items()]
+        heapq.heapify(open_list)
+        while open_list:
+            _, g, current, final = heapq.heappop(open_list)
+            if final:
+                path = [current]
+                node = parent[(current, True)]
+                while node is not None:
+                    path.append(node)
+                    node = parent[node]
+                path.reverse()
+                return path
+            if g > g_score[current]:
+                continue
+            self.expanded += 1
+            for target, cost in exits.get(current, ()):
+                tentative = g + cost
+                key = (target, True)
+                if tentative < g_score.get(key, tentative + 1):
+                    g_score[key] = tentative
+                    parent[key] = current
+                    heapq.heappush(open_list, (tentative + heuristic(target, aim), tentative, target, True))
+            for nxt, cost in self.graph[current].items():
+                if area_of.get(nxt) not in areas:
+                    continue
+                tentative = g + cost
+                if tentative < g_score.get(nxt, tentative + 1):
+                    g_score[nxt] = tentative
+                    parent[nxt] = current
+                    heapq.heappush(open_list, (tentative + heuristic(nxt, aim), tentative, nxt, False))
+        return None
+
+    def refine_corridor(self, start: Cell, goal: Cell, corridor: List[Tuple[Area, Cell]]) -> Iterator[Cell]:
+        """تحويل مسار المكونات إلى خلايا مكوناً بعد مكون (عند الطلب)
+
+        كل خطوة تبحث في نافذة من المكونات التالية حتى الخروج منها، ثم تعتمد
+        المسار حتى أول مكون بعد الحالي فقط وتكمل من أبعد موضع وصله في
+        النافذة، فيمكنها تجاوز مكونات لا يحتاجها المسار.
+        """
+        ks, kg = self.cluster_of(start), self.cluster_of(goal)
+        position = start
+        sources = {start: 0} if start in self.graph else self.attach(start, self.cluster_nodes[ks])
+        yield start
+        i = 0
+        while True:
+            end = min(i + REFINE_WINDOW, len(corridor))
+            order = {area: j for j, (area, _) in enumerate(corridor[i:end], i)}  # آخر موضع لكل مكون
+            last = end == len(corridor)
+            if last:
+                exits = {node: [(goal, d)] for node, d in self.attach(goal, self.cluster_nodes[kg]).items()}
+                aim = goal
+            else:
+                exits = defaultdict(list)
+                target = corridor[end][0]
+                for area in order:
+                    for node, entry in self.area_links[area].get(target, ()):
+                        exits[node].append((entry, 1))
+                aim = corridor[end + 1][1] if end + 1 < len(corridor) else goal
+            nodes = self.search_areas(tuple(order), sources, exits, aim)
+            if nodes is None:
+                return
+            if not last:
+                # الاعتماد حتى أول عقدة في مكون لاحق فقط، والمتابعة من موضعه
+                for cut, node in enumerate(nodes):
+                    step = order.get(self.area_of.get(node), end)
+                    if step > i:
+                        break
+                del nodes[cut + 1:]
+                i = step
+            if nodes[0] != position:
+                nodes.insert(0, position)
+            refined = self.refine(nodes)
+            next(refined)
+            yield from refined
+            if last:
+                return
+            position = nodes[-1]
+            sources = {position: 0}
+
+    def refine(self, abstract: List[Cell]) -> Iterator[Cell]:
+        """تحويل المسار المجرد إلى خلايا مقطعاً بعد مقطع (عند الطلب)"""
+        yield abstract[0]
+        for a, b in zip(abstract, abstract[1:]):
+            k = self.cluster_of(a)
+            if self.cluster_of(b) != k:
+                yield b  # انتقال عبر مدخل بين عنقودين متجاورين
+                continue
+            _, parent = self.bfs_in_cluster(a, k, b)
+            segment = []
+            cell = b
+            while cell != a:
+                segment.append(cell)
+                cell = parent[cell]
+            yield from reversed(segment)
+
+    def iter_path(self, start, goal) -> Iterator[Cell]:
+        """مولد خلايا المسار (فارغ إذا لم يوجد مسار)
+
+        مع المستوى الثاني يبحث في المكونات فقط عند الطلب الأول، ويبحث في مداخل
+        كل مكون حين يصل المستهلك إليه. المسار داخل العنقود نفسه يقارن بالمباشر.
+        """
+        start, goal = tuple(start), tuple(goal)
+        if not self.region_areas or self.cluster_of(start) == self.cluster_of(goal) or start == goal:
+            abstract = self.abstract_path(start, goal)
+            if abstract:
+                yield from self.refine(abstract)
+            return
+        if not (self.is_open(*start) and self.is_open(*goal)):
+            return
+        corridor = self.region_path(start, goal)
+        if corridor:
+            yield from self.refine_corridor(start, goal, corridor)
+
+    def path_steps(self, start, goal):
+        """iter_path خطوة بخطوة للعرض المتدرج: يعطي (الخلية، []) ويعيد المسار الكامل"""
+        start, goal = tuple(start), tuple(goal)
+        if self.region_areas and self.cluster_of(start) != self.cluster_of(goal):
+            cells = self.iter_path(start, goal)  # التحسين الكسول يتوزع على الخطوات
+        else:
+            abstract = yield from self.abstract_steps(start, goal)
+            cells = self.refine(abstract) if abstract else ()
+        path = []
+        for cell in cells:
+            path.append(cell)
+            yield cell, []
+        return path
+
+    def find_path(self, start, goal) -> List[Cell]:
+        """المسار الكامل من البداية إلى الهدف متضمناً البداية"""
+        return list(self.iter_path(start, goal))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HPA* build and query benchmark")
+    parser.add_argument("--size", type=int, default=1001)
+    parser.add_argument("--cluster", type=int, default=16)
+    parser.add_argument("--open", type=float, default=0.1, help="fraction of inner walls removed to add loops")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    from maze_chunks import SeededMazeSource
+    source = SeededMazeSource(args.seed, args.size, args.size)
+    grid = [[source.cell(r, c) for c in range(source.cols)] for r in range(source.rows)]
+    rng = random.Random(args.seed)
+    for r in range(1, source.rows - 1):
+        for c in range(1, source.cols - 1):
+            if (r + c) % 2 and rng.random() < args.open:
+                grid[r][c] = 0
+
+    start = time.perf_counter()
+    planner = HierarchicalPlanner(grid, args.cluster)
+    print(f"build: {time.perf_counter() - start:.2f} s, "
+          f"{len(planner.cluster_nodes)} clusters, {len(planner.graph)} nodes")
+
+    rooms = [(r, c) for r in range(1, source.rows, 2) for c in range(1, source.cols, 2)]
+    median = args.queries // 2
+
+    def report(name, times):
+        times.sort()
+        print(f"{name}: p50={times[median] * 1000:.2f} ms max={times[-1] * 1000:.2f} ms")
+
+    query_times, first_times, full_times, flat_times, ratios = [], [], [], [], []
+    for _ in range(args.queries):
+        a, b = rng.choice(rooms), rng.choice(rooms)
+        t = time.perf_counter()
+        corridor = planner.region_path(a, b)
+        query_times.append(time.perf_counter() - t)
+        t = time.perf_counter()
+        path = planner.iter_path(a, b)
+        next(path, None)
+        next(path, None)  # أول خلية بعد البداية: بحث المكون الأول
+        first_times.append(time.perf_counter() - t)
+        t = time.perf_counter()
+        length = len(planner.find_path(a, b)) if corridor else 0
+        full_times.append(time.perf_counter() - t)
+        # المقارنة بمستوى واحد: البحث في كل المداخل ثم التحويل إلى خلايا
+        t = time.perf_counter()
+        abstract = planner.abstract_path(a, b)
+        flat_times.append(time.perf_counter() - t)
+        if abstract and length:
+            ratios.append(length / len(list(planner.refine(abstract))))
+    report("query (two levels)", query_times)
+    report("first refined segment", first_times)
+    report("full lazy refinement", full_times)
+    report("query (entrances only)", flat_times)
+    if ratios:
+        print(f"path length vs entrances only: mean={sum(ratios) / len(ratios):.3f} max={max(ratios):.3f}")
+
+    # تعديل جدار واحد وإعادة بناء العناقيد المتأثرة فقط
+    cell = rooms[len(rooms) // 2]
+    grid[cell[0]][cell[1]] = 1
+    t = time.perf_counter()
+    planner.update_cells([cell])
+    print(f"single wall update: {(time.perf_counter() - t) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,352 @@
+# === تخطيط تعاوني لعدة وكلاء (Windowed Hierarchical Cooperative A*) ===
+# يخطط كل وكيل مساره في الزمان والمكان مع احترام جدول حجوزات مشترك،
+# فلا يشغل وكيلان نفس الخلية في نفس اللحظة ولا يتبادلان موقعيهما.
+# يعاد التخطيط لكل وكيل ضمن نافذة زمنية محدودة وبالتناوب بين الوكلاء
+# ضمن ميزانية زمنية لكل إطار، لذلك يبقى عشرات الوكلاء ضمن زمن الإطار.
+# الاستخدام لقياس الأداء: python maze_multi_agent.py --agents 40
+# (يفشل إذا اصطدم وكيلان أو تجاوز زمن التخطيط في إطار الميزانية)
+import sys
+import time
+import heapq
+import random
+import argparse
+from collections import OrderedDict, deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+Cell = Tuple[int, int]
+MOVES = [(0, 1), (1, 0), (0, -1), (-1, 0), (0, 0)]  # الحركات الأربع والانتظار
+DEADLINE_CHECK_EVERY = 16  # عدد التوسعات بين قراءتين للساعة أثناء البحث
+DEADLINE_SLACK = 0.0002  # ثوانٍ تحجز من الميزانية لإعادة الحجز بعد قطع البحث
+
+
+# === جدول الحجوزات ===
+class ReservationTable:
+    """جدول حجوزات مشترك في الزمان والمكان"""
+    def __init__(self):
+        self.cells = {}  # الخلية -> {الزمن: الوكيل}
+        self.edges = {}  # (من، إلى، الزمن) -> الوكيل
+        self.holds = {}  # الخلية -> (زمن البداية، الوكيل): بقاء الوكيل بعد نهاية مساره
+        self.owned = {}  # الوكيل -> (مفاتيح الخلايا، مفاتيح الحواف، خلية البقاء)
+
+    def reserve_path(self, agent: int, path: List[Cell], t0: int):
+        """حجز مسار يبدأ في الزمن t0، مع بقاء الوكيل في آخر خلية"""
+        self.release(agent)
+        cell_keys, edge_keys = [], []
+        for i, cell in enumerate(path):
+            self.cells.setdefault(cell, {})[t0 + i] = agent
+            cell_keys.append((cell, t0 + i))
+            if i:
+                key = (path[i - 1], cell, t0 + i - 1)
+                self.edges[key] = agent
+                edge_keys.append(key)
+        self.holds[path[-1]] = (t0 + len(path) - 1, agent)
+        self.owned[agent] = (cell_keys, edge_keys, path[-1])
+
+    def release(self, agent: int):
+        """إلغاء جميع حجوزات الوكيل"""
+        owned = self.owned.pop(agent, None)
+        if owned is None:
+            return
+        cell_keys, edge_keys, hold = owned
+        for cell, t in cell_keys:
+            times = self.cells.get(cell)
+            if times is not None and times.get(t) == agent:
+                del times[t]
+                if not times:
+                    del self.cells[cell]
+        for key in edge_keys:
+            if self.edges.get(key) == agent:
+                del self.edges[key]
+        if self.holds.get(hold, (0, None))[1] == agent:
+            del self.holds[hold]
+
+    def is_free(self, cell: Cell, t: int, agent: int) -> bool:
+        """هل الخلية متاحة للوكيل في الزمن t"""
+        owner = self.cells.get(cell, {}).get(t)
+        if owner is not None and owner != agent:
+            return False
+        hold = self.holds.get(cell)
+        return hold is None or hold[1] == agent or hold[0] > t
+
+    def can_move(self, a: Cell, b: Cell, t: int, agent: int) -> bool:
+        """هل يمكن الانتقال من a إلى b بين الزمنين t و t + 1 (دون تبادل مواقع)"""
+        if not self.is_free(b, t + 1, agent):
+            return False
+        owner = self.edges.get((b, a, t))
+        return owner is None or owner == agent
+
+    def can_hold(self, cell: Cell, t: int, agent: int) -> bool:
+        """هل يمكن للوكيل البقاء في الخلية بعد الزمن t دون تعارض"""
+        return all(owner == agent or when <= t for when, owner in self.cells.get(cell, {}).items())
+
+    def prune(self, before: int):
+        """حذف الحجوزات التي مضى زمنها"""
+        for cell in list(self.cells):
+            times = self.cells[cell]
+            for t in [t for t in times if t < before]:
+                del times[t]
+            if not times:
+                del self.cells[cell]
+        for key in [key for key in self.edges if key[2] < before]:
+            del self.edges[key]
+        for agent, (cell_keys, edge_keys, hold) in self.owned.items():
+            self.owned[agent] = (
+                [key for key in cell_keys if key[1] >= before],
+                [key for key in edge_keys if key[2] >= before],
+                hold
+            )
+
+
+# === الوكيل ===
+class SwarmAgent:
+    """وكيل مستقل ضمن مجموعة الوكلاء"""
+    def __init__(self, agent_id: int, pos: Cell, goal: Cell):
+        self.id = agent_id
+        self.pos = pos
+        self.goal = goal
+        self.path = [pos]  # المسار المحجوز بدءاً من الزمن path_t0
+        self.path_t0 = 0
+        self.reached = 0  # عدد الأهداف التي وصل إليها
+
+    def position_at(self, t: int) -> Cell:
+        """موقع الوكيل حسب مساره في الزمن t"""
+        i = t - self.path_t0
+        if i <= 0:
+            return self.path[0]
+        return self.path[min(i, len(self.path) - 1)]
+
+    def remaining(self, now: int) -> int:
+        """عدد الخطوات المتبقية في المسار المحجوز"""
+        return self.path_t0 + len(self.path) - 1 - now
+
+
+# === المخطط التعاوني ===
+class CooperativePlanner:
+    """مخطط WHCA* لعدة وكلاء مع توزيع إعادة التخطيط على الإطارات"""
+    def __init__(self, grid, window: int = 16, budget_ms: float = 2.0,
+                 goal_picker: Optional[Callable[[SwarmAgent], Cell]] = None,
+                 max_expansions: int = 1500):
+        self.grid = grid
+        self.rows = len(grid)
+        self.cols = len(grid[0])
+        self.window = window
+        self.max_expansions = max_expansions  # حد أعلى لتكلفة بحث وكيل واحد
+        self.budget = budget_ms / 1000
+        self.goal_picker = goal_picker
+        self.table = ReservationTable()
+        self.agents: List[SwarmAgent] = []
+        self.now = 0
+        self.dirty = set()  # وكلاء تغير هدفهم ويحتاجون تخطيطاً فورياً
+        self._fields = OrderedDict()  # تخزين مؤقت لحقول المسافة حسب الهدف
+        self._partial_fields = {}  # الهدف -> (الحقل، طابور BFS) لحقول قطعها انتهاء الوقت
+        self.max_fields = 64
+        self.plans = 0
+        self.last_update_ms = 0.0
+
+    def is_open(self, cell: Cell) -> bool:
+        """هل الخلية ممر"""
+        r, c = cell
+        return 0 <= r < self.rows and 0 <= c < self.cols and self.grid[r][c] != 1
+
+    def distance_field(self, goal: Cell, deadline: float = None) -> Optional[Dict[Cell, int]]:
+        """المسافة الحقيقية إلى الهدف متجاهلين الوكلاء (الاستدلال المتسق لـ HCA*)
+
+        إذا تجاوز البناء deadline يحفظ ما وصل إليه ويعيد None، ويكمل من حيث
+        توقف في الاستدعاء التالي.
+        """
+        field = self._fields.get(goal)
+        if field is not None:
+            self._fields.move_to_end(goal)
+            return field
+        field, queue = self._partial_fields.pop(goal, None) or ({goal: 0}, deque([goal]))
+        visited = 0
+        while queue:
+            visited += 1
+            if (deadline is not None and visited % DEADLINE_CHECK_EVERY == 0 and
+                    time.perf_counter() >= deadline):
+                self._partial_fields[goal] = (field, queue)
+                return None
+            cell = queue.popleft()
+            d = field[cell] + 1
+            for dr, dc in MOVES[:4]:
+                nxt = (cell[0] + dr, cell[1] + dc)
+                if nxt not in field and self.is_open(nxt):
+                    field[nxt] = d
+                    queue.append(nxt)
+        self._fields[goal] = field
+        if len(self._fields) > self.max_fields:
+            self._fields.popitem(last=False)
+        return field
+
+    def add_agent(self, pos: Cell, goal: Cell) -> SwarmAgent:
+        """إضافة وكيل وحجز موقعه الحالي"""
+        agent = SwarmAgent(len(self.agents), pos, goal)
+        agent.path_t0 = self.now
+        self.agents.append(agent)
+        self.table.reserve_path(agent.id, agent.path, self.now)
+        self.dirty.add(agent.id)
+        return agent
+
+    def search(self, agent: SwarmAgent, deadline: float = None) -> Optional[List[Cell]]:
+        """بحث A* في الزمان والمكان ضمن النافذة الزمنية
+
+        يتوقف ويعيد None عند تجاوز deadline (زمن perf_counter) دون انتظار حد
+        التوسعات، فلا يتعدى إطار واحد ميزانيته.
+        """
+        field = self.distance_field(agent.goal, deadline)
+        if field is None:
+            return None
+        start, now = agent.pos, self.now
+        if start not in field:
+            return None
+        horizon = now + self.window
+        table = self.table
+        came_from = {(start, now): None}
+        open_list = [(field[start], 0, start, now)]
+        best = (field[start], now, start)  # أقرب عقدة إلى الهدف إذا تجاوز البحث حده
+        expansions = 0
+        while open_list:
+            _, g, cell, t = heapq.heappop(open_list)
+            expansions += 1
+            if (cell == agent.goal and table.can_hold(cell, t, agent.id)) or t >= horizon:
+                return self.reconstruct(came_from, (cell, t))
+            if expansions > self.max_expansions:
+                break
+            if (deadline is not None and expansions % DEADLINE_CHECK_EVERY == 0 and
+                    time.perf_counter() >= deadline):
+                return None
+            if (field[cell], -t) < (best[0], -best[1]) and table.can_hold(cell, t, agent.id):
+                best = (field[cell], t, cell)
+            for dr, dc in MOVES:
+                nxt = (cell[0] + dr, cell[1] + dc)
+                h = field.get(nxt)
+                if h is None or (nxt, t + 1) in came_from:
+                    continue
+                if not table.can_move(cell, nxt, t, agent.id):
+                    continue
+                came_from[(nxt, t + 1)] = (cell, t)
+                heapq.heappush(open_list, (g + 1 + h, g + 1, nxt, t + 1))
+        if best[2] == start and best[1] == now:
+            return None
+        return self.reconstruct(came_from, (best[2], best[1]))
+
+    @staticmethod
+    def reconstruct(came_from: dict, node: Tuple[Cell, int]) -> List[Cell]:
+        """بناء المسار من جدول الآباء"""
+        path = []
+        while node is not None:
+            path.append(node[0])
+            node = came_from[node]
+        path.reverse()
+        return path
+
+    def replan(self, agent: SwarmAgent, deadline: float = None) -> bool:
+        """إعادة تخطيط وكيل واحد؛ يبقى المسار القديم محجوزاً إذا فشل البحث أو انتهى الوقت"""
+        old_path, old_t0 = agent.path, agent.path_t0
+        self.table.release(agent.id)
+        path = self.search(agent, deadline)
+        self.plans += 1
+        if path is None:
+            self.table.reserve_path(agent.id, old_path, old_t0)
+            return False
+        agent.path, agent.path_t0 = path, self.now
+        self.table.reserve_path(agent.id, path, self.now)
+        return True
+
+    def update(self, budget: float = None):
+        """إعادة تخطيط الوكلاء الأكثر حاجة ضمن الميزانية الزمنية للإطار"""
+        start = time.perf_counter()
+        deadline = start + (self.budget if budget is None else budget) - DEADLINE_SLACK
+        half = self.window // 2
+        # الأولوية: من تغير هدفه ثم من اقترب مساره المحجوز من نهايته
+        queue = sorted(
+            (agent for agent in self.agents
+             if agent.id in self.dirty or (agent.remaining(self.now) < half and agent.pos != agent.goal)),
+            key=lambda agent: (agent.id not in self.dirty, agent.remaining(self.now))
+        )
+        for agent in queue:
+            if time.perf_counter() >= deadline:
+                break
+            if not self.replan(agent, deadline) and time.perf_counter() >= deadline:
+                self.dirty.add(agent.id)  # قطع البحث: يعاد في الإطار التالي أولاً
+                break
+            self.dirty.discard(agent.id)
+        self.last_update_ms = (time.perf_counter() - start) * 1000
+
+    def tick(self):
+        """تقدم جميع الوكلاء خطوة زمنية واحدة حسب مساراتهم المحجوزة"""
+        self.now += 1
+        for agent in self.agents:
+            agent.pos = agent.position_at(self.now)
+            if agent.pos == agent.goal and self.goal_picker is not None:
+                agent.reached += 1
+                agent.goal = self.goal_picker(agent)
+                self.dirty.add(agent.id)
+        if self.now % self.window == 0:
+            self.table.prune(self.now)
+
+    def positions(self) -> List[Cell]:
+        """مواقع جميع الوكلاء"""
+        return [agent.pos for agent in self.agents]
+
+
+def open_cells(grid) -> List[Cell]:
+    """جميع خلايا الممرات في الشبكة (بأي أرضية عدا الجدار)"""
+    return [(r, c) for r in range(len(grid)) for c in range(len(grid[0])) if grid[r][c] != 1]
+
+
+def create_swarm(grid, count: int, rng: random.Random = None, **options) -> CooperativePlanner:
+    """إنشاء مخطط مع عدد من الوكلاء في مواقع عشوائية مختلفة وأهداف عشوائية"""
+    rng = rng or random.Random()
+    cells = open_cells(grid)
+    planner = CooperativePlanner(grid, goal_picker=lambda agent: rng.choice(cells), **options)
+    for pos in rng.sample(cells, min(count, len(cells))):
+        planner.add_agent(pos, rng.choice(cells))
+    return planner
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cooperative multi-agent planning benchmark")
+    parser.add_argument("--agents", type=int, default=40)
+    parser.add_argument("--size", type=int, default=41, help="side of a generated maze")
+    parser.add_argument("--ticks", type=int, default=200)
+    parser.add_argument("--budget-ms", type=float, default=4.0)
+    parser.add_argument("--open", type=float, default=0.15, help="fraction of inner walls removed to add loops")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    from maze_chunks import SeededMazeSource
+    source = SeededMazeSource(args.seed, args.size, args.size)
+    grid = [[source.cell(r, c) for c in range(source.cols)] for r in range(source.rows)]
+    rng = random.Random(args.seed)
+    for r in range(1, source.rows - 1):
+        for c in range(1, source.cols - 1):
+            if (r + c) % 2 and rng.random() < args.open:
+                grid[r][c] = 0
+    planner = create_swarm(grid, args.agents, rng, budget_ms=args.budget_ms)
+
+    frame_times = []
+    for tick in range(args.ticks):
+        planner.update()
+        frame_times.append(planner.last_update_ms)
+        planner.tick()
+        occupied = {}
+        for i, pos in enumerate(planner.positions()):
+            other = occupied.setdefault(pos, i)
+            if other != i:
+                print(f"agents {other} and {i} collided at {pos} on tick {tick}")
+                return 1
+
+    frame_times.sort()
+    reached = sum(agent.reached for agent in planner.agents)
+    print(f"agents={len(planner.agents)} ticks={args.ticks} goals reached={reached} plans={planner.plans}")
+    print(f"planning per frame: p50={frame_times[len(frame_times) // 2]:.2f} ms "
+          f"max={frame_times[-1]:.2f} ms (budget {args.budget_ms} ms)")
+    if frame_times[-1] > args.budget_ms:
+        print("planning exceeded the frame budget")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
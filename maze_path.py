@@ -0,0 +1,158 @@
+# === تمثيل مضغوط للمسارات ===
+# يخزن المسار كخلية بداية وسلسلة اتجاهات (بتان لكل خطوة، أربع خطوات في البايت)
+# مع مؤشر للقراءة، فيصبح استهلاك الخطوة التالية O(1) بدلاً من list.pop(0)،
+# ويشغل مسار طوله ألف خطوة نحو 250 بايت بدلاً من قائمة ألف صف.
+from typing import Iterable, Iterator, List, Tuple
+
+Cell = Tuple[int, int]
+DIRECTIONS = ((0, 1), (1, 0), (0, -1), (-1, 0))  # رمز الاتجاه = موقعه في هذه القائمة
+DIRECTION_CODES = {d: code for code, d in enumerate(DIRECTIONS)}
+
+
+def pack_codes(codes: Iterable[int]) -> Tuple[bytes, int]:
+    """ضغط رموز الاتجاهات (0-3) في بايتات وإرجاع (البيانات، العدد)"""
+    data = bytearray()
+    count = 0
+    for code in codes:
+        if count % 4 == 0:
+            data.append(0)
+        data[-1] |= code << (count % 4) * 2
+        count += 1
+    return bytes(data), count
+
+
+class PackedPath:
+    """مسار مضغوط: خلية بداية واتجاهات بتين لكل خطوة ومؤشر للخطوة التالية
+
+    يعامل كقائمة الخلايا المتبقية بعد الموقع الحالي (مثل SmartAgent.path
+    سابقاً): path[0] هي الخلية التالية، والتكرار يمر على الخلايا المتبقية.
+    البيانات لا تتغير بعد الإنشاء، لذلك النسخ والتقطيع لا ينسخان المسار كله.
+    """
+    __slots__ = ("data", "length", "cursor", "position")
+
+    def __init__(self, start: Cell, data: bytes = b"", length: int = 0):
+        self.data = data
+        self.length = length  # عدد الخطوات الكلي
+        self.cursor = 0  # عدد الخطوات المستهلكة
+        self.position = tuple(start)  # الخلية الحالية (بعد الخطوات المستهلكة)
+
+    @classmethod
+    def from_cells(cls, cells: List[Cell]) -> "PackedPath":
+        """إنشاء مسار من قائمة خلايا متجاورة أولها خلية البداية"""
+        if not cells:
+            raise ValueError("A path needs at least its start cell")
+        try:
+            codes = [DIRECTION_CODES[(b[0] - a[0], b[1] - a[1])] for a, b in zip(cells, cells[1:])]
+        except KeyError:
+            raise ValueError("Path cells must be 4-connected neighbours") from None
+        data, length = pack_codes(codes)
+        return cls(cells[0], data, length)
+
+    @classmethod
+    def from_parents(cls, came_from: dict, goal: Cell) -> "PackedPath":
+        """إعادة بناء المسار من خريطة الآباء التي تنتجها خوارزميات البحث"""
+        codes = []
+        current = goal
+        while came_from.get(current) is not None:  # أب البداية None أو غير مسجل
+            previous = came_from[current]
+            codes.append(DIRECTION_CODES[(current[0] - previous[0], current[1] - previous[1])])
+            current = previous
+        codes.reverse()
+        data, length = pack_codes(codes)
+        return cls(current, data, length)
+
+    def code(self, i: int) -> int:
+        """رمز الخطوة رقم i من بداية المسار"""
+        return (self.data[i >> 2] >> (i & 3) * 2) & 3
+
+    def codes(self, begin: int = None, end: int = None) -> Iterator[int]:
+        """رموز الخطوات المتبقية في المدى [begin, end) نسبة للمؤشر"""
+        begin = self.cursor + (begin or 0)
+        end = self.length if end is None else self.cursor + end
+        data = self.data
+        for i in range(begin, end):
+            yield (data[i >> 2] >> (i & 3) * 2) & 3
+
+    def __len__(self) -> int:
+        return self.length - self.cursor
+
+    def __bool__(self) -> bool:
+        return self.cursor < self.length
+
+    def __iter__(self) -> Iterator[Cell]:
+        r, c = self.position
+        for code in self.codes():
+            dr, dc = DIRECTIONS[code]
+            r += dr
+            c += dc
+            yield r, c
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, PackedPath):
+            return self.position == other.position and list(self.codes()) == list(other.codes())
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"PackedPath(position={self.position}, remaining={len(self)})"
+
+    def cell_at(self, index: int) -> Cell:
+        """الخلية بعد index خطوة من الموقع الحالي (0 هو الموقع الحالي نفسه)"""
+        if not 0 <= index <= len(self):
+            raise IndexError("PackedPath index out of range")
+        r, c = self.position
+        for code in self.codes(0, index):
+            dr, dc = DIRECTIONS[code]
+            r += dr
+            c += dc
+        return r, c
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            begin, end, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("PackedPath slices must be contiguous")
+            end = max(begin, end)
+            data, length = pack_codes(self.codes(begin, end))
+            return PackedPath(self.cell_at(begin), data, length)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("PackedPath index out of range")
+        return self.cell_at(index + 1)
+
+    def peek(self) -> Cell:
+        """الخلية التالية دون استهلاكها"""
+        dr, dc = DIRECTIONS[self.code(self.cursor)]
+        return self.position[0] + dr, self.position[1] + dc
+
+    def advance(self) -> Cell:
+        """استهلاك الخطوة التالية في O(1) وإرجاع الخلية الجديدة"""
+        if self.cursor >= self.length:
+            raise IndexError("advance past the end of the path")
+        self.position = self.peek()
+        self.cursor += 1
+        return self.position
+
+    def copy(self) -> "PackedPath":
+        """نسخة بمؤشر مستقل (تتشارك البيانات نفسها)"""
+        clone = PackedPath(self.position, self.data, self.length)
+        clone.cursor = self.cursor
+        return clone
+
+    def splice(self, index: int, tail: "PackedPath") -> "PackedPath":
+        """إبقاء أول index خطوة ثم متابعة المسار tail (يبدأ من الخلية التي يصلها المسار عندها)"""
+        if tail.position != self.cell_at(index):
+            raise ValueError("Spliced path must start where the kept prefix ends")
+        codes = list(self.codes(0, index))
+        codes.extend(tail.codes())
+        data, length = pack_codes(codes)
+        return PackedPath(self.position, data, length)
+
+    def cells(self) -> List[Cell]:
+        """قائمة الخلايا بدءاً من الموقع الحالي"""
+        return [self.position] + list(self)
+
+    @property
+    def nbytes(self) -> int:
+        """حجم بيانات الاتجاهات بالبايت"""
+        return len(self.data)
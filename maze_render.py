@@ -0,0 +1,184 @@
+# === عرض المتاهات خارج الشاشة: صور مصغرة للمستويات وإطارات للجولات المسجلة ===
+# يعمل مع مشغل SDL الوهمي (بدون نافذة) ويستخدم Maze.draw نفسها حتى تطابق
+# الصور شكل اللعبة. توزع المهام على مجموعة عمليات، وكل عملية تعيد استخدام
+# أسطحها لكل حجم بدلاً من إنشاء سطح جديد لكل صورة.
+# الاستخدام:
+#   python maze_render.py thumbnails --out thumbs
+#   python maze_render.py record 0 --out run.json
+#   python maze_render.py frames run.json --out frames
+import os
+import sys
+import json
+import random
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+import pygame
+
+from maze_game import LEVELS, Maze, SmartAgent, Theme
+from maze_chunks import load_level as load_level_spec
+
+THUMBNAIL_SIZE = 256
+FRAME_CELL_SIZE = 24
+FRAMES_PER_JOB = 60  # عدد الإطارات في كل مهمة من مهام مجموعة العمليات
+
+_surfaces = {}  # أسطح العملية الحالية حسب (الحجم، الشفافية)
+
+
+def init_worker():
+    """تهيئة pygame في عملية العرض (بدون نافذة)"""
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+
+
+def reusable_surface(size: Tuple[int, int]) -> pygame.Surface:
+    """سطح مخزن لكل حجم يعاد استخدامه بين الصور في العملية نفسها"""
+    surface = _surfaces.get(size)
+    if surface is None:
+        surface = pygame.Surface(size)
+        _surfaces[size] = surface
+    return surface
+
+
+def resolve_level(spec: str) -> dict:
+    """رقم مستوى مدمج (0، 1، ...) أو مسار ملف أو مواصفة بذرة"""
+    if spec.isdigit():
+        return LEVELS[int(spec)]
+    return load_level_spec(spec)
+
+
+def draw_maze(maze: Maze) -> pygame.Surface:
+    """رسم المتاهة كاملة على السطح المعاد استخدامه لحجمها"""
+    surface = reusable_surface((maze.cols * maze.cell_size, maze.rows * maze.cell_size))
+    surface.fill(Theme.COLORS['background'])
+    maze.draw(surface, 0, 0)
+    return surface
+
+
+# === الصور المصغرة ===
+def render_thumbnail(job: Tuple[str, str, int, int]) -> str:
+    """رسم صورة مصغرة لمستوى وحفظها (تنفذ داخل عملية من المجموعة)"""
+    spec, path, size, seed = job
+    random.seed(seed)  # نفس توزيع العملات في كل مرة
+    level = resolve_level(spec)
+    rows, cols = len(level["grid"]), len(level["grid"][0])
+    maze = Maze(level, max(1, size // max(rows, cols)))
+    full = draw_maze(maze)
+    scale = size / max(full.get_width(), full.get_height())
+    thumb_size = (max(1, round(full.get_width() * scale)), max(1, round(full.get_height() * scale)))
+    thumb = reusable_surface(thumb_size)
+    pygame.transform.smoothscale(full, thumb_size, thumb)
+    pygame.image.save(thumb, path)
+    return path
+
+
+def render_thumbnails(specs: List[str], out_dir: str, size: int = THUMBNAIL_SIZE,
+                      workers: int = None, seed: int = 0) -> List[str]:
+    """رسم صور مصغرة لعدة مستويات بالتوازي"""
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = [(spec, os.path.join(out_dir, f"level_{i:03d}.png"), size, seed)
+            for i, spec in enumerate(specs)]
+    with ProcessPoolExecutor(workers, initializer=init_worker) as pool:
+        return list(pool.map(render_thumbnail, jobs))
+
+
+# === تسجيل الجولات ===
+def record_run(spec: str, max_frames: int = 3000, every: int = 5, seed: int = 0) -> dict:
+    """تشغيل العميل الذكي على مستوى دون عرض وتسجيل المواقع كل every إطار
+
+    التسجيل مضغوط: العملات الأولية مرة واحدة، ثم موقع اللاعب والأعداء في كل
+    إطار مسجل (العملات المجموعة تستنتج من مرور اللاعب عليها).
+    """
+    random.seed(seed)
+    maze = Maze(resolve_level(spec), FRAME_CELL_SIZE)
+    agent = SmartAgent(maze)
+    record = {"level": spec, "seed": seed, "coins": sorted(maze.coins), "frames": []}
+    for frame in range(max_frames):
+        collided = agent.update()
+        maze.update()
+        if frame % every == 0 or collided or maze.check_goal_reached():
+            record["frames"].append({
+                "player": list(maze.player_pos),
+                "enemies": [list(enemy.pos) for enemy in maze.enemies]
+            })
+        if collided or maze.check_goal_reached():
+            break
+    return record
+
+
+def render_frame_range(job: Tuple[dict, int, int, str, int]) -> int:
+    """رسم مدى من إطارات جولة مسجلة (تنفذ داخل عملية من المجموعة)"""
+    record, begin, end, out_dir, cell_size = job
+    random.seed(record["seed"])
+    maze = Maze(resolve_level(record["level"]), cell_size)
+    maze.coins = {tuple(coin) for coin in record["coins"]}
+    frames = record["frames"]
+    for i in range(end):
+        state = frames[i]
+        maze.player_pos = list(state["player"])
+        maze.coins.discard(tuple(state["player"]))
+        if i < begin:
+            continue  # الإطارات السابقة تحدد العملات المتبقية فقط
+        for enemy, pos in zip(maze.enemies, state["enemies"]):
+            enemy.pos = list(pos)
+        surface = draw_maze(maze)
+        pygame.image.save(surface, os.path.join(out_dir, f"frame_{i:05d}.png"))
+    return end - begin
+
+
+def render_run(record: dict, out_dir: str, cell_size: int = FRAME_CELL_SIZE, workers: int = None) -> int:
+    """رسم جميع إطارات جولة مسجلة إلى ملفات صور بالتوازي"""
+    os.makedirs(out_dir, exist_ok=True)
+    count = len(record["frames"])
+    jobs = [(record, begin, min(count, begin + FRAMES_PER_JOB), out_dir, cell_size)
+            for begin in range(0, count, FRAMES_PER_JOB)]
+    with ProcessPoolExecutor(workers, initializer=init_worker) as pool:
+        return sum(pool.map(render_frame_range, jobs))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offscreen maze rendering")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    thumbs = commands.add_parser("thumbnails", help="render level thumbnails")
+    thumbs.add_argument("levels", nargs="*", help="level numbers, level files or seed:ROWSxCOLS:SEED")
+    thumbs.add_argument("--out", default="thumbnails")
+    thumbs.add_argument("--size", type=int, default=THUMBNAIL_SIZE)
+    thumbs.add_argument("--workers", type=int, default=None)
+
+    record = commands.add_parser("record", help="record an agent run to JSON")
+    record.add_argument("level")
+    record.add_argument("--out", default="run.json")
+    record.add_argument("--frames", type=int, default=3000)
+    record.add_argument("--every", type=int, default=5)
+    record.add_argument("--seed", type=int, default=0)
+
+    frames = commands.add_parser("frames", help="render a recorded run to PNG frames")
+    frames.add_argument("run")
+    frames.add_argument("--out", default="frames")
+    frames.add_argument("--cell-size", type=int, default=FRAME_CELL_SIZE)
+    frames.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    if args.command == "thumbnails":
+        specs = args.levels or [str(i) for i in range(len(LEVELS))]
+        paths = render_thumbnails(specs, args.out, args.size, args.workers)
+        print(f"rendered {len(paths)} thumbnails to {args.out}")
+    elif args.command == "record":
+        init_worker()
+        run = record_run(args.level, args.frames, args.every, args.seed)
+        with open(args.out, "w") as f:
+            json.dump(run, f)
+        print(f"recorded {len(run['frames'])} frames to {args.out}")
+    else:
+        with open(args.run) as f:
+            run = json.load(f)
+        count = render_run(run, args.out, args.cell_size, args.workers)
+        print(f"rendered {count} frames to {args.out}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
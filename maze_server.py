@@ -0,0 +1,447 @@
+# === خادم جلسات المتاهة المحلي (asyncio) ===
+# يشغل جلسات لعب مستقلة كثيرة في عملية واحدة وحلقة أحداث واحدة بدلاً من
+# عملية ونافذة pygame لكل جلسة. بيانات المستويات (الشبكات) مشتركة بين
+# الجلسات، ولكل جلسة متاهتها (اللاعب، الأعداء، العملات) وعميلها الذكي
+# وذاكرة قطعها الخاصة في المتاهات المقسمة.
+# يحدث الخادم كل الجلسات TICK_RATE مرة في الثانية ويرسل لكل عميل التغييرات
+# فقط بصيغة ثنائية مضغوطة. للاستفادة من عدة أنوية تشغل عملية خادم لكل نواة.
+# الاستخدام:
+#   python maze_server.py serve --port 8765
+#   python maze_server.py client --port 8765
+#   python maze_server.py bench --sessions 200 --seconds 5
+#
+# البروتوكول (أعداد little-endian):
+#   العميل -> الخادم: بايت أمر واحد (0-3 حركة حسب DIRECTIONS، 4 حركة تلقائية،
+#   5 إعادة المستوى، 6 المستوى التالي)
+#   الخادم -> العميل: رسائل [طول الجسم u32][النوع u8][الجسم]
+#     MSG_STATE: المستوى u16، النقاط i32، الحالة u8، ثم Maze.snapshot() بدون حالة المولد
+#     MSG_DELTA: رقم التحديث u32، قناع u8، ثم الحقول التي تغيرت فقط حسب القناع
+import sys
+import time
+import random
+import struct
+import asyncio
+import argparse
+from collections import deque
+from typing import Dict, List, Optional
+
+from maze_game import LEVELS, Maze, SmartAgent, is_chunked_grid
+from maze_chunks import load_level as load_level_spec
+from maze_path import DIRECTIONS
+
+TICK_RATE = 60  # تحديثات في الثانية (نفس معدل إطارات اللعبة حتى تبقى السرعات كما هي)
+MAX_BUFFERED = 256 * 1024  # أقصى بيانات غير مرسلة قبل فصل عميل بطيء
+CELL_SIZE = 1  # الخادم لا يرسم
+
+# أوامر العميل
+CMD_AUTO, CMD_RESTART, CMD_NEXT = 4, 5, 6
+
+# رسائل الخادم
+MSG_STATE, MSG_DELTA = 1, 2
+_HEADER = struct.Struct("<IB")
+_STATE = struct.Struct("<HiB")
+_DELTA = struct.Struct("<IB")
+_CELL = struct.Struct("<ii")
+_COUNT = struct.Struct("<H")
+_ENEMY_MOVE = struct.Struct("<Hii")
+_SCORE = struct.Struct("<i")
+_STATUS = struct.Struct("<B")
+
+# حقول قناع التغييرات
+DELTA_PLAYER, DELTA_SCORE, DELTA_STATUS, DELTA_ENEMIES, DELTA_COINS = 1, 2, 4, 8, 16
+
+# حالة الجلسة
+PLAYING, WON, LOST = 0, 1, 2
+
+
+def frame_message(kind: int, body: bytes) -> bytes:
+    """إضافة رأس الطول والنوع إلى جسم الرسالة"""
+    return _HEADER.pack(len(body), kind) + body
+
+
+def resolve_levels(specs: List[str]) -> List[dict]:
+    """بيانات المستويات المشتركة: أرقام المستويات المدمجة أو ملفات أو بذور"""
+    if not specs:
+        return LEVELS
+    return [LEVELS[int(spec)] if spec.isdigit() else load_level_spec(spec) for spec in specs]
+
+
+# === الجلسة ===
+class Session:
+    """حالة لاعب واحد على الخادم (نفس قواعد ModernMazeGame.update دون رسم)"""
+    def __init__(self, levels: List[dict], level: int = 0):
+        self.levels = levels
+        self.inputs = deque()
+        self.tick_count = 0
+        self.load(level)
+
+    def load(self, level: int):
+        """تحميل مستوى من البيانات المشتركة"""
+        self.level = level
+        level_data = self.levels[level]
+        if is_chunked_grid(level_data["grid"]):
+            # ذاكرة قطع خاصة بالجلسة: حذف القطع البعيدة عن لاعب لا يمس قطع جلسة أخرى
+            level_data = dict(level_data, grid=level_data["grid"].fork())
+        self.maze = Maze(level_data, CELL_SIZE)  # ينشئ العملات، فلا حاجة إلى reset هنا
+        self.begin()
+
+    def restart(self):
+        """بدء المستوى من جديد"""
+        self.maze.reset()
+        self.begin()
+
+    def begin(self):
+        """بدء اللعب على المتاهة الحالية وطلب إرسال الحالة كاملة"""
+        self.agent = SmartAgent(self.maze)
+        self.auto_move = False
+        self.player_wait = 0
+        self.score = 0
+        self.status = PLAYING
+        self.needs_state = True
+
+    def remember(self):
+        """حفظ الحالة المرسلة لحساب الفروق في التحديث التالي"""
+        maze = self.maze
+        self.sent_player = tuple(maze.player_pos)
+        self.sent_enemies = [tuple(enemy.pos) for enemy in maze.enemies]
+        self.sent_coins = set(maze.coins)
+        self.sent_score = self.score
+        self.sent_status = self.status
+
+    def collided(self) -> bool:
+        player = self.maze.player_pos
+        return any(enemy.pos == player for enemy in self.maze.enemies)
+
+    def apply(self, command: int):
+        """تنفيذ أمر من العميل"""
+        if command == CMD_RESTART:
+            self.restart()
+        elif command == CMD_NEXT:
+            self.load((self.level + 1) % len(self.levels))
+        elif self.status != PLAYING:
+            return
+        elif command == CMD_AUTO:
+            self.auto_move = not self.auto_move
+        elif command < len(DIRECTIONS) and self.player_wait == 0:
+            if self.maze.move_player(*DIRECTIONS[command]):
+                self.player_wait = self.maze.terrain_delay(self.maze.player_pos)
+            elif self.collided():
+                self.status = LOST
+
+    def update(self):
+        """تحديث واحد للجلسة"""
+        while self.inputs:
+            self.apply(self.inputs.popleft())
+        self.tick_count += 1
+        if self.status != PLAYING:
+            return
+        if self.auto_move and self.agent.update():
+            self.status = LOST
+            return
+        if self.player_wait > 0:
+            self.player_wait -= 1
+        self.score += self.maze.update()
+        if self.collided():
+            self.status = LOST
+        elif self.maze.check_goal_reached():
+            self.status = WON
+            self.score += 100
+
+    def state_message(self) -> bytes:
+        """الحالة كاملة: رقم المستوى ثم لقطة المتاهة"""
+        self.needs_state = False
+        self.remember()
+        return frame_message(MSG_STATE, _STATE.pack(self.level, self.score, self.status) +
+                             self.maze.snapshot(include_rng=False))
+
+    def delta_message(self) -> bytes:
+        """التغييرات منذ آخر رسالة (b"" إذا لم يتغير شيء)"""
+        if self.needs_state:
+            return self.state_message()
+        maze = self.maze
+        mask = 0
+        parts = []
+        player = tuple(maze.player_pos)
+        if player != self.sent_player:
+            mask |= DELTA_PLAYER
+            parts.append(_CELL.pack(*player))
+            self.sent_player = player
+        if self.score != self.sent_score:
+            mask |= DELTA_SCORE
+            parts.append(_SCORE.pack(self.score))
+            self.sent_score = self.score
+        if self.status != self.sent_status:
+            mask |= DELTA_STATUS
+            parts.append(_STATUS.pack(self.status))
+            self.sent_status = self.status
+        moved = []
+        sent_enemies = self.sent_enemies
+        for i, enemy in enumerate(maze.enemies):
+            pos = enemy.pos
+            if pos[0] != sent_enemies[i][0] or pos[1] != sent_enemies[i][1]:
+                sent_enemies[i] = tuple(pos)
+                moved.append(_ENEMY_MOVE.pack(i, pos[0], pos[1]))
+        if moved:
+            mask |= DELTA_ENEMIES
+            parts.append(_COUNT.pack(len(moved)))
+            parts.extend(moved)
+        if len(maze.coins) != len(self.sent_coins):
+            taken = self.sent_coins - maze.coins
+            mask |= DELTA_COINS
+            parts.append(_COUNT.pack(len(taken)))
+            parts.extend(_CELL.pack(*coin) for coin in taken)
+            self.sent_coins -= taken
+        if not mask:
+            return b""
+        return frame_message(MSG_DELTA, _DELTA.pack(self.tick_count, mask) + b"".join(parts))
+
+
+# === الخادم ===
+class MazeServer:
+    """جلسات مستقلة على حلقة أحداث واحدة مع تحديث دوري مشترك"""
+    def __init__(self, levels: List[dict], tick_rate: int = TICK_RATE):
+        self.levels = levels
+        self.tick_rate = tick_rate
+        self.clients: Dict[Session, asyncio.StreamWriter] = {}
+        self.ticks = 0
+        self.busy_time = 0.0  # زمن التحديث والإرسال الكلي (ثوانٍ)
+        self.bytes_sent = 0
+        self.server = None
+        self.ticker = None
+        self.handlers = set()
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """جلسة جديدة لكل اتصال؛ الأوامر تتراكم وتنفذ في التحديث التالي"""
+        session = Session(self.levels)
+        self.clients[session] = writer
+        self.handlers.add(asyncio.current_task())
+        try:
+            while True:
+                commands = await reader.read(64)
+                if not commands:
+                    break
+                session.inputs.extend(commands)
+        except ConnectionError:
+            pass
+        finally:
+            self.clients.pop(session, None)
+            self.handlers.discard(asyncio.current_task())
+            writer.close()
+
+    def tick(self):
+        """تحديث جميع الجلسات وإرسال فروقها"""
+        begin = time.perf_counter()
+        for session, writer in list(self.clients.items()):
+            session.update()
+            message = session.delta_message()
+            if not message:
+                continue
+            transport = writer.transport
+            if transport.is_closing():
+                continue
+            if transport.get_write_buffer_size() > MAX_BUFFERED:
+                transport.abort()  # العميل لا يقرأ: فصله بدلاً من تراكم البيانات
+                continue
+            writer.write(message)
+            self.bytes_sent += len(message)
+        self.ticks += 1
+        self.busy_time += time.perf_counter() - begin
+
+    async def run_ticks(self):
+        """تحديث دوري بمعدل ثابت (تتخطى الحلقة المواعيد الفائتة بدلاً من تراكمها)"""
+        loop = asyncio.get_running_loop()
+        interval = 1 / self.tick_rate
+        next_tick = loop.time()
+        while True:
+            self.tick()
+            next_tick += interval
+            delay = next_tick - loop.time()
+            if delay < 0:
+                next_tick = loop.time()
+                delay = 0
+            await asyncio.sleep(delay)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765, path: Optional[str] = None):
+        """بدء الاستماع (مقبس يونكس إذا حدد path) والتحديث الدوري"""
+        if path:
+            self.server = await asyncio.start_unix_server(self.handle_client, path)
+        else:
+            self.server = await asyncio.start_server(self.handle_client, host, port)
+        self.ticker = asyncio.ensure_future(self.run_ticks())
+
+    async def stop(self):
+        """إيقاف التحديث وإغلاق الاتصالات (تنتهي معالجات العملاء بقراءة نهاية الاتصال)"""
+        self.ticker.cancel()
+        self.server.close()
+        for writer in self.clients.values():
+            writer.close()
+        await asyncio.gather(self.ticker, *self.handlers, return_exceptions=True)
+        await self.server.wait_closed()
+
+
+# === عميل بديل للاختبار ===
+class StandInClient:
+    """عميل بسيط يحتفظ بنسخة من المتاهة ويطبق عليها رسائل الخادم
+
+    يبني المتاهة من بيانات المستويات نفسها ويستعيد لقطة الحالة الكاملة ثم
+    يطبق الفروق، ويرسل أوامر عشوائية (أو يفعل الحركة التلقائية) مثل لاعب.
+    """
+    def __init__(self, levels: List[dict], auto: bool = True, seed: int = 0):
+        self.levels = levels
+        self.auto = auto
+        self.rng = random.Random(seed)
+        self.maze = None
+        self.level = None
+        self.score = 0
+        self.status = PLAYING
+        self.last_tick = 0
+        self.messages = 0
+        self.bytes_received = 0
+        self.reader = None
+        self.writer = None
+
+    async def connect(self, host: str = "127.0.0.1", port: int = 8765, path: Optional[str] = None):
+        if path:
+            self.reader, self.writer = await asyncio.open_unix_connection(path)
+        else:
+            self.reader, self.writer = await asyncio.open_connection(host, port)
+
+    def send(self, command: int):
+        self.writer.write(bytes((command,)))
+
+    def apply_state(self, body: memoryview):
+        level, self.score, self.status = _STATE.unpack_from(body, 0)
+        if level != self.level or self.maze is None:
+            self.maze = Maze(self.levels[level], CELL_SIZE, seed=0)  # العملات والأعداء تأتي من اللقطة
+            self.level = level
+        self.maze.restore(body[_STATE.size:])
+        if self.auto and self.status == PLAYING:
+            self.send(CMD_AUTO)
+
+    def apply_delta(self, body: memoryview):
+        self.last_tick, mask = _DELTA.unpack_from(body, 0)
+        offset = _DELTA.size
+        maze = self.maze
+        if mask & DELTA_PLAYER:
+            maze.player_pos = list(_CELL.unpack_from(body, offset))
+            offset += _CELL.size
+        if mask & DELTA_SCORE:
+            self.score, = _SCORE.unpack_from(body, offset)
+            offset += _SCORE.size
+        if mask & DELTA_STATUS:
+            self.status, = _STATUS.unpack_from(body, offset)
+            offset += _STATUS.size
+        if mask & DELTA_ENEMIES:
+            count, = _COUNT.unpack_from(body, offset)
+            offset += _COUNT.size
+            for _ in range(count):
+                i, r, c = _ENEMY_MOVE.unpack_from(body, offset)
+                maze.enemies[i].pos = [r, c]
+                offset += _ENEMY_MOVE.size
+        if mask & DELTA_COINS:
+            count, = _COUNT.unpack_from(body, offset)
+            offset += _COUNT.size
+            for _ in range(count):
+                maze.coins.discard(_CELL.unpack_from(body, offset))
+                offset += _CELL.size
+
+    def react(self):
+        """قرار اللاعب البديل بعد كل رسالة"""
+        if self.status != PLAYING:
+            self.send(CMD_NEXT if self.status == WON else CMD_RESTART)
+        elif not self.auto and self.rng.random() < 0.2:
+            self.send(self.rng.randrange(len(DIRECTIONS)))
+
+    async def run(self, duration: float = None):
+        """استقبال الرسائل وتطبيقها حتى انقطاع الاتصال أو انتهاء المدة"""
+        loop = asyncio.get_running_loop()
+        deadline = None if duration is None else loop.time() + duration
+        try:
+            while True:
+                timeout = None if deadline is None else deadline - loop.time()
+                if timeout is not None and timeout <= 0:
+                    break
+                header = await asyncio.wait_for(self.reader.readexactly(_HEADER.size), timeout)
+                length, kind = _HEADER.unpack(header)
+                body = memoryview(await self.reader.readexactly(length))
+                self.messages += 1
+                self.bytes_received += _HEADER.size + length
+                if kind == MSG_STATE:
+                    self.apply_state(body)
+                elif kind == MSG_DELTA:
+                    self.apply_delta(body)
+                self.react()
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            self.writer.close()
+
+
+# === القياس ===
+async def bench(levels: List[dict], sessions: int, seconds: float, tick_rate: int = TICK_RATE) -> dict:
+    """خادم وعملاء بدلاء في العملية نفسها؛ يقاس زمن تحديث الخادم فقط"""
+    server = MazeServer(levels, tick_rate)
+    await server.start("127.0.0.1", 0)
+    port = server.server.sockets[0].getsockname()[1]
+    clients = [StandInClient(levels, auto=i % 2 == 0, seed=i) for i in range(sessions)]
+    for client in clients:
+        await client.connect("127.0.0.1", port)
+    runs = [asyncio.ensure_future(client.run()) for client in clients]
+    await asyncio.sleep(0.5)  # حتى تنشأ جميع الجلسات
+    server.ticks, server.busy_time, server.bytes_sent = 0, 0.0, 0
+    await asyncio.sleep(seconds)
+    await server.stop()
+    await asyncio.gather(*runs)
+
+    per_tick = server.busy_time / max(1, server.ticks)
+    per_session = per_tick / max(1, sessions)
+    return {
+        "sessions": sessions,
+        "ticks": server.ticks,
+        "tick_ms": per_tick * 1000,
+        "session_us": per_session * 1e6,
+        "sessions_per_core": int(1 / tick_rate / per_session) if per_session else 0,
+        "bytes_per_session_tick": server.bytes_sent / max(1, server.ticks * sessions),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local asyncio maze session server")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name in ("serve", "client", "bench"):
+        sub = commands.add_parser(name)
+        sub.add_argument("--levels", nargs="*", default=[], help="level numbers, files or seed:ROWSxCOLS:SEED")
+        sub.add_argument("--host", default="127.0.0.1")
+        sub.add_argument("--port", type=int, default=8765)
+        sub.add_argument("--unix", default=None, help="unix socket path instead of TCP")
+    commands.choices["client"].add_argument("--manual", action="store_true", help="random moves instead of auto-move")
+    commands.choices["client"].add_argument("--seconds", type=float, default=10)
+    commands.choices["bench"].add_argument("--sessions", type=int, default=100)
+    commands.choices["bench"].add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args(argv)
+    levels = resolve_levels(args.levels)
+
+    if args.command == "serve":
+        async def serve():
+            server = MazeServer(levels)
+            await server.start(args.host, args.port, args.unix)
+            print(f"serving {len(levels)} levels on {args.unix or f'{args.host}:{args.port}'}")
+            await server.ticker
+        asyncio.run(serve())
+    elif args.command == "client":
+        async def play():
+            client = StandInClient(levels, auto=not args.manual)
+            await client.connect(args.host, args.port, args.unix)
+            await client.run(args.seconds)
+            print(f"level {client.level} score {client.score} tick {client.last_tick} "
+                  f"messages {client.messages} bytes {client.bytes_received}")
+        asyncio.run(play())
+    else:
+        stats = asyncio.run(bench(levels, args.sessions, args.seconds))
+        print(f"{stats['sessions']} sessions, {stats['ticks']} ticks: {stats['tick_ms']:.2f} ms/tick, "
+              f"{stats['session_us']:.1f} us/session, {stats['bytes_per_session_tick']:.1f} bytes/session/tick")
+        print(f"sessions per core at {TICK_RATE} Hz: {stats['sessions_per_core']}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+# === أنواع الأرضيات ذات التكلفة والبحث بطابور الدلاء (خوارزمية Dial) ===
+# قيم الخلايا في الشبكة وفي ملفات levels/*.txt:
+#   0 ممر عادي، 1 جدار، 2 طين، 3 جليد (زلق)، 4 خطر
+# التكاليف أعداد صحيحة صغيرة، لذلك يستخدم البحث طابوراً من الدلاء المرتبة
+# حسب التكلفة بدلاً من الكومة الثنائية: الإدخال والسحب O(1) تقريباً.
+from array import array
+from typing import Callable, Iterable, Tuple
+
+from maze_path import PackedPath
+
+Cell = Tuple[int, int]
+
+FLOOR, WALL, MUD, ICE, HAZARD = 0, 1, 2, 3, 4
+# تكلفة دخول الخلية: الممر العادي هو الأرخص حتى يبقى تقدير A* (المسافة × 1)
+# قوياً في المستويات الموزونة كما في العادية
+TERRAIN_COSTS = {FLOOR: 1, ICE: 2, MUD: 4, HAZARD: 8}
+TERRAIN_NAMES = {MUD: "mud", ICE: "ice", HAZARD: "hazard"}  # أسماء الألوان في Theme.COLORS
+FLOOR_COST = TERRAIN_COSTS[FLOOR]
+MIN_COST = min(TERRAIN_COSTS.values())
+MAX_COST = max(TERRAIN_COSTS.values())
+
+# جدول تكلفة لكل قيمة خلية (القيم غير المعروفة تعامل كممر عادي، والجدار 0)
+COST_TABLE = bytes(
+    0 if value == WALL else TERRAIN_COSTS.get(value, FLOOR_COST) for value in range(256)
+)
+
+
+def terrain_summary(grid) -> set:
+    """قيم الأرضيات المستخدمة في الشبكة (بدون الجدران)"""
+    values = set()
+    for row in grid:
+        values.update(row)
+    values.discard(WALL)
+    return values
+
+
+class BucketQueue:
+    """طابور أولوية لمفاتيح صحيحة متزايدة يتسع مداها لـ span قيمة متتالية
+
+    يكفي span = أكبر فرق ممكن بين مفتاح العقدة المسحوبة ومفاتيح جيرانها + 1،
+    فتستخدم الدلاء بشكل دائري دون أن يكبر حجمها مع طول المسار.
+    """
+    def __init__(self, span: int):
+        self.buckets = [[] for _ in range(span)]
+        self.span = span
+        self.key = 0  # أصغر مفتاح ممكن حالياً
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def push(self, key: int, item):
+        """إضافة عنصر بمفتاح لا يقل عن آخر مفتاح مسحوب"""
+        self.buckets[key % self.span].append((key, item))
+        self.size += 1
+
+    def pop(self):
+        """سحب عنصر بأصغر مفتاح وإرجاع (المفتاح، العنصر)"""
+        buckets, span = self.buckets, self.span
+        while not buckets[self.key % span]:
+            self.key += 1
+        self.size -= 1
+        return buckets[self.key % span].pop()
+
+
+def manhattan_heuristic(goal: Cell, scale: int = MIN_COST) -> Callable[[Cell], int]:
+    """المسافة المانهاتنية × أصغر تكلفة: تقدير متسق لأي شبكة"""
+    def h(cell: Cell) -> int:
+        return scale * (abs(cell[0] - goal[0]) + abs(cell[1] - goal[1]))
+    return h
+
+
+def field_heuristic(distances, cols: int) -> Callable[[Cell], int]:
+    """التكلفة الحقيقية إلى الهدف من حقل محسوب مسبقاً (تقدير متسق ودقيق)
+
+    يبقى صالحاً (لا يتجاوز التكلفة) عند حذف حواف من البحث مثل تجنب
+    الأعداء. القيم السالبة تعني أن الهدف غير قابل للوصول من الخلية.
+    """
+    def h(cell: Cell) -> int:
+        return distances[cell[0] * cols + cell[1]]
+    return h
+
+
+def cost_to_goal_field(goal: Cell, rows: int, cols: int, neighbors: Callable[[Cell], Iterable[Cell]],
+                       cost: Callable[[Cell], int]) -> array:
+    """تكلفة أرخص مسار من كل خلية إلى الهدف (Dial عكسي من الهدف، -1 لغير القابلة للوصول)"""
+    distances = array("i", [-1]) * (rows * cols)
+    queue = BucketQueue(MAX_COST + 1)
+    queue.push(0, goal)
+    while queue:
+        d, cell = queue.pop()
+        index = cell[0] * cols + cell[1]
+        if distances[index] >= 0:
+            continue
+        distances[index] = d
+        step = d + cost(cell)  # الجار يدفع تكلفة دخول هذه الخلية
+        for r, c in neighbors(cell):
+            if distances[r * cols + c] < 0:
+                queue.push(step, (r, c))
+    return distances
+
+
+def dial_steps(start: Cell, goal: Cell, neighbors: Callable[[Cell], Iterable[Cell]],
+               cost: Callable[[Cell], int], heuristic: Callable[[Cell], int] = None):
+    """بحث أقصر مسار بتكاليف صحيحة صغيرة خطوة بخطوة (Dial، أو A* بدلاء)
+
+    heuristic تقدير متسق لا يتغير بين جارين بأكثر من MAX_COST (بدونه يصبح
+    البحث Dijkstra)، وقيمته السالبة تستبعد الخلية. المولد يعطي (الخلية
+    المستكشفة، الخلايا المضافة) مثل باقي الخوارزميات ويعيد المسار المضغوط أو
+    [] إذا لم يوجد.
+    """
+    h = heuristic or (lambda cell: 0)
+
+    # مفتاح الجار يزيد عن مفتاح الحالية بتكلفة الخطوة وتغير التقدير: بين 0 و 2 × MAX_COST
+    queue = BucketQueue(2 * MAX_COST + 1)
+    queue.key = max(0, h(start))
+    queue.push(queue.key, start)
+    g_score = {start: 0}
+    came_from = {start: None}
+    closed = set()
+    while queue:
+        _, current = queue.pop()
+        if current in closed:
+            continue  # نسخة قديمة بتكلفة أعلى
+        if current == goal:
+            return PackedPath.from_parents(came_from, goal)
+        closed.add(current)
+        base = g_score[current]
+        added = []
+        for next_pos in neighbors(current):
+            if next_pos in closed:
+                continue
+            g = base + cost(next_pos)
+            if g < g_score.get(next_pos, g + 1):
+                estimate = h(next_pos)
+                if estimate < 0:
+                    continue  # لا يصل إلى الهدف
+                g_score[next_pos] = g
+                came_from[next_pos] = current
+                queue.push(g + estimate, next_pos)
+                added.append(next_pos)
+        yield current, added
+    return []